@@ -0,0 +1 @@
+"""GeoServer client benchmarks"""
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+"""
+Peak RSS, time to first item and total time of decoding a large layer
+listing whole or streamed, with the standard and the fast JSON decoders.
+
+Every run takes place in a new interpreter, so that peak RSS isn't shared;
+it is read from /proc, so it only runs on Linux. Run it from the repository
+root::
+
+    python -m benchmarks.bench_listing --sizes 10000,100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from test.stub import StubGeoServer, synthetic_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('whole', 'streamed')
+DECODERS = ('json', 'orjson')
+
+
+def peak_rss():
+    """
+    Peak resident memory of the process in kilobytes. It is read from
+    /proc, since ``ru_maxrss`` keeps the peak of the parent across exec.
+    """
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    raise OSError('Peak RSS not available')
+
+
+def child(url, mode, decoder):
+    """
+    Lists the layers of the stub, printing the measures as JSON.
+    """
+    from geoserver import GeoServer as module
+    from geoserver import JsonStream
+    if decoder == 'json':
+        JsonStream.loads = module.loads = json.loads
+    elif JsonStream.loads is json.loads:
+        raise SystemExit('orjson is not installed')
+    gs = module.GeoServer(url, 'admin', 'geoserver')
+    gs._get('workspaces')
+    base = peak_rss()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    if mode == 'whole':
+        entries = gs._get('layers')['layers']['layer']
+    else:
+        entries = gs._listing('layers', 'layer')
+    for _ in entries:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    peak = peak_rss()
+    gs.close()
+    print(json.dumps({'count': count, 'first': first, 'total': total,
+                      'rss': (peak - base) / 1024}))
+
+
+def measure(url, mode, decoder):
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_listing', '--child', url,
+         mode, decoder], check=True, stdout=subprocess.PIPE, cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=ROOT))
+    return json.loads(out.stdout.decode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='Comma separated numbers of layers')
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    print('{:<8} {:<10} {:<8} {:>12} {:>10} {:>10}'.format(
+        'layers', 'mode', 'decoder', 'peak RSS MB', 'first ms', 'total ms'))
+    for size in (int(s) for s in args.sizes.split(',')):
+        catalog = synthetic_catalog(workspaces=max(1, size // 100),
+                                    layers=size)
+        with StubGeoServer(catalog) as stub:
+            for mode in MODES:
+                for decoder in DECODERS:
+                    r = measure(stub.url, mode, decoder)
+                    print('{:<8} {:<10} {:<8} {:>12.1f} {:>10.1f} {:>10.1f}'
+                          .format(r['count'], mode, decoder, r['rss'],
+                                  r['first'] * 1000, r['total'] * 1000))
+
+
+if __name__ == '__main__':
+    main()
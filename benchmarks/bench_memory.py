@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+"""
+Memory held per layer by catalogs of growing size, measured with
+tracemalloc.
+
+Run it from the repository root::
+
+    python -m benchmarks.bench_memory --sizes 10000,100000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from geoserver.GeoServer import GeoServer
+from geoserver.Datastore import Datastore
+from geoserver.Layer import Layer
+from geoserver.Style import Style
+from geoserver.Workspace import Workspace
+from test.stub import StubGeoServer, synthetic_catalog
+
+LAYERS_PER_WORKSPACE = 100
+STYLES = 10
+
+
+def hydrated(size):
+    """
+    Layers built like :meth:`GeoServer.get_layers` does in a session, from
+    names decoded from JSON as they come from the REST API.
+    """
+    gs = GeoServer('http://localhost/geoserver', 'admin', 'geoserver')
+    workspaces = max(1, size // LAYERS_PER_WORKSPACE)
+    listing = json.loads(json.dumps([
+        {'name': 'layer%d' % i, 'workspace': 'ws%d' % (i % workspaces),
+         'style': 'style%d' % (i % STYLES)} for i in range(size)]))
+
+    def build():
+        parents = {}
+        styles = {}
+        layers = []
+        for info in listing:
+            ws_name = info['workspace']
+            if ws_name not in parents:
+                ws = Workspace(ws_name, gs, 'http://' + ws_name)
+                parents[ws_name] = (ws, Datastore('ds', gs, ws, 'Shapefile',
+                                                  None))
+            if info['style'] not in styles:
+                styles[info['style']] = Style(info['style'], gs)
+            ws, ds = parents[ws_name]
+            name = ws_name + ':' + info['name']
+            layers.append(Layer(name, gs, styles[info['style']], ds, ws))
+        return layers
+    return build
+
+
+def lazy(size):
+    """
+    Lazy layers of a listing requested to the stub.
+    """
+    catalog = synthetic_catalog(workspaces=max(1, size // LAYERS_PER_WORKSPACE),
+                                layers=size, styles=STYLES)
+    stub = StubGeoServer(catalog).start()
+    gs = GeoServer(stub.url, 'admin', 'geoserver', lazy=True)
+
+    def build():
+        try:
+            return gs.get_layers()
+        finally:
+            gs.close()
+            stub.stop()
+    return build
+
+
+def measure(build):
+    """
+    Bytes still allocated after building, and peak bytes while building.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current - before, peak - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='Comma separated numbers of layers')
+    args = parser.parse_args()
+
+    print('{:<10} {:>8} {:>14} {:>12} {:>12}'.format(
+        'model', 'layers', 'bytes/layer', 'held MB', 'peak MB'))
+    for size in (int(s) for s in args.sizes.split(',')):
+        for name, setup in (('hydrated', hydrated), ('lazy', lazy)):
+            held, peak = measure(setup(size))
+            print('{:<10} {:>8} {:>14.0f} {:>12.1f} {:>12.1f}'.format(
+                name, size, held / size, held / 2 ** 20, peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
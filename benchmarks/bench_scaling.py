@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+"""
+Wall time and requests of ``get_workspaces()``, ``get_layers()`` and
+``get_layergroups()`` on synthetic catalogs of growing size.
+
+Run it from the repository root::
+
+    python -m benchmarks.bench_scaling --sizes 10,1000,10000 --latency 1
+"""
+import argparse
+import time
+from geoserver.GeoServer import GeoServer
+from test.stub import StubGeoServer, synthetic_catalog
+
+LAYERS_PER_WORKSPACE = 100
+LAYERS_PER_GROUP = 5
+STYLES = 10
+
+
+def catalogs(size):
+    """
+    Catalogs with ``size`` objects of the type listed by each method.
+    """
+    workspaces = max(1, size // LAYERS_PER_WORKSPACE)
+    return [
+        ('get_workspaces', synthetic_catalog(workspaces=size, layers=0)),
+        ('get_layers', synthetic_catalog(workspaces=workspaces, layers=size,
+                                         styles=STYLES)),
+        ('get_layergroups', synthetic_catalog(
+            workspaces=workspaces, layers=size, styles=STYLES,
+            layergroups=size, layers_per_group=LAYERS_PER_GROUP))
+    ]
+
+
+def run(stub, method, **kwargs):
+    stub.reset_counters()
+    with GeoServer(stub.url, 'admin', 'geoserver', **kwargs) as gs:
+        start = time.perf_counter()
+        result = getattr(gs, method)()
+        elapsed = time.perf_counter() - start
+    return len(result), len(stub.requests), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='10,1000,10000',
+                        help='Comma separated catalog sizes')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Latency of every request in milliseconds')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Threads of the concurrent runs (0 to skip them)')
+    args = parser.parse_args()
+
+    modes = [('serial', {})]
+    if args.workers:
+        modes.append(('workers=%d' % args.workers,
+                      {'max_workers': args.workers}))
+
+    print('{:<16} {:<12} {:>8} {:>10} {:>10}'.format(
+        'method', 'mode', 'objects', 'requests', 'seconds'))
+    for size in (int(s) for s in args.sizes.split(',')):
+        for method, catalog in catalogs(size):
+            with StubGeoServer(catalog, latency=args.latency / 1000) as stub:
+                for mode, kwargs in modes:
+                    objects, requests, elapsed = run(stub, method, **kwargs)
+                    print('{:<16} {:<12} {:>8} {:>10} {:>10.2f}'.format(
+                        method, mode, objects, requests, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+"""
+Connections opened and wall time of ``get_layers()`` with and without a
+pooled keep-alive session.
+
+Run it from the repository root::
+
+    python -m benchmarks.bench_session --layers 1000
+"""
+import argparse
+import time
+import requests
+from geoserver.GeoServer import GeoServer
+from test.stub import StubGeoServer, synthetic_catalog
+
+
+class PerCallSession:
+    """
+    Opens a new connection for every request through the module-level
+    ``requests`` API, as ``GeoServer._request`` used to do.
+    """
+
+    def __init__(self, auth):
+        self.auth = auth
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method, url, auth=self.auth, **kwargs)
+
+    def close(self):
+        pass
+
+
+def run(stub, pooled):
+    stub.reset_counters()
+    gs = GeoServer(stub.url, 'admin', 'geoserver')
+    if not pooled:
+        gs._session = PerCallSession((gs.user, gs.password))  # pylint: disable=protected-access
+    start = time.perf_counter()
+    layers = gs.get_layers()
+    elapsed = time.perf_counter() - start
+    gs.close()
+    return len(layers), len(stub.requests), stub.connections, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--layers', type=int, default=1000)
+    parser.add_argument('--workspaces', type=int, default=10)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(workspaces=args.workspaces,
+                                layers=args.layers, styles=10)
+    print('{:<10} {:>8} {:>10} {:>12} {:>10}'.format(
+        'mode', 'layers', 'requests', 'connections', 'seconds'))
+    with StubGeoServer(catalog) as stub:
+        for pooled in (False, True):
+            layers, reqs, conns, elapsed = run(stub, pooled)
+            print('{:<10} {:>8} {:>10} {:>12} {:>10.2f}'.format(
+                'pooled' if pooled else 'per-call',
+                layers, reqs, conns, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+"""
+Wall time of running the ``geoserver`` script, which is dominated by
+interpreter startup and imports.
+
+Run it from the repository root::
+
+    python -m benchmarks.bench_startup --runs 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from test.stub import StubGeoServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'geoserver', 'cli', 'geoserver')
+
+
+def measure(args, runs):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[0], times[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    print('{:<24} {:>10} {:>10}'.format('command', 'min ms', 'median ms'))
+    with StubGeoServer() as stub:
+        commands = [
+            ('python -c pass', ['-c', 'pass']),
+            ('geoserver --help', [SCRIPT, '--help']),
+            ('geoserver fonts', [SCRIPT, '--url', stub.url, 'fonts'])
+        ]
+        for name, command in commands:
+            best, median = measure(command, args.runs)
+            print('{:<24} {:>10.1f} {:>10.1f}'.format(
+                name, best * 1000, median * 1000))
+
+
+if __name__ == '__main__':
+    main()
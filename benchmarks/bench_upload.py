@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+"""
+Peak memory of the upload bodies built for shapefiles and GeoTIFFs, for
+files of growing size.
+
+Run it from the repository root::
+
+    python -m benchmarks.bench_upload --sizes 8 32 128
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from geoserver.Upload import FileStream, zip_stream
+
+CHUNK = 1024 * 1024
+
+
+def write(path, size_mb):
+    block = os.urandom(CHUNK // 2) * 2
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def measure(body):
+    tracemalloc.start()
+    start = time.perf_counter()
+    sent = 0
+    for chunk in body:
+        sent += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return sent, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 32, 128],
+                        help='File sizes in MB')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    print('{:<6} {:>8} {:>14} {:>12} {:>10}'.format(
+        'body', 'size MB', 'bytes sent', 'peak KB', 'seconds'))
+    try:
+        for size in args.sizes:
+            shp = os.path.join(tmp, 'data.shp')
+            tif = os.path.join(tmp, 'data.tif')
+            write(shp, size)
+            write(tif, size)
+            with FileStream(tif) as f:
+                rows = [('tiff',) + measure(f)]
+            rows.append(('shp',) + measure(zip_stream([shp])))
+            for name, sent, peak, elapsed in rows:
+                print('{:<6} {:>8} {:>14} {:>12.0f} {:>10.2f}'.format(
+                    name, size, sent, peak / 1024, elapsed))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
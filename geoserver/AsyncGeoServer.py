@@ -0,0 +1,589 @@
+"""
+AsyncGeoServer
+"""
+import asyncio
+import base64
+import logging
+import json
+import time
+from contextlib import contextmanager
+from urllib.parse import urljoin
+import aiohttp
+from geoserver.Workspace import Workspace
+from geoserver.Datastore import Datastore
+from geoserver.Layer import Layer
+from geoserver.LayerGroup import LAYER_GROUP_TYPE, LayerGroup, \
+    published_members, resolution_order
+from geoserver.Style import Style
+from geoserver.GeoServer import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, \
+    NotFoundError
+from geoserver.JsonStream import listing_items
+
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncGeoServer:
+    """
+    Asyncio client for a GeoServer instance, with the same methods as
+    :class:`geoserver.GeoServer` as coroutines.
+
+    The per-layer requests of listing methods are run concurrently, limited by
+    ``max_concurrency``. It returns the same resource classes; their methods
+    calling the REST API, such as :meth:`geoserver.Style.delete`, return
+    awaitables.
+
+    :param url: URL of the GeoServer instance.
+    :param user: user for authentication in the REST API.
+    :param pass: password for authentication in the REST API.
+    :param pool_size: maximum number of connections to the instance.
+    :param timeout: connect and read timeouts (in seconds) for every request,
+      either as a single number or as a ``(connect, read)`` tuple.
+    :param max_concurrency: maximum number of concurrent requests.
+    :param retry: policy to retry failed idempotent requests; requests are
+      not retried if not set.
+    :param circuit_breaker: circuit breaker to fail fast while the instance
+      is down, if any.
+    :param on_request: function called after every HTTP request, as in
+      :class:`geoserver.GeoServer`.
+    :param governor: limits of the requests in flight and of the request
+      rate, as in :class:`geoserver.GeoServer`.
+    :type url: string
+    :type user: string
+    :type pass: string
+    :type pool_size: int
+    :type timeout: float or tuple
+    :type max_concurrency: int
+    :type retry: :class:`geoserver.Retry.RetryPolicy`
+    :type circuit_breaker: :class:`geoserver.Retry.CircuitBreaker`
+    :type on_request: callable
+    :type governor: :class:`geoserver.Governor.Governor`
+    """
+
+    def __init__(self, url, user, password,  # pylint: disable=too-many-arguments
+                 pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT,
+                 max_concurrency=DEFAULT_CONCURRENCY,
+                 retry=None,
+                 circuit_breaker=None,
+                 on_request=None,
+                 governor=None):
+        self.base_url = url + "/"
+        self.url = urljoin(self.base_url, 'rest/')
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.on_request = on_request
+        self.governor = governor
+        self._session = None
+        self._semaphore = None
+        self._identity_map = None
+        self._identity_map_depth = 0
+
+    def _client_session(self):
+        if self._session is None:
+            connect, read = (self.timeout if isinstance(self.timeout, tuple)
+                             else (self.timeout, self.timeout))
+            credentials = '{}:{}'.format(self.user, self.password)
+            auth = base64.b64encode(credentials.encode('utf-8'))
+            self._session = aiohttp.ClientSession(
+                headers={'Authorization': 'Basic ' + auth.decode('ascii')},
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect,
+                                              sock_read=read))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        """
+        Closes all the pooled connections to the GeoServer instance.
+
+        :rtype: None
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @contextmanager
+    def session(self):
+        """
+        Shares the resources fetched inside the block, as
+        :meth:`geoserver.GeoServer.session` does.
+        """
+        if not self._identity_map_depth:
+            self._identity_map = {}
+        self._identity_map_depth += 1
+        try:
+            yield self
+        finally:
+            self._identity_map_depth -= 1
+            if not self._identity_map_depth:
+                self._identity_map = None
+
+    async def _cached(self, key, load, *args):
+        identity_map = self._identity_map
+        if identity_map is None:
+            return await load(*args)
+        task = identity_map.get(key)
+        if task is None:
+            task = identity_map[key] = asyncio.ensure_future(load(*args))
+        return await task
+
+    async def _namespaces(self):
+        async def load():
+            return listing_items(await self._get('namespaces'), 'namespace')
+        return await self._cached(('namespaces',), load)
+
+    async def _workspace_from_json(self, ws, namespaces=None):
+        if not namespaces:
+            namespaces = await self._namespaces()
+
+        f = filter(lambda n: n['name'] == ws['name'], namespaces)
+        namespace = next(f, None)
+        if namespace:
+            async def load(href):
+                return (await self._get(href))['namespace']['uri']
+            namespace = await self._cached(('namespace', ws['name']), load,
+                                           namespace['href'])
+
+        return Workspace(ws['name'], self, namespace)
+
+    async def get_workspaces(self):
+        """
+        Get all the workspaces in the GeoServer instance.
+
+        :return: All the workspaces.
+        :rtype: List of :class:`geoserver.Workspace`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        with self.session():
+            workspaces, namespaces = await asyncio.gather(
+                self._get('workspaces'), self._namespaces())
+            workspaces = listing_items(workspaces, 'workspace')
+            return await asyncio.gather(
+                *[self._workspace_from_json(x, namespaces)
+                  for x in workspaces])
+
+    async def get_workspace(self, name):
+        """
+        Get a specific workspace.
+
+        :param name: Name of the workspace to get.
+        :type name: string
+        :return: The required workspace or None if the workspace does not exist.
+        :rtype: :class:`geoserver.Workspace`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        if not name:
+            return None
+        return await self._cached(('workspace', name),
+                                  self._fetch_workspace, name)
+
+    async def _fetch_workspace(self, name):
+        try:
+            workspace = await self._get('workspaces/' + name)
+        except IOError as e:
+            logging.info(e)
+            return None
+
+        return await self._workspace_from_json(workspace['workspace'])
+
+    async def get_datastores(self, workspace):
+        """
+        Get all the datastores from all workspaces in the GeoServer instance.
+
+        :return: All the datastores.
+        :rtype: List of :class:`geoserver.Datastore`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        ws = await self.get_workspace(workspace)
+        if not ws:
+            raise ValueError('Invalid workspace: ' + (workspace or ''))
+        return ws.get_datastores()
+
+    async def get_datastore(self, name, workspace):
+        """
+        Get a specific datastore from a workspace.
+
+        :param name: Name of the datastore to get.
+        :param workspace: Name of the workspace containing the datastore.
+        :type name: string
+        :type workspace: string
+        :return: The required datastore or None if the datastore does not exist.
+        :rtype: :class:`geoserver.Datastore`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        ws = await self.get_workspace(workspace)
+        if not ws:
+            raise ValueError('Invalid workspace: ' + (workspace or ''))
+        return await self._datastore(ws, name)
+
+    async def _datastore(self, ws, store_name, kind='datastores'):
+        ds_name = store_name.split(':')[-1]
+        return await self._cached(('datastore', ws.get_name(), ds_name),
+                                  self._fetch_datastore, ws, ds_name, kind)
+
+    async def _fetch_datastore(self, ws, name, kind='datastores'):
+        try:
+            ds = await self._get(
+                'workspaces/' + ws.get_name() + '/' + kind + '/' + name)
+        except IOError as e:
+            logging.info(e)
+            return None
+        # A dataStore or a coverageStore
+        ds = next(iter(ds.values()))
+        return Datastore(ds['name'], self, ws, ds.get('type'),
+                         ds.get('connectionParameters'))
+
+    async def _layer_from_json(self, layer):
+        return await self._layer(layer['name'])
+
+    async def _layer(self, name):
+        return await self._cached(('layer', name), self._fetch_layer, name)
+
+    async def _fetch_layer(self, name):
+        layer_info = (await self._get('layers/' + name))['layer']
+        style, res = await asyncio.gather(
+            self.get_style(layer_info['defaultStyle']['name']),
+            self._get(layer_info['resource']['href']))
+
+        res_info = next(iter(res.values()))
+        ws = await self.get_workspace(res_info['namespace']['name'])
+        # Rasters are published from coverage stores
+        kind = 'coveragestores' if 'coverage' in res else 'datastores'
+        ds = await self._datastore(ws, res_info['store']['name'], kind)
+
+        qualified_name = name if ':' in name else ws.get_name() + ':' + name
+        return Layer(qualified_name, self, style, ds, ws)
+
+    async def get_layers(self):
+        """
+        Get all the layers in the GeoServer instance.
+
+        :return: All the layers.
+        :rtype: List of :class:`geoserver.Layer`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        with self.session():
+            layers = listing_items(await self._get('layers'), 'layer')
+            return await asyncio.gather(*map(self._layer_from_json, layers))
+
+    async def get_layer(self, name):
+        """
+        Get a specific layer.
+
+        :param name: Name of the layer to get.
+        :type name: string
+        :return: The required layer or None if the layer does not exist.
+        :rtype: :class:`geoserver.Layer`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        if not name:
+            return None
+        try:
+            with self.session():
+                return await self._layer(name)
+        except IOError as e:
+            logging.info(e)
+            return None
+
+    async def _layergroup_info(self, name):
+        async def load():
+            return (await self._get('layergroups/' + name))['layerGroup']
+        return await self._cached(('layergroup_info', name), load)
+
+    async def _load_layergroups(self, names):
+        """
+        Builds the given layer groups and the groups nested in them,
+        requesting every distinct group and layer once.
+        """
+        members = {}
+        pending = list(dict.fromkeys(names))
+        while pending:
+            infos = await asyncio.gather(*map(self._layergroup_info, pending))
+            nested = []
+            for name, info in zip(pending, infos):
+                members[name] = published_members(info)
+                nested.extend(n for t, n in members[name]
+                              if t == LAYER_GROUP_TYPE and n not in members)
+            pending = list(dict.fromkeys(nested))
+
+        order = resolution_order(
+            {name: [n for t, n in m if t == LAYER_GROUP_TYPE]
+             for name, m in members.items()})
+        layer_names = list(dict.fromkeys(
+            n for m in members.values() for t, n in m
+            if t != LAYER_GROUP_TYPE))
+        layers = dict(zip(layer_names, await asyncio.gather(
+            *map(self._layer, layer_names))))
+
+        groups = {}
+        for name in order:
+            groups[name] = LayerGroup(
+                name, self, [groups[n] if t == LAYER_GROUP_TYPE else layers[n]
+                             for t, n in members[name]])
+        return groups
+
+    async def get_layergroups(self):
+        """
+        Get all the layer groups in the GeoServer instance.
+
+        :return: All the layer groups.
+        :rtype: List of :class:`geoserver.LayerGroup`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        :raise: :class:`ValueError` if the layer groups contain each other.
+        """
+        with self.session():
+            layergroups = await self._get('layergroups')
+            names = [g['name'] for g in
+                     listing_items(layergroups, 'layerGroup')]
+            groups = await self._load_layergroups(names)
+            return [groups[name] for name in names]
+
+    async def get_layergroup(self, name):
+        """
+        Get a specific layer group.
+
+        :param name: Name of the layer group to get.
+        :type name: string
+        :return: The required layer group or None if the layer group does not exist.
+        :rtype: :class:`geoserver.LayerGroup`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        :raise: :class:`ValueError` if the layer group contains itself.
+        """
+        if not name:
+            return None
+        try:
+            with self.session():
+                return (await self._load_layergroups([name]))[name]
+        except IOError as e:
+            logging.info(e)
+            return None
+
+    async def get_styles(self):
+        """
+        Get all the styles in the GeoServer instance.
+
+        :return: All the styles.
+        :rtype: List of :class:`geoserver.Style`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        styles = listing_items(await self._get('styles'), 'style')
+        return list(map(lambda s: Style(s['name'], self), styles))
+
+    async def get_style(self, name):
+        """
+        Get a specific style.
+
+        :param name: Name of the style to get.
+        :type name: string
+        :return: The required style or None if the style does not exist.
+        :rtype: :class:`geoserver.Style`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        return await self._cached(('style', name), self._fetch_style, name)
+
+    async def _fetch_style(self, name):
+        try:
+            style = (await self._get('styles/' + name))['style']
+            return Style(style['name'], self)
+        except IOError as e:
+            logging.info(e)
+            return None
+
+    async def reset(self):
+        """
+        Resets all store, raster, and schema caches.
+
+        :rtype: None
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        await self._request('reset', method='POST')
+
+    async def reload(self):
+        """
+        Reloads the GeoServer catalog and configuration from disk.
+
+        :rtype: None
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        await self._request('reload', method='POST')
+
+    async def fonts(self):
+        """
+        Get all the available fonts in the GeoServer instance
+
+        :return: All the fonts.
+        :rtype: Array of string
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        return (await self._get('fonts'))['fonts']
+
+    async def create_workspace(self, name, namespace):
+        """
+        Creates a new workspace.
+
+        :param name: Name of the workspace to create.
+        :param namespace: Namespace of the workspace to create.
+        :type name: string
+        :type namespace: string
+        :rtype: None
+        :raise: :class:`ValueError` if the name or the namespace are invalid.
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        if not name:
+            raise ValueError('Invalid name')
+        if not namespace:
+            raise ValueError('Invalid namespace')
+
+        ws = json.dumps({
+            'workspace': {
+                'name': name
+            }
+        })
+        ns = json.dumps({
+            'namespace': {
+                'prefix': name,
+                'uri': namespace
+            }
+        })
+        await self._request(
+            'workspaces', method='POST', expected_code=201,
+            headers={'Content-type': 'application/json'}, data=ws)
+        await self._request(
+            'namespaces/' + name, method='PUT',
+            headers={'Content-type': 'application/json'}, data=ns)
+
+    async def create_style(self, name, sld):
+        """
+        Creates a new style.
+
+        :param name: Name of the style to create.
+        :param sld: SLD content of the style.
+        :type name: string
+        :type sld: string
+        :rtype: None
+        :raise: :class:`ValueError` if the name is invalid.
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        if not name:
+            raise ValueError('Invalid name')
+
+        data = json.dumps({
+            'style': {
+                'name': name,
+                'filename': name + '.sld'
+            }
+        })
+        try:
+            await self._request(
+                'styles', method='POST', expected_code=201,
+                headers={'Content-type': 'application/json'}, data=data)
+            await self._request(
+                'styles/' + name, method='PUT', extension='', data=sld,
+                headers={'Content-type': 'application/vnd.ogc.sld+xml'})
+        except OSError as e:
+            try:
+                await self._request('styles/' + name, method='DELETE')
+            except OSError as e:
+                logging.error(e)
+            raise IOError('Cannot add style', e)
+
+    async def _get(self, path):
+        return await self._request(path)
+
+    async def _request(self, path,  # pylint: disable=too-many-arguments
+                       extension='.json',
+                       method='get',
+                       expected_code=200,
+                       headers=None,
+                       data=None):
+        url = urljoin(self.url, path)
+        if extension and not url.endswith(extension):
+            url = url + extension
+        status, text = await self._send(method, url, headers, data)
+        if status != expected_code:
+            msg = ("Cannot perform {} request to {}. Response code is {}"
+                   .format(method, url, status))
+            raise NotFoundError(msg) if status == 404 else IOError(msg)
+        if extension == '.json':
+            try:
+                return json.loads(text) if text else None
+            except ValueError:
+                return text
+        else:
+            return text
+
+    async def _send(self, method, url, headers=None, data=None):
+        session = self._client_session()
+        replayable = data is None or isinstance(data, (str, bytes))
+        attempt = 0
+        while True:
+            breaker = self.circuit_breaker
+            if breaker is not None and not breaker.allow():
+                raise IOError('Cannot perform {} request to {}. Circuit '
+                              'breaker is open'.format(method, url))
+            # Any outcome other than a response without a 5xx code, even a
+            # cancellation, counts as a failure for the circuit breaker
+            success = False
+            try:
+                async with self._semaphore:
+                    governor = self.governor
+                    if governor is not None:
+                        await governor.acquire_async()
+                    start = time.perf_counter()
+                    status = None
+                    try:
+                        async with session.request(method.upper(), url,
+                                                   data=data,
+                                                   headers=headers) as r:
+                            status = r.status
+                            body = await r.read()
+                            text = body.decode(r.get_encoding())
+                            retry_after = r.headers.get('Retry-After')
+                    finally:
+                        if governor is not None:
+                            governor.release(status,
+                                             time.perf_counter() - start)
+                    self._on_request(method, url, status, len(body), start)
+                success = status < 500
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._on_request(method, url, None, 0, start)
+                if self.retry is None or not self.retry.should_retry(
+                        method, attempt, replayable=replayable):
+                    raise IOError('Cannot perform {} request to {}: {}'
+                                  .format(method, url, e))
+                delay = self.retry.delay(attempt)
+            else:
+                if self.retry is None or not self.retry.should_retry(
+                        method, attempt, status, replayable):
+                    return status, text
+                delay = self.retry.delay(attempt, retry_after)
+            finally:
+                if breaker is not None:
+                    breaker.record(success)
+            logging.info('Retrying %s request to %s in %.2fs',
+                         method, url, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _on_request(self, method, url, status, size, start):  # pylint: disable=too-many-arguments
+        if self.on_request is not None:
+            path = url[len(self.url):] if url.startswith(self.url) else url
+            self.on_request(method.upper(), path, status, size,
+                            time.perf_counter() - start)
+
+    def __eq__(self, other):
+        return (self.__class__ == other.__class__ and
+                self.url == other.url and
+                self.user == other.user and
+                self.password == other.password)
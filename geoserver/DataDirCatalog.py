@@ -0,0 +1,347 @@
+"""
+DataDirCatalog
+"""
+import os
+import glob
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from geoserver.Workspace import Workspace
+from geoserver.Datastore import Datastore
+from geoserver.Layer import Layer
+from geoserver.LayerGroup import LAYER_GROUP_TYPE, LayerGroup, \
+    resolution_order
+from geoserver.Style import Style
+
+PARALLEL_THRESHOLD = 2000
+
+_PATTERNS = [
+    'workspaces/*/workspace.xml',
+    'workspaces/*/namespace.xml',
+    'workspaces/*/*/datastore.xml',
+    'workspaces/*/*/coveragestore.xml',
+    'workspaces/*/*/*/featuretype.xml',
+    'workspaces/*/*/*/coverage.xml',
+    'workspaces/*/*/*/layer.xml',
+    'workspaces/*/styles/*.xml',
+    'workspaces/*/layergroups/*.xml',
+    'styles/*.xml',
+    'layergroups/*.xml'
+]
+
+
+def _ref(root, tag):
+    return root.findtext(tag + '/id')
+
+
+def _read(path):
+    """
+    Reads the fields used by the catalog from a configuration file.
+
+    It runs in worker processes, so it returns plain data.
+
+    :raise: :class:`IOError` if the file cannot be read or is not valid XML.
+    """
+    try:
+        root = ET.parse(path).getroot()
+    except ET.ParseError as e:
+        raise IOError('Invalid configuration file {}: {}'.format(path, e))
+    info = {
+        'tag': root.tag,
+        'id': root.findtext('id'),
+        'name': root.findtext('name')
+    }
+    if root.tag == 'namespace':
+        info['prefix'] = root.findtext('prefix')
+        info['uri'] = root.findtext('uri')
+    elif root.tag in ('dataStore', 'coverageStore'):
+        info['type'] = root.findtext('type')
+        info['workspace'] = _ref(root, 'workspace')
+    elif root.tag in ('featureType', 'coverage'):
+        info['namespace'] = _ref(root, 'namespace')
+        info['store'] = _ref(root, 'store')
+    elif root.tag == 'layer':
+        info['defaultStyle'] = _ref(root, 'defaultStyle')
+        info['resource'] = _ref(root, 'resource')
+    if root.tag in ('style', 'layerGroup'):
+        # Not set for global ones
+        info['workspace'] = _ref(root, 'workspace')
+    if root.tag == 'layerGroup':
+        info['published'] = [(p.get('type', 'layer'), p.findtext('id'))
+                             for p in root.findall('publishables/published')]
+    return info
+
+
+class DataDirCatalog:
+    """
+    Read-only catalog of a GeoServer data directory.
+
+    It offers the read methods of :class:`geoserver.GeoServer` and builds the
+    same resource classes, but reads the configuration files from disk
+    instead of using the REST API, so no running GeoServer is needed. Files
+    are read on first access, in parallel across processes for large
+    directories, and kept until :meth:`reload` is called.
+
+    :param path: Path of the data directory.
+    :param processes: number of processes used to read the files of large
+      directories; it defaults to the number of CPUs.
+    :param parallel_threshold: minimum number of files to read them in
+      parallel.
+    :type path: string
+    :type processes: int
+    :type parallel_threshold: int
+    """
+
+    def __init__(self, path, processes=None,
+                 parallel_threshold=PARALLEL_THRESHOLD):
+        self.path = path
+        self.processes = processes or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self._lock = threading.Lock()
+        self._catalog = None
+
+    def _files(self):
+        files = []
+        for pattern in _PATTERNS:
+            files.extend(sorted(glob.glob(os.path.join(self.path, pattern))))
+        return files
+
+    def _read_all(self, files):
+        if self.processes < 2 or len(files) < self.parallel_threshold:
+            return list(map(_read, files))
+        chunksize = max(1, len(files) // (self.processes * 4))
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            return list(executor.map(_read, files, chunksize=chunksize))
+
+    def _load(self):
+        with self._lock:
+            if self._catalog is None:
+                self._catalog = self._build(self._read_all(self._files()))
+            return self._catalog
+
+    def _build(self, infos):  # pylint: disable=too-many-locals
+        by_tag = {}
+        for info in infos:
+            by_tag.setdefault(info['tag'], []).append(info)
+
+        namespaces = {ns['prefix']: ns['uri']
+                      for ns in by_tag.get('namespace', [])}
+        workspaces = {}
+        for ws in by_tag.get('workspace', []):
+            workspaces[ws['id']] = Workspace(
+                ws['name'], self, namespaces.get(ws['name']))
+        stores = {}
+        for ds in by_tag.get('dataStore', []) + by_tag.get('coverageStore', []):
+            stores[ds['id']] = Datastore(ds['name'], self,
+                                         workspaces.get(ds['workspace']),
+                                         ds['type'], None)
+        styles = {s['id']: Style(s['name'], self)
+                  for s in by_tag.get('style', [])}
+        resources = {r['id']: r for r in
+                     by_tag.get('featureType', []) + by_tag.get('coverage', [])}
+        layers = {}
+        for layer in by_tag.get('layer', []):
+            res = resources.get(layer['resource'])
+            ds = stores.get(res['store']) if res else None
+            ws = ds.get_workspace() if ds else None
+            name = layer['name']
+            if ws:
+                name = ws.get_name() + ':' + name
+            layers[layer['id']] = Layer(name, self,
+                                        styles.get(layer['defaultStyle']),
+                                        ds, ws)
+        group_infos = {g['id']: g for g in by_tag.get('layerGroup', [])}
+        groups = {}
+        # Nested groups are built before the groups containing them
+        for group_id in resolution_order(
+                {i: [p for t, p in g['published'] if t == LAYER_GROUP_TYPE]
+                 for i, g in group_infos.items()}):
+            g = group_infos.get(group_id)
+            if g is None:
+                continue
+            members = [(groups if t == LAYER_GROUP_TYPE else layers).get(p)
+                       for t, p in g['published']]
+            groups[group_id] = LayerGroup(
+                g['name'], self, [m for m in members if m is not None])
+
+        def scoped_key(info):
+            ws = workspaces.get(info['workspace'])
+            return (ws.get_name() if ws else None, info['name'])
+
+        return {
+            'workspaces': _index(workspaces.values()),
+            'datastores': _index(stores.values(), _store_key),
+            'styles': _scoped_index(
+                (scoped_key(s), styles[s['id']])
+                for s in by_tag.get('style', [])),
+            'layers': _index(layers.values()),
+            'layergroups': _scoped_index(
+                (scoped_key(g), groups[g['id']])
+                for g in group_infos.values())
+        }
+
+    def reload(self):
+        """
+        Forgets the catalog read so far, so it is read again from disk on
+        the next access.
+
+        :rtype: None
+        """
+        with self._lock:
+            self._catalog = None
+
+    def get_workspaces(self):
+        """
+        Get all the workspaces in the data directory.
+
+        :return: All the workspaces.
+        :rtype: List of :class:`geoserver.Workspace`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        return list(self._load()['workspaces'].values())
+
+    def get_workspace(self, name):
+        """
+        Get a specific workspace.
+
+        :param name: Name of the workspace to get.
+        :type name: string
+        :return: The required workspace or None if the workspace does not exist.
+        :rtype: :class:`geoserver.Workspace`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        return self._load()['workspaces'].get(name)
+
+    def get_datastores(self, workspace):
+        """
+        Get all the datastores (and coverage stores) of a workspace.
+
+        :param workspace: Name of the workspace containing the datastores.
+        :type workspace: string
+        :return: All the datastores.
+        :rtype: List of :class:`geoserver.Datastore`
+        :raise: :class:`ValueError` if the workspace does not exist.
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        ws = self.get_workspace(workspace)
+        if not ws:
+            raise ValueError('Invalid workspace: ' + (workspace or ''))
+        return [ds for ds in self._load()['datastores'].values()
+                if ds.get_workspace() is ws]
+
+    def get_datastore(self, name, workspace):
+        """
+        Get a specific datastore from a workspace.
+
+        :param name: Name of the datastore to get.
+        :param workspace: Name of the workspace containing the datastore.
+        :type name: string
+        :type workspace: string
+        :return: The required datastore or None if the datastore does not exist.
+        :rtype: :class:`geoserver.Datastore`
+        :raise: :class:`ValueError` if the workspace does not exist.
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        if not self.get_workspace(workspace):
+            raise ValueError('Invalid workspace: ' + (workspace or ''))
+        return self._load()['datastores'].get((workspace, name))
+
+    def get_layers(self):
+        """
+        Get all the layers in the data directory.
+
+        :return: All the layers.
+        :rtype: List of :class:`geoserver.Layer`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        return list(self._load()['layers'].values())
+
+    def get_layer(self, name):
+        """
+        Get a specific layer.
+
+        :param name: Qualified name (``workspace:name``) of the layer to get.
+        :type name: string
+        :return: The required layer or None if the layer does not exist.
+        :rtype: :class:`geoserver.Layer`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        return self._load()['layers'].get(name)
+
+    def get_layergroups(self):
+        """
+        Get all the layer groups in the data directory, the global ones
+        first.
+
+        :return: All the layer groups.
+        :rtype: List of :class:`geoserver.LayerGroup`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        :raise: :class:`ValueError` if the layer groups contain each other.
+        """
+        return list(self._load()['layergroups'].values())
+
+    def get_layergroup(self, name, workspace=None):
+        """
+        Get a specific layer group.
+
+        :param name: Name of the layer group to get.
+        :param workspace: Name of the workspace of the layer group, if it is
+          not global.
+        :type name: string
+        :type workspace: string
+        :return: The required layer group or None if the layer group does not exist.
+        :rtype: :class:`geoserver.LayerGroup`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        :raise: :class:`ValueError` if the layer groups contain each other.
+        """
+        return self._load()['layergroups'].get((workspace, name))
+
+    def get_styles(self):
+        """
+        Get all the styles in the data directory, the global ones first.
+
+        :return: All the styles.
+        :rtype: List of :class:`geoserver.Style`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        return list(self._load()['styles'].values())
+
+    def get_style(self, name, workspace=None):
+        """
+        Get a specific style.
+
+        :param name: Name of the style to get.
+        :param workspace: Name of the workspace of the style, if it is not
+          global.
+        :type name: string
+        :type workspace: string
+        :return: The required style or None if the style does not exist.
+        :rtype: :class:`geoserver.Style`
+        :raise: :class:`IOError` if the data directory cannot be read.
+        """
+        return self._load()['styles'].get((workspace, name))
+
+    def __eq__(self, other):
+        return (self.__class__ == other.__class__ and
+                os.path.abspath(self.path) == os.path.abspath(other.path))
+
+
+def _name(resource):
+    return resource.get_name()
+
+
+def _store_key(ds):
+    ws = ds.get_workspace()
+    return (ws.get_name() if ws else None, ds.get_name())
+
+
+def _index(resources, key=_name):
+    return {key(r): r for r in sorted(resources, key=key)}
+
+
+def _scoped_index(entries):
+    """
+    Index of ``((workspace, name), resource)`` entries, where workspace is
+    None for global resources, sorted with the global ones first.
+    """
+    return dict(sorted(entries, key=lambda e: (e[0][0] is not None, e[0])))
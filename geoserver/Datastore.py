@@ -1,17 +1,25 @@
 from geoserver.Resource import Resource
+from geoserver.Upload import upload
 
 
 class Datastore(Resource):
+    __slots__ = ('workspace', 'type', 'opts')
+
     def __init__(self, name, geoserver, workspace, type, opts):
         Resource.__init__(self, name, geoserver)
-        pass
+        self.workspace = workspace
+        self.type = type
+        self.opts = opts
 
     def get_workspace(self):
-        pass
+        return self.workspace
 
     def delete(self):
         pass
 
+    def reset(self):
+        self.geoserver.reset_datastore(self.name, self.workspace.get_name())
+
     def get_layers(self):
         pass
 
@@ -27,8 +35,9 @@ class Datastore(Resource):
     def set_database_params(self, params):
         pass
 
-    def set_file(self, file):
-        pass
+    def set_file(self, file, progress=None):
+        upload(self.geoserver, self.workspace.get_name(), self.name, file,
+               progress)
 
     def create_layer(self, name):
         pass
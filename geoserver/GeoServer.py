@@ -3,13 +3,89 @@ GeoServer
 """
 import logging
 import json
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from fnmatch import fnmatchcase
 from urllib.parse import urljoin
 import requests
+from requests.adapters import HTTPAdapter
+from geoserver.IdentityMap import IdentityMap
+from geoserver.JsonStream import CHUNK_SIZE, iter_items, listing_items, \
+    loads
 from geoserver.Workspace import Workspace
-from geoserver.Layer import Layer
-from geoserver.LayerGroup import LayerGroup
+from geoserver.Datastore import Datastore
+from geoserver.Layer import Layer, LazyLayer
+from geoserver.LayerGroup import LAYER_GROUP_TYPE, LayerGroup, \
+    LazyLayerGroup, published_members, resolution_order
 from geoserver.Style import Style
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (3.05, 30)
+
+
+def _matches(name, workspace=None, pattern=None):
+    """
+    Tells whether a listed name is in a workspace and matches a glob
+    pattern, with or without the workspace prefix.
+    """
+    prefix, _, local = name.rpartition(':')
+    if workspace is not None and prefix != workspace:
+        return False
+    return pattern is None or fnmatchcase(local, pattern) or \
+        fnmatchcase(name, pattern)
+
+
+class NotFoundError(IOError):
+    """
+    Raised when a resource requested from the REST API does not exist (a
+    404 response), unlike other errors, which may be transient.
+    """
+
+
+# Changes to a datastore, which can be reset on its own; store names may
+# contain dots, so only a trailing extension is left out
+_DATASTORE_PATH = re.compile(
+    r'workspaces/([^/]+)/datastores/([^/]+?)(\.json|\.xml)?(/|$)')
+# Changes to resources whose configuration is not cached by the stores
+_UNCACHED_PATH = re.compile(
+    r'(workspaces/[^/]+/)?(styles|layers|layergroups)([/.]|$)')
+
+
+class _DeferredReload:
+    """
+    Reloads and resets requested inside :meth:`GeoServer.deferred_reload`,
+    the datastores changed or reset since it started and whether other
+    changes need a global reset.
+    """
+
+    def __init__(self):
+        self.reload = False
+        self.reset = False
+        self.datastores = set()
+        self.global_reset = False
+        self._lock = threading.Lock()
+
+    def changed(self, path):
+        """Records a change to the resource of a path."""
+        m = _DATASTORE_PATH.match(path)
+        with self._lock:
+            if m:
+                self.datastores.add((m.group(1), m.group(2)))
+            elif not _UNCACHED_PATH.match(path):
+                self.global_reset = True
+
+    def request(self, reload=False, reset=False, datastore=None):
+        """Records a reload, a reset or the reset of a datastore."""
+        with self._lock:
+            self.reload |= reload
+            self.reset |= reset or datastore is not None
+            if datastore is not None:
+                self.datastores.add(datastore)
+
 
 class GeoServer:
     """
@@ -20,25 +96,231 @@ class GeoServer:
     :param url: URL of the GeoServer instance.
     :param user: user for authentication in the REST API.
     :param pass: password for authentication in the REST API.
+    :param pool_size: maximum number of keep-alive connections to reuse.
+    :param timeout: connect and read timeouts (in seconds) for every request,
+      either as a single number or as a ``(connect, read)`` tuple.
+    :param max_workers: number of threads used to hydrate layers and layer
+      groups concurrently; if not set, they are hydrated one after another.
+    :param lazy: if True, :meth:`get_layers` and :meth:`get_layergroups`
+      return proxies built from the listing that request their details
+      (default style, datastore, workspace, layers) on first access.
+    :param cache: cache for the responses of GET requests; nothing is cached
+      if not set.
+    :param retry: policy to retry failed idempotent requests; requests are
+      not retried if not set.
+    :param circuit_breaker: circuit breaker to fail fast while the instance
+      is down, if any.
+    :param on_request: function called after every HTTP request with the
+      method, the path relative to the REST endpoint, the response code
+      (None after a connection error), the response size in bytes and the
+      latency in seconds, such as a :class:`geoserver.Metrics.Metrics`.
+    :param governor: limits of the requests in flight and of the request
+      rate, which can be shared with other clients, if any.
     :type url: string
     :type user: string
     :type pass: string
+    :type pool_size: int
+    :type timeout: float or tuple
+    :type max_workers: int
+    :type lazy: bool
+    :type cache: :class:`geoserver.ResponseCache`
+    :type retry: :class:`geoserver.Retry.RetryPolicy`
+    :type circuit_breaker: :class:`geoserver.Retry.CircuitBreaker`
+    :type on_request: callable
+    :type governor: :class:`geoserver.Governor.Governor`
     """
 
-    def __init__(self, url, user, password):
+    def __init__(self, url, user, password,  # pylint: disable=too-many-arguments
+                 pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT,
+                 max_workers=None,
+                 lazy=False,
+                 cache=None,
+                 retry=None,
+                 circuit_breaker=None,
+                 on_request=None,
+                 governor=None):
         self.base_url = url + "/"
         self.url = urljoin(self.base_url, 'rest/')
         self.user = user
         self.password = password
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.lazy = lazy
+        self.cache = cache
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.on_request = on_request
+        self.governor = governor
+        self._identity_map = None
+        self._identity_map_depth = 0
+        self._identity_map_lock = threading.Lock()
+        self._deferred = None
+        self._deferred_depth = 0
+        self._deferred_lock = threading.Lock()
+        self._session = requests.Session()
+        self._session.auth = (user, password)
+        adapter = HTTPAdapter(pool_maxsize=max(pool_size, max_workers or 0))
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def close(self):
+        """
+        Closes all the pooled connections to the GeoServer instance.
+
+        :rtype: None
+        """
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _map(self, f, items):
+        """
+        Applies f to all the items, concurrently if max_workers is set.
+
+        Results keep the order of the items and, if several calls fail, the
+        error of the first failing item is raised.
+        """
+        items = list(items)
+        if not self.max_workers or self.max_workers < 2 or len(items) < 2:
+            return list(map(f, items))
+        workers = min(self.max_workers, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(f, item) for item in items]
+            try:
+                return [future.result() for future in futures]
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _imap(self, f, items):
+        """
+        Applies f to the items like :meth:`_map`, yielding every result as
+        soon as it and the previous ones are ready.
+
+        At most twice max_workers items are processed ahead of the caller,
+        so closing the generator early doesn't process all of them.
+        """
+        if not self.max_workers or self.max_workers < 2:
+            for item in items:
+                yield f(item)
+            return
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for item in items:
+                    pending.append(executor.submit(f, item))
+                    if len(pending) >= 2 * self.max_workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _listing(self, path, key):
+        """
+        Iterate over the entries of a listing, such as ``layer`` for
+        ``layers``, decoding them one at a time as the response arrives.
+
+        GeoServer sends empty listings as '' and listings with a single
+        entry as an object.
+        """
+        if self.cache is not None:
+            # Cached responses are kept decoded
+            yield from listing_items(self._get(path), key)
+            return
+        url = urljoin(self.url, path) + '.json'
+        yield from iter_items(self._stream('get', url), key)
+
+    def _stream(self, method, url):
+        """
+        Iterate over the body of a response in chunks as it arrives.
+
+        The request is reported to :attr:`on_request` once the body has been
+        read, with the bytes actually received, since chunked responses
+        have no Content-Length, and to the circuit breaker, so that errors
+        reading the body count as failures.
+        """
+        with closing(self._send(method, url, stream=True)) as r:
+            # The headers have just arrived
+            start = time.perf_counter() - r.elapsed.total_seconds()
+            try:
+                self._check(r, method, url, 200)
+            except IOError:
+                self._on_request(method, url, r.status_code, 0, start)
+                self._record(r.status_code < 500)
+                raise
+            size = 0
+            success = False
+            try:
+                for chunk in r.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    yield chunk
+                success = True
+            except GeneratorExit:
+                # Closed by the caller before the end
+                success = True
+                raise
+            finally:
+                self._on_request(method, url, r.status_code, size, start)
+                self._record(success)
+
+    def _record(self, success):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(success)
+
+    @contextmanager
+    def session(self):
+        """
+        Shares the resources fetched inside the block.
+
+        Each workspace, namespace, style and datastore is requested once
+        within the block and the same instance is used by every
+        :class:`geoserver.Layer` and :class:`geoserver.LayerGroup` built from
+        it. Listing methods open their own session; nested blocks share the
+        outermost one. Changes made on the server while the block is open may
+        not be seen.
+        """
+        with self._identity_map_lock:
+            if not self._identity_map_depth:
+                self._identity_map = IdentityMap()
+            self._identity_map_depth += 1
+        try:
+            yield self
+        finally:
+            with self._identity_map_lock:
+                self._identity_map_depth -= 1
+                if not self._identity_map_depth:
+                    self._identity_map = None
+
+    def _cached(self, key, load, *args):
+        identity_map = self._identity_map
+        if identity_map is None:
+            return load(*args)
+        return identity_map.get(key, load, *args)
+
+    def _namespaces(self):
+        return self._cached(
+            ('namespaces',),
+            lambda: listing_items(self._get('namespaces'), 'namespace'))
 
     def _workspace_from_json(self, ws, namespaces=None):
         if not namespaces:
-            namespaces = self._get('namespaces')['namespaces']['namespace']
+            namespaces = self._namespaces()
 
         f = filter(lambda n: n['name'] == ws['name'], namespaces)
         namespace = next(f, None)
         if namespace:
-            namespace = self._get(namespace['href'])['namespace']['uri']
+            namespace = self._cached(
+                ('namespace', ws['name']),
+                lambda href: self._get(href)['namespace']['uri'],
+                namespace['href'])
 
         return Workspace(ws['name'], self, namespace)
 
@@ -50,10 +332,33 @@ class GeoServer:
         :rtype: List of :class:`geoserver.Workspace`
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
         """
-        workspaces = self._get('workspaces')['workspaces']['workspace']
-        namespaces = self._get('namespaces')['namespaces']['namespace']
-        return list(map(lambda x: self._workspace_from_json(x, namespaces),
-                        workspaces))
+        with self.session():
+            workspaces = list(self._listing('workspaces', 'workspace'))
+            namespaces = self._namespaces()
+            return list(map(lambda x: self._workspace_from_json(x, namespaces),
+                            workspaces))
+
+    def iter_workspaces(self, name=None):
+        """
+        Iterate over the workspaces in the GeoServer instance, yielding each
+        one as soon as it is ready.
+
+        :param name: if given, only the workspaces matching this glob
+          pattern, such as ``topp*``.
+        :type name: string
+        :return: The workspaces, in the order of the listing.
+        :rtype: Iterator of :class:`geoserver.Workspace`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        with self.session():
+            workspaces = [ws for ws in self._listing('workspaces', 'workspace')
+                          if _matches(ws['name'], None, name)]
+            if not workspaces:
+                return
+            namespaces = self._namespaces()
+            yield from self._imap(
+                lambda ws: self._workspace_from_json(ws, namespaces),
+                workspaces)
 
     def get_workspace(self, name):
         """
@@ -67,6 +372,9 @@ class GeoServer:
         """
         if not name:
             return None
+        return self._cached(('workspace', name), self._fetch_workspace, name)
+
+    def _fetch_workspace(self, name):
         try:
             workspace = self._get('workspaces/' + name)
         except IOError as e:
@@ -106,18 +414,42 @@ class GeoServer:
         return ws.get_datastore(name)
 
     def _layer_from_json(self, layer):
-        name = layer['name']
+        return self._layer(layer['name'])
+
+    def _layer(self, name):
+        return self._cached(('layer', name), self._fetch_layer, name)
+
+    def _fetch_layer(self, name):
         layer_info = self._get('layers/' + name)['layer']
         style = self.get_style(layer_info['defaultStyle']['name'])
 
         res = self._get(layer_info['resource']['href'])
         res_info = next(iter(res.values()))
         ws = self.get_workspace(res_info['namespace']['name'])
-        ds = ws.get_datastore(res_info['store']['name'])
+        # Rasters are published from coverage stores
+        kind = 'coveragestores' if 'coverage' in res else 'datastores'
+        ds = self._datastore(ws, res_info['store']['name'], kind)
 
         qualified_name = name if ':' in name else ws.get_name() + ':' + name
         return Layer(qualified_name, self, style, ds, ws)
 
+    def _datastore(self, ws, store_name, kind='datastores'):
+        ds_name = store_name.split(':')[-1]
+        return self._cached(('datastore', ws.get_name(), ds_name),
+                            self._fetch_datastore, ws, ds_name, kind)
+
+    def _fetch_datastore(self, ws, name, kind='datastores'):
+        try:
+            ds = self._get(
+                'workspaces/' + ws.get_name() + '/' + kind + '/' + name)
+        except IOError as e:
+            logging.info(e)
+            return None
+        # A dataStore or a coverageStore
+        ds = next(iter(ds.values()))
+        return Datastore(ds['name'], self, ws, ds.get('type'),
+                         ds.get('connectionParameters'))
+
     def get_layers(self):
         """
         Get all the layers in the GeoServer instance.
@@ -126,8 +458,42 @@ class GeoServer:
         :rtype: List of :class:`geoserver.Layer`
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
         """
-        layers = self._get('layers')['layers']['layer']
-        return list(map(self._layer_from_json, layers))
+        with self.session():
+            layers = list(self._listing('layers', 'layer'))
+            if self.lazy:
+                parents = IdentityMap()
+                return [LazyLayer(l['name'], self, parents) for l in layers]
+            return self._map(self._layer_from_json, layers)
+
+    def iter_layers(self, workspace=None, name=None):
+        """
+        Iterate over the layers in the GeoServer instance, yielding each one
+        as soon as it is hydrated. Filters are applied to the listing, so
+        the layers left out are never requested.
+
+        Resources are shared as in :meth:`session` until the iterator is
+        exhausted or closed.
+
+        :param workspace: if given, only the layers of this workspace.
+        :param name: if given, only the layers whose name, with or without
+          the workspace prefix, matches this glob pattern.
+        :type workspace: string
+        :type name: string
+        :return: The layers, in the order of the listing.
+        :rtype: Iterator of :class:`geoserver.Layer`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        with self.session():
+            names = (l['name'] for l in self._listing('layers', 'layer')
+                     if _matches(l['name'], workspace, name))
+            if self.lazy:
+                parents = IdentityMap()
+                for n in names:
+                    yield LazyLayer(n, self, parents)
+            else:
+                # The listing is read before hydrating, so that its
+                # connection doesn't sit idle meanwhile
+                yield from self._imap(self._layer, list(names))
 
     def get_layer(self, name):
         """
@@ -142,19 +508,65 @@ class GeoServer:
         if not name:
             return None
         try:
-            layer = self._get('layers/' + name)['layer']
-            return self._layer_from_json(layer)
+            with self.session():
+                return self._layer(name)
         except IOError as e:
             logging.info(e)
             return None
 
-    def _layergroup_from_json(self, layergroup):
-        name = layergroup['name']
-        layergroup_info = self._get('layergroups/' + name)['layerGroup']
-        published = layergroup_info['publishables']['published']
-        layers_json = map(lambda l: self._get(l['href'])['layer'], published)
-        layers = list(map(self._layer_from_json, layers_json))
-        return LayerGroup(name, self, layers)
+    def _layergroup_info(self, name):
+        return self._cached(
+            ('layergroup_info', name),
+            lambda: self._get('layergroups/' + name)['layerGroup'])
+
+    def _load_layergroups(self, names):
+        """
+        Builds the given layer groups and the groups nested in them.
+
+        The graph of groups is requested first, so that every distinct group
+        and layer is requested once and the same instances are shared by all
+        the groups containing them.
+
+        :return: The layer groups by name.
+        :rtype: dict
+        :raise: :class:`ValueError` if the layer groups contain each other.
+        """
+        members = {}
+        pending = list(dict.fromkeys(names))
+        while pending:
+            infos = self._map(self._layergroup_info, pending)
+            nested = []
+            for name, info in zip(pending, infos):
+                members[name] = published_members(info)
+                nested.extend(n for t, n in members[name]
+                              if t == LAYER_GROUP_TYPE and n not in members)
+            pending = list(dict.fromkeys(nested))
+
+        order = resolution_order(
+            {name: [n for t, n in m if t == LAYER_GROUP_TYPE]
+             for name, m in members.items()})
+        layer_names = list(dict.fromkeys(
+            n for m in members.values() for t, n in m
+            if t != LAYER_GROUP_TYPE))
+        layers = dict(zip(layer_names, self._map(self._layer, layer_names)))
+
+        groups = {}
+        for name in order:
+            groups[name] = self._cached(
+                ('layergroup', name), LayerGroup, name, self,
+                [groups[n] if t == LAYER_GROUP_TYPE else layers[n]
+                 for t, n in members[name]])
+        return groups
+
+    def _layergroup_layers(self, name):
+        if self.lazy:
+            parents = IdentityMap()
+            return [LazyLayerGroup(n, self) if t == LAYER_GROUP_TYPE
+                    else LazyLayer(n, self, parents)
+                    for t, n in published_members(
+                        self._get('layergroups/' + name)['layerGroup'])]
+        with self.session():
+            return self._load_layergroups([name])[name].get_layers()
 
     def get_layergroups(self):
         """
@@ -163,9 +575,46 @@ class GeoServer:
         :return: All the layer groups.
         :rtype: List of :class:`geoserver.LayerGroup`
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        :raise: :class:`ValueError` if the layer groups contain each other.
         """
-        layergroups = self._get('layergroups')['layerGroups']['layerGroup']
-        return list(map(self._layergroup_from_json, layergroups))
+        with self.session():
+            layergroups = list(self._listing('layergroups', 'layerGroup'))
+            if self.lazy:
+                return [LazyLayerGroup(g['name'], self) for g in layergroups]
+            groups = self._load_layergroups(g['name'] for g in layergroups)
+            return [groups[g['name']] for g in layergroups]
+
+    def iter_layergroups(self, workspace=None, name=None):
+        """
+        Iterate over the layer groups in the GeoServer instance, yielding
+        each one as soon as it is hydrated. Filters are applied to the
+        listing, so the layer groups left out are never requested, unless
+        they are nested in another one.
+
+        Resources are shared as in :meth:`session` until the iterator is
+        exhausted or closed.
+
+        :param workspace: if given, only the layer groups whose name is
+          prefixed with this workspace.
+        :param name: if given, only the layer groups whose name, with or
+          without the workspace prefix, matches this glob pattern.
+        :type workspace: string
+        :type name: string
+        :return: The layer groups, in the order of the listing.
+        :rtype: Iterator of :class:`geoserver.LayerGroup`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        :raise: :class:`ValueError` if the layer groups contain each other.
+        """
+        with self.session():
+            names = (g['name'] for g in
+                     self._listing('layergroups', 'layerGroup')
+                     if _matches(g['name'], workspace, name))
+            if self.lazy:
+                for n in names:
+                    yield LazyLayerGroup(n, self)
+            else:
+                yield from self._imap(
+                    lambda n: self._load_layergroups([n])[n], list(names))
 
     def get_layergroup(self, name):
         """
@@ -176,12 +625,13 @@ class GeoServer:
         :return: The required layer group or None if the layer group does not exist.
         :rtype: :class:`geoserver.LayerGroup`
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        :raise: :class:`ValueError` if the layer group contains itself.
         """
         if not name:
             return None
         try:
-            layer = self._get('layergroups/' + name)['layerGroup']
-            return self._layergroup_from_json(layer)
+            with self.session():
+                return self._load_layergroups([name])[name]
         except IOError as e:
             logging.info(e)
             return None
@@ -194,8 +644,22 @@ class GeoServer:
         :rtype: List of :class:`geoserver.Style`
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
         """
-        styles = self._get('styles')['styles']['style']
-        return list(map(lambda s: Style(s['name'], self), styles))
+        return [Style(s['name'], self)
+                for s in self._listing('styles', 'style')]
+
+    def iter_styles(self, name=None):
+        """
+        Iterate over the styles in the GeoServer instance.
+
+        :param name: if given, only the styles matching this glob pattern.
+        :type name: string
+        :return: The styles, in the order of the listing.
+        :rtype: Iterator of :class:`geoserver.Style`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        for style in self._listing('styles', 'style'):
+            if _matches(style['name'], None, name):
+                yield Style(style['name'], self)
 
     def get_style(self, name):
         """
@@ -207,6 +671,9 @@ class GeoServer:
         :rtype: :class:`geoserver.Style`
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
         """
+        return self._cached(('style', name), self._fetch_style, name)
+
+    def _fetch_style(self, name):
         try:
             style = self._get('styles/' + name)['style']
             return Style(style['name'], self)
@@ -218,19 +685,131 @@ class GeoServer:
         """
         Resets all store, raster, and schema caches.
 
+        Inside :meth:`deferred_reload` it's only recorded.
+
         :rtype: None
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
         """
+        deferred = self._deferred
+        if deferred is not None:
+            deferred.request(reset=True)
+            return
         self._request('reset', method='POST')
+        if self.cache is not None:
+            self.cache.clear()
+
+    def reset_datastore(self, name, workspace):
+        """
+        Resets the caches of a datastore, such as the schemas of its feature
+        types.
+
+        Inside :meth:`deferred_reload` it's only recorded.
+
+        :param name: Name of the datastore.
+        :param workspace: Name of the workspace of the datastore.
+        :type name: string
+        :type workspace: string
+        :rtype: None
+        :raise: :class:`IOError` if any error occurs while requesting the REST
+          API, such as if the server cannot reset a single datastore.
+        """
+        deferred = self._deferred
+        if deferred is not None:
+            deferred.request(datastore=(workspace, name))
+            return
+        self._request('workspaces/{}/datastores/{}/reset'.format(
+            workspace, name), method='POST')
+        if self.cache is not None:
+            self.cache.clear()
 
     def reload(self):
         """
         Reloads the GeoServer catalog and configuration from disk.
 
+        Inside :meth:`deferred_reload` it's only recorded.
+
         :rtype: None
         :raise: :class:`IOError` if any error occurs while requesting the REST API.
         """
+        deferred = self._deferred
+        if deferred is not None:
+            deferred.request(reload=True)
+            return
         self._request('reload', method='POST')
+        if self.cache is not None:
+            self.cache.clear()
+
+    @contextmanager
+    def deferred_reload(self):
+        """
+        Coalesces the reloads and resets requested inside the block into at
+        most one reload and one reset, sent when the block ends, even if it
+        fails.
+
+        If the datastores are the only resources changed inside the block
+        (other than styles, layers and layer groups, which stores don't
+        cache), the reset is sent to each changed datastore instead. If any
+        of those fails, such as with a server that cannot reset a single
+        datastore, a global reset is sent. Nested blocks share the
+        outermost one.
+
+        :Example:
+
+        >>> with gs.deferred_reload():
+        ...     for path in shapefiles:
+        ...         ds.set_file(path)
+        ...         gs.reset()
+
+        :raise: :class:`IOError` if the reload or the reset fail; both are
+          sent even if the other one fails.
+        """
+        with self._deferred_lock:
+            if not self._deferred_depth:
+                self._deferred = _DeferredReload()
+            self._deferred_depth += 1
+        try:
+            yield self
+        finally:
+            with self._deferred_lock:
+                self._deferred_depth -= 1
+                deferred = None
+                if not self._deferred_depth:
+                    deferred, self._deferred = self._deferred, None
+            if deferred is not None:
+                self._flush(deferred)
+
+    def _flush(self, deferred):
+        """
+        Sends the reload and the reset recorded inside a deferred block,
+        raising the first error once both have been tried.
+        """
+        errors = []
+        if deferred.reload:
+            try:
+                self.reload()
+            except IOError as e:
+                errors.append(e)
+        if deferred.reset:
+            try:
+                self._flush_reset(deferred)
+            except IOError as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    def _flush_reset(self, deferred):
+        """
+        Sends the reset recorded inside a deferred block, to each changed
+        datastore if possible.
+        """
+        if not deferred.global_reset and deferred.datastores:
+            try:
+                for workspace, name in sorted(deferred.datastores):
+                    self.reset_datastore(name, workspace)
+                return
+            except IOError as e:
+                logging.info('Resetting all the stores: %s', e)
+        self.reset()
 
     def fonts(self):
         """
@@ -242,6 +821,24 @@ class GeoServer:
         """
         return self._get('fonts')['fonts']
 
+    def snapshot(self, path, refresh=False):
+        """
+        Writes a snapshot of the catalog (workspaces, stores, styles, layers
+        and layer groups) to a JSON lines file.
+
+        :param path: Path of the snapshot file.
+        :param refresh: if True, the records of the existing snapshot file
+          are reused for the resources that have not changed.
+        :type path: string
+        :type refresh: bool
+        :return: The records written and the number of resources fetched.
+        :rtype: :class:`geoserver.Snapshot.SnapshotResult`
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        from geoserver.Snapshot import DEFAULT_WORKERS, snapshot
+        return snapshot(self, path, refresh,
+                        max_workers=self.max_workers or DEFAULT_WORKERS)
+
     def create_workspace(self, name, namespace):
         """
         Creates a new workspace.
@@ -320,22 +917,131 @@ class GeoServer:
                  method='get',
                  expected_code=200,
                  headers=None,
-                 data=None):
+                 data=None,
+                 params=None):
         url = urljoin(self.url, path)
         if extension and not url.endswith(extension):
             url = url + extension
-        f = getattr(requests, method.lower())
-        r = f(url,  # pylint: disable=not-callable
-              auth=(self.user, self.password),
-              data=data,
-              headers=headers)
+        is_get = method.upper() == 'GET'
+        if not is_get and self._deferred is not None:
+            self._deferred.changed(url[len(self.url):])
+        if (self.cache is not None and is_get and extension == '.json' and
+                expected_code == 200):
+            return self._cached_get(url, headers)
+        try:
+            r = self._send(method, url, headers, data, params)
+        finally:
+            if self.cache is not None and not is_get:
+                self.cache.invalidate(self._cache_key(url))
+        return self._response(r, method, url, extension, expected_code)
+
+    def _cache_key(self, url):
+        key = url[len(self.url):] if url.startswith(self.url) else url
+        return re.sub(r'\.(json|sld|xml)$', '', key)
+
+    def _cached_get(self, url, headers):
+        key = self._cache_key(url)
+        entry, fresh = self.cache.lookup(key)
+        if fresh:
+            return entry.value
+        headers = dict(headers or {})
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        r = self._send('get', url, headers)
+        if entry is not None and r.status_code == 304:
+            self.cache.revalidated(key)
+            return entry.value
+        value = self._response(r, 'get', url, '.json', 200)
+        self.cache.put(key, value, len(r.content), r.headers.get('ETag'),
+                       r.headers.get('Last-Modified'))
+        return value
+
+    def _send(self, method, url,  # pylint: disable=too-many-arguments
+              headers=None, data=None, params=None, stream=False):
+        # Streamed bodies are consumed by the first attempt
+        replayable = data is None or isinstance(data, (str, bytes))
+        attempt = 0
+        while True:
+            breaker = self.circuit_breaker
+            if breaker is not None and not breaker.allow():
+                raise IOError('Cannot perform {} request to {}. Circuit '
+                              'breaker is open'.format(method, url))
+            # Any outcome other than a response without a 5xx code, even an
+            # unexpected error, counts as a failure for the circuit breaker
+            success = False
+            deferred = False
+            try:
+                governor = self.governor
+                if governor is not None:
+                    governor.acquire()
+                start = time.perf_counter()
+                status = None
+                try:
+                    r = self._session.request(method.upper(), url,
+                                              data=data,
+                                              headers=headers,
+                                              params=params,
+                                              timeout=self.timeout,
+                                              stream=stream)
+                    status = r.status_code
+                finally:
+                    # A streamed response frees its slot once the headers
+                    # arrive
+                    if governor is not None:
+                        governor.release(status, time.perf_counter() - start)
+                # A streamed response is reported once its body is read,
+                # see _stream
+                if not stream:
+                    self._on_request(method, url, r.status_code,
+                                     len(r.content), start)
+                success = r.status_code < 500
+            except (requests.ConnectionError, requests.Timeout):
+                self._on_request(method, url, None, 0, start)
+                if self.retry is None or not self.retry.should_retry(
+                        method, attempt, replayable=replayable):
+                    raise
+                delay = self.retry.delay(attempt)
+            else:
+                if self.retry is None or not self.retry.should_retry(
+                        method, attempt, r.status_code, replayable):
+                    # The outcome of a streamed response is recorded once
+                    # its body is read, see _stream
+                    deferred = stream
+                    return r
+                delay = self.retry.delay(attempt,
+                                         r.headers.get('Retry-After'))
+                if stream:
+                    # Discarded without reading its body
+                    self._on_request(method, url, r.status_code, 0, start)
+                r.close()
+            finally:
+                if breaker is not None and not deferred:
+                    breaker.record(success)
+            logging.info('Retrying %s request to %s in %.2fs',
+                         method, url, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _on_request(self, method, url, status, size, start):  # pylint: disable=too-many-arguments
+        if self.on_request is not None:
+            path = url[len(self.url):] if url.startswith(self.url) else url
+            self.on_request(method.upper(), path, status, size,
+                            time.perf_counter() - start)
+
+    def _check(self, r, method, url, expected_code):
         if r.status_code != expected_code:
             msg = ("Cannot perform {} request to {}. Response code is {}"
                    .format(method, url, r.status_code))
-            raise IOError(msg)
+            raise NotFoundError(msg) if r.status_code == 404 else IOError(msg)
+
+    def _response(self, r, method, url,  # pylint: disable=too-many-arguments
+                  extension, expected_code):
+        self._check(r, method, url, expected_code)
         if extension == '.json':
             try:
-                return r.json() if r.text else None
+                return loads(r.content) if r.content else None
             except ValueError:
                 return r.text
         else:
@@ -0,0 +1,282 @@
+"""
+GeoServerCluster
+"""
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from geoserver.GeoServer import GeoServer
+
+DEFAULT_ROLLING_CONCURRENCY = 1
+
+
+class NodeResult:
+    """
+    Outcome of an operation in a node: the value it returned or the error
+    it raised.
+    """
+
+    def __init__(self, node, value=None, error=None):
+        self.node = node
+        self.value = value
+        self.error = error
+
+    @property
+    def url(self):
+        """
+        URL of the node.
+
+        :rtype: string
+        """
+        return self.node.base_url.rstrip('/')
+
+    @property
+    def ok(self):
+        """
+        Tells whether the operation succeeded in the node.
+
+        :rtype: bool
+        """
+        return self.error is None
+
+
+class ClusterResult:
+    """
+    Outcome of an operation in every node of a cluster, in the order of the
+    nodes.
+    """
+
+    def __init__(self, results):
+        self.results = results
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def succeeded(self):
+        """
+        :rtype: List of :class:`NodeResult`
+        """
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        """
+        :rtype: List of :class:`NodeResult`
+        """
+        return [r for r in self.results if not r.ok]
+
+
+class QuorumError(IOError):
+    """
+    Raised when an operation succeeds in fewer nodes than the quorum, with
+    the outcome in every node.
+    """
+
+    def __init__(self, result, required):
+        IOError.__init__(self, 'Succeeded in {} of {} nodes, {} required: {}'
+                         .format(len(result.succeeded), len(result), required,
+                                 '; '.join('{}: {}'.format(r.url, r.error)
+                                           for r in result.failed)))
+        self.result = result
+
+
+class GeoServerCluster:
+    """
+    Manages several GeoServer instances serving the same catalog, such as
+    the nodes behind a load balancer without clustering of their own, as a
+    single one.
+
+    Changes are applied to all the nodes in parallel, giving the outcome in
+    each node, and fail if they don't succeed in at least ``quorum`` nodes.
+    Reads are sent to the first node, :attr:`primary`.
+
+    :Example:
+
+    >>> nodes = [GeoServer(url, user, password) for url in urls]
+    >>> with GeoServerCluster(nodes, quorum=len(nodes) - 1) as cluster:
+    ...     cluster.create_style('roads', sld)
+    ...     cluster.reload(concurrency=2)
+
+    :param nodes: clients of the nodes.
+    :param quorum: minimum number of nodes where a change must succeed; all
+      of them if not set.
+    :type nodes: List of :class:`geoserver.GeoServer`
+    :type quorum: int
+    :raise: :class:`ValueError` if there are no nodes or the quorum is not
+      between 1 and the number of nodes.
+    """
+
+    def __init__(self, nodes, quorum=None):
+        if not nodes:
+            raise ValueError('A cluster needs at least one node')
+        self.nodes = list(nodes)
+        self.quorum = self._required(quorum)
+
+    @classmethod
+    def connect(cls, urls, user, password, quorum=None, **kwargs):  # pylint: disable=too-many-arguments
+        """
+        Creates a cluster with a client for every URL.
+
+        :param urls: URLs of the GeoServer instances.
+        :param user: user for authentication in the REST API of all of them.
+        :param pass: password for authentication in the REST API of all of
+          them.
+        :param quorum: minimum number of nodes where a change must succeed.
+        :param kwargs: Other arguments for every
+          :class:`geoserver.GeoServer`.
+        :type urls: List of string
+        :type user: string
+        :type pass: string
+        :type quorum: int
+        :rtype: :class:`GeoServerCluster`
+        """
+        return cls([GeoServer(url, user, password, **kwargs) for url in urls],
+                   quorum)
+
+    def _required(self, quorum):
+        if quorum is None:
+            return len(self.nodes)
+        if not 1 <= quorum <= len(self.nodes):
+            raise ValueError('Invalid quorum {} for {} nodes'
+                             .format(quorum, len(self.nodes)))
+        return quorum
+
+    @property
+    def primary(self):
+        """
+        Client of the node that serves reads.
+
+        :rtype: :class:`geoserver.GeoServer`
+        """
+        return self.nodes[0]
+
+    def close(self):
+        """
+        Closes all the pooled connections to every node.
+
+        :rtype: None
+        """
+        for node in self.nodes:
+            node.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def _call(f, node):
+        try:
+            return NodeResult(node, f(node))
+        except IOError as e:
+            logging.info('%s: %s', node.base_url, e)
+            return NodeResult(node, error=e)
+
+    def apply(self, f, quorum=None):
+        """
+        Calls a function with the client of every node, in parallel.
+
+        :param f: Function called with a :class:`geoserver.GeoServer`; an
+          :class:`IOError` it raises counts as a failure in that node.
+        :param quorum: minimum number of nodes where it must succeed, if not
+          the one of the cluster.
+        :type f: callable
+        :type quorum: int
+        :return: The outcome in every node.
+        :rtype: :class:`ClusterResult`
+        :raise: :class:`QuorumError` if it succeeds in fewer nodes than the
+          quorum.
+        """
+        required = self._required(quorum) if quorum is not None \
+            else self.quorum
+        with ThreadPoolExecutor(max_workers=len(self.nodes)) as executor:
+            result = ClusterResult(list(executor.map(
+                lambda node: self._call(f, node), self.nodes)))
+        return self._check(result, required)
+
+    @staticmethod
+    def _check(result, required):
+        if len(result.succeeded) < required:
+            raise QuorumError(result, required)
+        return result
+
+    def create_workspace(self, name, namespace):
+        """
+        Creates a new workspace in every node.
+
+        :param name: Name of the workspace to create.
+        :param namespace: Namespace of the workspace to create.
+        :type name: string
+        :type namespace: string
+        :rtype: :class:`ClusterResult`
+        :raise: :class:`ValueError` if the name or the namespace are invalid.
+        :raise: :class:`QuorumError` if it fails in more nodes than allowed.
+        """
+        return self.apply(lambda gs: gs.create_workspace(name, namespace))
+
+    def create_style(self, name, sld):
+        """
+        Creates a new style in every node.
+
+        :param name: Name of the style to create.
+        :param sld: SLD content of the style.
+        :type name: string
+        :type sld: string
+        :rtype: :class:`ClusterResult`
+        :raise: :class:`ValueError` if the name is invalid.
+        :raise: :class:`QuorumError` if it fails in more nodes than allowed.
+        """
+        return self.apply(lambda gs: gs.create_style(name, sld))
+
+    def reset(self):
+        """
+        Resets all store, raster, and schema caches of every node.
+
+        :rtype: :class:`ClusterResult`
+        :raise: :class:`QuorumError` if it fails in more nodes than allowed.
+        """
+        return self.apply(lambda gs: gs.reset())
+
+    def reload(self, concurrency=DEFAULT_ROLLING_CONCURRENCY):
+        """
+        Reloads the catalog and configuration of the nodes from disk, a few
+        at a time, so that the rest keep serving with a warm catalog.
+
+        Once more nodes have failed than the quorum allows, the rest are
+        not reloaded and count as failed.
+
+        :param concurrency: maximum number of nodes reloading at once.
+        :type concurrency: int
+        :rtype: :class:`ClusterResult`
+        :raise: :class:`ValueError` if the concurrency is not positive.
+        :raise: :class:`QuorumError` if it fails in more nodes than allowed.
+        """
+        if concurrency < 1:
+            raise ValueError('Invalid concurrency: {}'.format(concurrency))
+        allowed_failures = len(self.nodes) - self.quorum
+        results = [None] * len(self.nodes)
+        failures = 0
+        pending = iter(enumerate(self.nodes))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            running = {}
+            for i, node in pending:
+                future = executor.submit(self._call, lambda gs: gs.reload(),
+                                         node)
+                running[future] = i
+                if len(running) < concurrency:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+                    failures += not future.result().ok
+                if failures > allowed_failures:
+                    break
+            for future, i in running.items():
+                results[i] = future.result()
+        for i, node in pending:
+            results[i] = NodeResult(node, error=IOError(
+                'Not reloaded: too many nodes failed'))
+        return self._check(ClusterResult(results), self.quorum)
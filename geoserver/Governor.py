@@ -0,0 +1,220 @@
+"""
+Governor
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_MIN_IN_FLIGHT = 1
+DEFAULT_LATENCY_TARGET = 2
+DEFAULT_DECREASE = 0.5
+OVERLOAD_STATUSES = (429,)
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Governor:
+    """
+    Protects a GeoServer instance from bursts of requests by limiting how
+    many are in flight at once and, optionally, how many start per second.
+
+    The in-flight limit adapts to the instance (additive increase,
+    multiplicative decrease): every request answered in time without a 5xx
+    or 429 response raises it by one over the current limit, so it grows
+    by about one per round of requests, up to ``max_in_flight``. A
+    connection error, a 5xx or 429 response or a latency above
+    ``latency_target`` multiplies it by ``decrease``, down to
+    ``min_in_flight``, once for all the requests started before the
+    decrease.
+
+    The rate is limited with a token bucket holding up to ``burst`` tokens
+    and refilled with ``rate`` tokens per second.
+
+    A governor can be shared by several clients, threads and async tasks,
+    such as a :class:`geoserver.GeoServer` and a
+    :class:`geoserver.AsyncGeoServer` of the same instance.
+
+    :param max_in_flight: maximum number of requests in flight.
+    :param min_in_flight: minimum the in-flight limit can decrease to.
+    :param rate: maximum requests started per second; not limited if not
+      set.
+    :param burst: requests that can start at once within the rate; the rate
+      rounded up if not set.
+    :param latency_target: latency in seconds above which a request counts
+      as a sign of overload; latency is ignored if None.
+    :param decrease: factor applied to the in-flight limit on overload.
+    :type max_in_flight: int
+    :type min_in_flight: int
+    :type rate: float
+    :type burst: int
+    :type latency_target: float
+    :type decrease: float
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT,  # pylint: disable=too-many-arguments
+                 min_in_flight=DEFAULT_MIN_IN_FLIGHT,
+                 rate=None,
+                 burst=None,
+                 latency_target=DEFAULT_LATENCY_TARGET,
+                 decrease=DEFAULT_DECREASE):
+        if not 1 <= min_in_flight <= max_in_flight:
+            raise ValueError('Invalid in-flight limits: {} to {}'
+                             .format(min_in_flight, max_in_flight))
+        if rate is not None and rate <= 0:
+            raise ValueError('Invalid rate: {}'.format(rate))
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.rate = rate
+        self.burst = burst or (max(1, math.ceil(rate)) if rate else None)
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.decreases = 0
+        self.throttled = 0
+        self._limit = float(max_in_flight)
+        self._waiting = 0
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._decreased_at = float('-inf')
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._async_waiters = deque()
+
+    @property
+    def limit(self):
+        """
+        Current in-flight limit.
+
+        :rtype: int
+        """
+        return int(self._limit)
+
+    @property
+    def queue_depth(self):
+        """
+        Number of requests waiting to be let through.
+
+        :rtype: int
+        """
+        return self._waiting
+
+    def _take(self):
+        """
+        Lets a request through if there is a free slot and a token. Returns
+        0 if it was let through, the seconds until the next token or None
+        to wait for a slot.
+        """
+        if self.in_flight >= int(self._limit):
+            return None
+        if self.rate is not None:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return 0
+
+    def acquire(self):
+        """
+        Waits until a request can be sent.
+
+        Every call must be followed by a :meth:`release`.
+
+        :rtype: None
+        """
+        with self._released:
+            wait = self._take()
+            if wait == 0:
+                return
+            self._waiting += 1
+            self.throttled += 1
+            try:
+                while wait != 0:
+                    self._released.wait(wait)
+                    wait = self._take()
+            finally:
+                self._waiting -= 1
+
+    async def acquire_async(self):
+        """
+        Waits until a request can be sent, without blocking the event loop.
+
+        Every call must be followed by a :meth:`release`.
+
+        :rtype: None
+        """
+        loop = asyncio.get_running_loop()
+        queued = False
+        try:
+            while True:
+                future = loop.create_future()
+                with self._lock:
+                    wait = self._take()
+                    if wait == 0:
+                        return
+                    if not queued:
+                        queued = True
+                        self._waiting += 1
+                        self.throttled += 1
+                    if wait is None:
+                        self._async_waiters.append((loop, future))
+                if wait is None:
+                    await future
+                else:
+                    await asyncio.sleep(wait)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting -= 1
+
+    def release(self, status=None, latency=None):
+        """
+        Frees the slot of a request and adapts the in-flight limit to its
+        outcome.
+
+        :param status: response code, or None after a connection error.
+        :param latency: seconds from sending the request to its response;
+          the limit is left as is if None.
+        :type status: int
+        :type latency: float
+        :rtype: None
+        """
+        with self._released:
+            self.in_flight -= 1
+            if latency is not None:
+                self._adapt(status, latency)
+            self._released.notify_all()
+            waiters, self._async_waiters = self._async_waiters, deque()
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # The loop of the waiter is closed
+                pass
+
+    def _adapt(self, status, latency):
+        overloaded = status is None or status >= 500 or \
+            status in OVERLOAD_STATUSES or \
+            (self.latency_target is not None and
+             latency > self.latency_target)
+        if not overloaded:
+            self._limit = min(self.max_in_flight, self._limit + 1 / self._limit)
+            return
+        # Requests sent before the last decrease saw the old limit
+        now = time.monotonic()
+        if now - latency < self._decreased_at:
+            return
+        self._limit = max(self.min_in_flight, self._limit * self.decrease)
+        self._decreased_at = now
+        self.decreases += 1
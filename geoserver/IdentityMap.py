@@ -0,0 +1,48 @@
+"""
+IdentityMap
+"""
+import threading
+from concurrent.futures import Future
+
+
+class IdentityMap:
+    """
+    Keeps the resources fetched during an operation so each one is requested
+    only once and shared by every object built from it.
+
+    It is safe to use from several threads: if a key is being loaded, other
+    threads asking for it wait for the result instead of loading it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, load, *args):
+        """
+        Get the value for a key, loading it if it's not in the map yet.
+
+        :param key: Key identifying the resource, such as
+          ``('workspace', name)``.
+        :param load: Function returning the value; it is called with ``args``.
+        :type key: hashable
+        :type load: callable
+        :return: The value for the key.
+        :raise: Any error raised by ``load``; failed loads are not kept.
+        """
+        with self._lock:
+            future = self._entries.get(key)
+            owner = future is None
+            if owner:
+                future = self._entries[key] = Future()
+        if owner:
+            try:
+                future.set_result(load(*args))
+            except Exception as e:  # pylint: disable=broad-except
+                with self._lock:
+                    del self._entries[key]
+                future.set_exception(e)
+        return future.result()
+
+    def __len__(self):
+        return len(self._entries)
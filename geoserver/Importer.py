@@ -0,0 +1,257 @@
+"""
+Importer
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from geoserver.Upload import GEOTIFF, file_type, shapefile_files, upload
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 2
+RETRY_DELAY = 1
+
+
+class ImportFile:
+    """
+    File to import: a shapefile (with its sidecar files) or a GeoTIFF.
+
+    :param path: Path of the ``.shp`` or GeoTIFF file.
+    :param type: Either ``shp`` or ``tiff``.
+    :param store: Name of the store to create for the file.
+    """
+
+    def __init__(self, path, type, store):  # pylint: disable=redefined-builtin
+        self.path = path
+        self.type = type
+        self.store = store
+
+    def files(self):
+        """
+        Get the files to upload: the sidecar files of a shapefile or the
+        GeoTIFF itself.
+        """
+        if self.type == GEOTIFF:
+            return [self.path]
+        return shapefile_files(self.path)
+
+    def signature(self):
+        """
+        Size and modification time of the files, used to tell whether an
+        imported file has changed.
+        """
+        stats = [os.stat(f) for f in self.files()]
+        return [sum(s.st_size for s in stats),
+                max(s.st_mtime for s in stats)]
+
+
+def scan(path, stores=None):
+    """
+    Finds the shapefiles and GeoTIFFs in a file or directory tree.
+
+    Store names are taken from the file names and made unique. Files with a
+    store already recorded keep it, and new files don't take any of the
+    recorded ones.
+
+    :param path: File or directory to scan.
+    :param stores: Stores recorded by the absolute path of their files, as
+      in :meth:`Manifest.stores`.
+    :type path: string
+    :type stores: dict
+    :return: The files to import, sorted by path.
+    :rtype: List of :class:`ImportFile`
+    """
+    if os.path.isdir(path):
+        paths = []
+        for root, _, files in os.walk(path):
+            paths.extend(os.path.join(root, f) for f in files)
+        paths.sort()
+    else:
+        paths = [path]
+
+    recorded = stores or {}
+    found = []
+    taken = set(recorded.values())
+    for p in paths:
+        try:
+            kind = file_type(p)
+        except ValueError:
+            continue
+        store = recorded.get(os.path.abspath(p))
+        if store is None:
+            stem = os.path.splitext(os.path.basename(p))[0]
+            store = base = re.sub(r'[^\w-]', '_', stem)
+            n = 1
+            while store in taken:
+                n += 1
+                store = '{}_{}'.format(base, n)
+            taken.add(store)
+        found.append(ImportFile(p, kind, store))
+    return found
+
+
+class Manifest:
+    """
+    Record of the files already imported, kept in a JSON lines file.
+
+    Every imported file is appended and flushed right away, so an
+    interrupted import can be resumed skipping the files that haven't
+    changed since.
+
+    :param path: Path of the manifest file; it's created if it doesn't exist.
+    :type path: string
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line of an interrupted run
+                        continue
+                    self._done[entry['path']] = entry
+
+    def stores(self):
+        """
+        Get the stores of the imported files.
+
+        :return: Store names by the absolute path of their files.
+        :rtype: dict
+        """
+        with self._lock:
+            return {p: e['store'] for p, e in self._done.items()}
+
+    def is_done(self, import_file):
+        entry = self._done.get(os.path.abspath(import_file.path))
+        return entry is not None and \
+            entry['store'] == import_file.store and \
+            entry['signature'] == import_file.signature()
+
+    def add(self, import_file):
+        entry = {
+            'path': os.path.abspath(import_file.path),
+            'store': import_file.store,
+            'signature': import_file.signature()
+        }
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._done[entry['path']] = entry
+
+
+class ImportResult:
+    """
+    Result of an import: the files imported, skipped and failed (with the
+    last error for each one).
+    """
+
+    def __init__(self):
+        self.imported = []
+        self.skipped = []
+        self.failed = []
+
+
+class Importer:
+    """
+    Imports shapefiles and GeoTIFFs into a workspace, creating a store and a
+    layer for each file.
+
+    Files are uploaded concurrently and retried if they fail. With a
+    manifest, the files already imported are skipped, so an interrupted
+    import continues where it stopped.
+
+    :param geoserver: GeoServer instance to import the files into.
+    :param workspace: Name of the workspace for the new stores.
+    :param workers: number of concurrent uploads.
+    :param retries: number of times a failed upload is retried.
+    :param manifest: Path of the manifest file, if any.
+    :type geoserver: :class:`geoserver.GeoServer`
+    :type workspace: string
+    :type workers: int
+    :type retries: int
+    :type manifest: string
+    """
+
+    def __init__(self, geoserver, workspace,  # pylint: disable=too-many-arguments
+                 workers=DEFAULT_WORKERS,
+                 retries=DEFAULT_RETRIES,
+                 manifest=None):
+        if not workspace:
+            raise ValueError('Invalid workspace')
+        self.geoserver = geoserver
+        self.workspace = workspace
+        self.workers = workers
+        self.retries = retries
+        self.manifest = Manifest(manifest) if manifest else None
+        self.retry_delay = RETRY_DELAY
+
+    def upload(self, import_file):
+        """
+        Uploads a single file, creating its store and layer.
+
+        :type import_file: :class:`ImportFile`
+        :rtype: None
+        :raise: :class:`IOError` if any error occurs while requesting the REST API.
+        """
+        upload(self.geoserver, self.workspace, import_file.store,
+               import_file.path)
+
+    def _import(self, import_file):
+        for attempt in range(self.retries + 1):
+            try:
+                self.upload(import_file)
+                break
+            except IOError as e:
+                logging.info('Cannot import %s (attempt %d): %s',
+                             import_file.path, attempt + 1, e)
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.retry_delay * 2 ** attempt)
+        if self.manifest:
+            self.manifest.add(import_file)
+
+    def run(self, path, progress=None):
+        """
+        Imports all the shapefiles and GeoTIFFs in a file or directory tree.
+
+        :param path: File or directory to import.
+        :param progress: Function called with each file and its error (None
+          if it was imported) as soon as it finishes.
+        :type path: string
+        :type progress: callable
+        :return: The files imported, skipped and failed.
+        :rtype: :class:`ImportResult`
+        """
+        result = ImportResult()
+        pending = []
+        stores = self.manifest.stores() if self.manifest else None
+        for import_file in scan(path, stores):
+            if self.manifest and self.manifest.is_done(import_file):
+                result.skipped.append(import_file)
+            else:
+                pending.append(import_file)
+
+        def task(import_file):
+            try:
+                self._import(import_file)
+                error = None
+                result.imported.append(import_file)
+            except IOError as e:
+                error = e
+                result.failed.append((import_file, e))
+            if progress:
+                progress(import_file, error)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(task, pending))
+        return result
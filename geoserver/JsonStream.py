@@ -0,0 +1,152 @@
+"""
+JsonStream
+"""
+import json
+import re
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+CHUNK_SIZE = 64 * 1024
+
+# A whole string, the start of a string cut at the end of the buffer, or a
+# structural character
+_TOKENS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|"|[{}\[\]:,]', re.DOTALL)
+# An object without nested objects or arrays, like most listing entries
+_FLAT_OBJECT = re.compile(
+    rb'\{[^{}\[\]"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}\[\]"]*)*\}', re.DOTALL)
+_BLANK = re.compile(rb'[ \t\r\n]*')
+_BLANK_OR_COMMA = re.compile(rb'[ \t\r\n,]*')
+
+# Parser states
+_SEARCH = 0
+_VALUE = 1
+_ARRAY = 2
+_ITEM = 3
+_SINGLE = 4
+
+
+def listing_items(listing, key):
+    """
+    Get the entries of a decoded listing, such as the entries of
+    ``{"layers": {"layer": [...]}}`` for ``layer``.
+
+    GeoServer sends empty listings as '' and listings with a single entry as
+    an object; both give a list.
+
+    :param listing: Decoded listing, as returned by the REST API.
+    :param key: Name of the member holding the entries.
+    :type listing: dict
+    :type key: string
+    :rtype: list
+    """
+    entries = (next(iter(listing.values())) or {}).get(key) \
+        if listing else None
+    if not entries:
+        return []
+    return entries if isinstance(entries, list) else [entries]
+
+
+def iter_items(chunks, key):
+    """
+    Yields the items of the first array held by a member named ``key``,
+    such as the entries of ``{"layers": {"layer": [...]}}`` for ``layer``,
+    decoding each one as soon as its last byte arrives.
+
+    A member holding a single object instead of an array gives that object;
+    a missing member or any other value, such as the ``""`` of an empty
+    GeoServer listing, gives nothing.
+
+    :param chunks: Consecutive parts of a JSON document.
+    :param key: Name of the member holding the array.
+    :type chunks: Iterable of bytes
+    :type key: string
+    :rtype: Iterator
+    :raise: :class:`ValueError` if the document is not valid JSON.
+    """
+    name = json.dumps(key).encode('utf-8')
+    chunks = iter(chunks)
+    buf = b''
+    pos = 0
+    start = 0
+    depth = 0
+    state = _SEARCH
+    key_seen = False
+    while True:
+        while True:
+            if state == _SEARCH:
+                m = _TOKENS.search(buf, pos)
+                if m is None or m.group() == b'"':
+                    pos = len(buf) if m is None else m.start()
+                    break
+                pos = m.end()
+                if m.group() == b':' and key_seen:
+                    state = _VALUE
+                key_seen = m.group() == name
+            elif state == _VALUE:
+                pos = _BLANK.match(buf, pos).end()
+                if pos == len(buf):
+                    break
+                if buf[pos:pos + 1] == b'[':
+                    state = _ARRAY
+                    pos += 1
+                elif buf[pos:pos + 1] == b'{':
+                    state = _SINGLE
+                    start = pos
+                    depth = 0
+                else:
+                    return
+            elif state == _ARRAY:
+                pos = _BLANK_OR_COMMA.match(buf, pos).end()
+                if pos == len(buf):
+                    break
+                if buf[pos:pos + 1] == b']':
+                    return
+                m = _FLAT_OBJECT.match(buf, pos)
+                if m is not None:
+                    pos = m.end()
+                    yield loads(m.group())
+                    continue
+                state = _ITEM
+                start = pos
+                depth = 0
+            else:
+                m = _TOKENS.search(buf, pos)
+                if m is None or m.group() == b'"':
+                    pos = len(buf) if m is None else m.start()
+                    break
+                token = m.group()
+                pos = m.end()
+                if token in (b'{', b'['):
+                    depth += 1
+                    continue
+                if depth == 0 and token in (b',', b']'):
+                    # End of a number or a literal
+                    yield loads(buf[start:m.start()])
+                    if token == b']':
+                        return
+                elif token in (b'}', b']'):
+                    depth -= 1
+                    if depth:
+                        continue
+                    yield loads(buf[start:pos])
+                    if state == _SINGLE:
+                        return
+                elif depth == 0 and token[:1] == b'"':
+                    yield loads(token)
+                else:
+                    continue
+                state = _ARRAY
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            if state == _SEARCH:
+                return
+            raise ValueError('Truncated JSON document')
+        keep = start if state in (_ITEM, _SINGLE) else pos
+        buf = buf[keep:] + chunk
+        pos -= keep
+        start -= keep
@@ -1,10 +1,18 @@
+import threading
 from geoserver.Resource import Resource
 
+# Attribute of a lazy layer not requested yet
+_PENDING = object()
+
 
 class Layer(Resource):
+    __slots__ = ('default_style', 'datastore', 'workspace')
+
     def __init__(self, name, geoserver, default_style, datastore, workspace):
         Resource.__init__(self, name, geoserver)
         self.default_style = default_style
+        self.datastore = datastore
+        self.workspace = workspace
 
     def delete(self):
         pass
@@ -14,3 +22,93 @@ class Layer(Resource):
 
     def get_default_style(self):
         return self.default_style
+
+    def get_datastore(self):
+        return self.datastore
+
+    def get_workspace(self):
+        return self.workspace
+
+
+class LazyLayer(Layer):
+    """
+    Layer built from a listing entry.
+
+    The default style, datastore and workspace are requested on first access
+    and kept afterwards. They are shared with the layers built with the same
+    ``parents`` map and, inside :meth:`geoserver.GeoServer.session`, with the
+    other layers resolved in the same block.
+
+    :param parents: map of the styles, workspaces and datastores already
+      resolved, usually shared by all the layers of a listing.
+    :type parents: :class:`geoserver.IdentityMap.IdentityMap`
+    """
+    __slots__ = ('_lock', '_parents', '_info', '_resource')
+
+    def __init__(self, name, geoserver, parents=None):
+        Layer.__init__(self, name, geoserver, _PENDING, _PENDING, _PENDING)
+        self._lock = threading.RLock()
+        self._parents = parents
+        self._info = None
+        self._resource = None
+
+    def _layer_info(self):
+        if self._info is None:
+            self._info = self.geoserver._get('layers/' + self.name)['layer']
+        return self._info
+
+    def _resource_info(self):
+        if self._resource is None:
+            href = self._layer_info()['resource']['href']
+            res = self.geoserver._get(href)
+            self._resource = next(iter(res.values()))
+        return self._resource
+
+    def _parent(self, key, load, *args):
+        if self._parents is None:
+            return load(*args)
+        return self._parents.get(key, load, *args)
+
+    def _load_default_style(self):
+        name = self._layer_info()['defaultStyle']['name']
+        return self._parent(('style', name), self.geoserver.get_style, name)
+
+    def _load_workspace(self):
+        if ':' in self.name:
+            name = self.name.split(':')[0]
+        else:
+            name = self._resource_info()['namespace']['name']
+        return self._parent(('workspace', name),
+                            self.geoserver.get_workspace, name)
+
+    def _load_datastore(self):
+        ws = self.get_workspace()
+        store_name = self._resource_info()['store']['name']
+        # Rasters are published from coverage stores
+        kind = 'coveragestores' if self._layer_info()['resource'].get(
+            '@class') == 'coverage' else 'datastores'
+        return self._parent(('datastore', ws.get_name(), store_name),
+                            self.geoserver._datastore, ws, store_name, kind)
+
+    def _resolve(self, attr):
+        with self._lock:
+            if getattr(self, attr) is _PENDING:
+                setattr(self, attr, getattr(self, '_load_' + attr)())
+                if _PENDING not in (self.default_style, self.datastore,
+                                    self.workspace):
+                    # Everything is resolved; the responses are not needed
+                    self._info = self._resource = None
+            return getattr(self, attr)
+
+    def set_default_style(self, style):
+        with self._lock:
+            self.default_style = style
+
+    def get_default_style(self):
+        return self._resolve('default_style')
+
+    def get_datastore(self):
+        return self._resolve('datastore')
+
+    def get_workspace(self):
+        return self._resolve('workspace')
@@ -1,7 +1,71 @@
+import threading
 from geoserver.Resource import Resource
 
+LAYER_GROUP_TYPE = 'layerGroup'
+
+
+def published_members(layergroup_info):
+    """
+    Get the published members of a layer group as ``(type, name)`` pairs,
+    where type is ``layer`` or ``layerGroup``.
+
+    :param layergroup_info: layer group as returned by the REST API.
+    :type layergroup_info: dict
+    :rtype: List of tuple
+    """
+    published = (layergroup_info.get('publishables') or {}).get('published')
+    if not published:
+        return []
+    if isinstance(published, dict):
+        published = [published]
+    return [(p.get('@type', 'layer'), p['name']) for p in published]
+
+
+def resolution_order(graph):
+    """
+    Sort layer groups so that every nested group comes before the groups
+    containing it.
+
+    :param graph: nested group names of each layer group.
+    :type graph: dict of string to list of string
+    :return: The layer group names.
+    :rtype: List of string
+    :raise: :class:`ValueError` if the layer groups contain each other.
+    """
+    order = []
+    state = {}
+    for root in graph:
+        if root in state:
+            continue
+        # Iterative depth first search; path holds the groups being visited
+        path = [root]
+        stack = [iter(graph.get(root, ()))]
+        state[root] = 'visiting'
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                done = path.pop()
+                state[done] = 'done'
+                order.append(done)
+            elif state.get(child) == 'visiting':
+                cycle = path[path.index(child):] + [child]
+                raise ValueError('Cycle in layer groups: ' +
+                                 ' > '.join(cycle))
+            elif child not in state:
+                state[child] = 'visiting'
+                path.append(child)
+                stack.append(iter(graph.get(child, ())))
+    return order
+
 
 class LayerGroup(Resource):
+    """
+    Layer group; its layers are :class:`geoserver.Layer` and, for nested
+    groups, :class:`LayerGroup` objects.
+    """
+    __slots__ = ('layers',)
+
     def __init__(self, name, geoserver, layers):
         Resource.__init__(self, name, geoserver)
         self.layers = layers
@@ -14,3 +78,22 @@ class LayerGroup(Resource):
 
     def get_layers(self):
         return self.layers
+
+
+class LazyLayerGroup(LayerGroup):
+    """
+    Layer group built from a listing entry.
+
+    Its layers are requested on first access and kept afterwards.
+    """
+    __slots__ = ('_lock',)
+
+    def __init__(self, name, geoserver):
+        LayerGroup.__init__(self, name, geoserver, None)
+        self._lock = threading.Lock()
+
+    def get_layers(self):
+        with self._lock:
+            if self.layers is None:
+                self.layers = self.geoserver._layergroup_layers(self.name)
+            return self.layers
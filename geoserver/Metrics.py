@@ -0,0 +1,170 @@
+"""
+Metrics
+"""
+import threading
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Path segments followed by the name of a resource
+COLLECTIONS = ('workspaces', 'namespaces', 'datastores', 'coveragestores',
+               'featuretypes', 'coverages', 'layers', 'layergroups', 'styles')
+
+_EXTENSIONS = ('.json', '.xml', '.sld')
+
+
+def path_template(path):
+    """
+    Get the endpoint family of a path relative to the REST endpoint,
+    replacing resource names with ``*``, such as ``layers/*`` for
+    ``layers/topp:states.json``.
+
+    :type path: string
+    :rtype: string
+    """
+    path = path.split('?', 1)[0]
+    for ext in _EXTENSIONS:
+        if path.endswith(ext):
+            path = path[:-len(ext)]
+            break
+    segments = path.split('/')
+    template = []
+    for i, segment in enumerate(segments):
+        if i > 0 and segments[i - 1] in COLLECTIONS and \
+                template[-1] != '*':
+            template.append('*')
+        else:
+            template.append(segment)
+    return '/'.join(template)
+
+
+class EndpointStats:
+    """
+    Aggregated requests to an endpoint family with a method.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency = 0.0
+        self.statuses = {}
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, status, size, latency):
+        self.count += 1
+        if status is None or status >= 400:
+            self.errors += 1
+        self.bytes += size
+        self.latency += latency
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        for i, bound in enumerate(BUCKETS):
+            if latency <= bound:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q):
+        """
+        Get an estimate of a latency quantile: the upper bound of the bucket
+        containing it, or None if it is above the last bucket.
+        """
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= target and seen > 0:
+                return bound
+        return None
+
+
+class Metrics:
+    """
+    Request hook for :class:`geoserver.GeoServer` aggregating counters and
+    latency histograms per method and endpoint family.
+
+    :Example:
+
+    >>> metrics = Metrics()
+    >>> gs = GeoServer(url, user, password, on_request=metrics)
+    >>> gs.get_layers()
+    >>> print(metrics.summary())
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, status, size, latency):  # pylint: disable=too-many-arguments
+        key = (method.upper(), path_template(path))
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.add(status, size, latency)
+
+    def summary(self):
+        """
+        Get a table with the requests, errors, bytes and latencies (mean and
+        95th percentile in milliseconds) per endpoint family.
+
+        :rtype: string
+        """
+        rows = [('METHOD', 'ENDPOINT', 'REQUESTS', 'ERRORS', 'BYTES',
+                 'MEAN MS', 'P95 MS')]
+        total = EndpointStats()
+        with self._lock:
+            for (method, path), s in sorted(self.endpoints.items()):
+                p95 = s.quantile(0.95)
+                rows.append((method, path, s.count, s.errors, s.bytes,
+                             '{:.1f}'.format(1000 * s.latency / s.count),
+                             '<{:g}'.format(1000 * p95) if p95 else '>10000'))
+                total.count += s.count
+                total.errors += s.errors
+                total.bytes += s.bytes
+                total.latency += s.latency
+        rows.append(('', 'total', total.count, total.errors, total.bytes,
+                     '{:.1f}'.format(1000 * total.latency / total.count)
+                     if total.count else '-', ''))
+        widths = [max(len(str(r[i])) for r in rows) for i in range(7)]
+        return '\n'.join('  '.join(str(v).ljust(w) for v, w in
+                                   zip(row, widths)).rstrip()
+                         for row in rows)
+
+    def openmetrics(self, prefix='geoserver'):
+        """
+        Get the metrics in the OpenMetrics text format.
+
+        :param prefix: prefix of the metric names.
+        :type prefix: string
+        :rtype: string
+        """
+        requests = ['# TYPE {}_requests counter'.format(prefix)]
+        sizes = ['# TYPE {}_response_bytes counter'.format(prefix)]
+        latencies = ['# TYPE {}_request_duration_seconds histogram'
+                     .format(prefix),
+                     '# UNIT {}_request_duration_seconds seconds'
+                     .format(prefix)]
+        with self._lock:
+            for (method, path), s in sorted(self.endpoints.items()):
+                labels = 'method="{}",endpoint="{}"'.format(method, path)
+                for status, n in sorted(s.statuses.items(),
+                                        key=lambda x: str(x[0])):
+                    requests.append('{}_requests_total{{{},status="{}"}} {}'
+                                    .format(prefix, labels, status or 'error',
+                                            n))
+                sizes.append('{}_response_bytes_total{{{}}} {}'
+                             .format(prefix, labels, s.bytes))
+                cumulative = 0
+                for bound, n in zip(BUCKETS, s.buckets):
+                    cumulative += n
+                    latencies.append(
+                        '{}_request_duration_seconds_bucket{{{},le="{}"}} {}'
+                        .format(prefix, labels, float(bound), cumulative))
+                latencies.append(
+                    '{}_request_duration_seconds_bucket{{{},le="+Inf"}} {}'
+                    .format(prefix, labels, s.count))
+                latencies.append('{}_request_duration_seconds_sum{{{}}} {}'
+                                 .format(prefix, labels, s.latency))
+                latencies.append('{}_request_duration_seconds_count{{{}}} {}'
+                                 .format(prefix, labels, s.count))
+        return '\n'.join(requests + sizes + latencies + ['# EOF']) + '\n'
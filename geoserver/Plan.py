@@ -0,0 +1,464 @@
+"""
+Plan
+"""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from geoserver.GeoServer import NotFoundError
+from geoserver.Style import Style
+from geoserver.Upload import file_type, upload
+
+CREATE = '+'
+UPDATE = '~'
+DELETE = '-'
+
+DEFAULT_WORKERS = 4
+
+# Resource kinds in creation order; deletions go the other way round.
+KINDS = ('workspace', 'style', 'datastore', 'layer', 'layergroup')
+
+
+def load_state(path):
+    """
+    Reads a desired state from a JSON or YAML file.
+
+    The state has a list of entries for each resource kind (``workspaces``,
+    ``styles``, ``datastores``, ``layers`` and ``layergroups``). Relative
+    ``file`` paths are taken from the directory of the state file.
+
+    :param path: Path of the file; YAML is used for ``.yml`` and ``.yaml``
+      files and requires PyYAML.
+    :type path: string
+    :return: The desired state.
+    :rtype: dict
+    :raise: :class:`ValueError` if the file is not a valid state.
+    """
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in ('.yml', '.yaml'):
+            import yaml
+            state = yaml.safe_load(f)
+        else:
+            state = json.load(f)
+    if not isinstance(state, dict):
+        raise ValueError('Invalid state: ' + path)
+
+    base = os.path.dirname(os.path.abspath(path))
+    for kind in KINDS:
+        for entry in state.get(kind + 's') or []:
+            if not isinstance(entry, dict) or not entry.get('name'):
+                raise ValueError('Invalid {} in {}'.format(kind, path))
+            if entry.get('file'):
+                entry['file'] = os.path.join(base, entry['file'])
+    return state
+
+
+class Action:
+    """
+    Change to apply to a resource.
+
+    :param op: ``+`` to create, ``~`` to update or ``-`` to delete.
+    :param kind: Kind of the resource, such as ``workspace`` or ``layer``.
+    :param name: Name of the resource.
+    :param run: Function applying the change.
+    :param deps: Actions that must succeed before this one.
+    """
+
+    def __init__(self, op, kind, name, run, deps=()):  # pylint: disable=too-many-arguments
+        self.op = op
+        self.kind = kind
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+
+    def __str__(self):
+        return '{} {} {}'.format(self.op, self.kind, self.name)
+
+    def __repr__(self):
+        return '<Action {}>'.format(self)
+
+
+class PlanResult:
+    """
+    Result of executing a plan: the actions done, skipped because an action
+    they depend on failed, and failed (with their error).
+    """
+
+    def __init__(self):
+        self.done = []
+        self.skipped = []
+        self.failed = []
+
+
+class Plan:
+    """
+    Changes needed to take a GeoServer instance to a desired state, as
+    computed by :func:`plan`.
+
+    Actions form a dependency graph (workspaces before their stores, stores
+    before their layers, layers before the groups containing them, and the
+    other way round for deletions); :meth:`execute` runs the independent
+    branches concurrently.
+    """
+
+    def __init__(self, actions):
+        self.actions = actions
+
+    def __iter__(self):
+        return iter(self.actions)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def __str__(self):
+        return '\n'.join(str(a) for a in self.actions)
+
+    def execute(self, max_workers=DEFAULT_WORKERS, progress=None):
+        """
+        Applies the changes.
+
+        Every action starts as soon as the actions it depends on are done;
+        if any of them fails, the action is skipped.
+
+        :param max_workers: number of actions run concurrently.
+        :param progress: Function called with each action and its error
+          (None if it was done) as soon as it finishes.
+        :type max_workers: int
+        :type progress: callable
+        :return: The actions done, skipped and failed.
+        :rtype: :class:`PlanResult`
+        :raise: :class:`ValueError` if some actions depend on each other.
+        """
+        result = PlanResult()
+        succeeded = {}
+        pending = list(self.actions)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                for action in list(pending):
+                    if any(succeeded.get(d) is False for d in action.deps):
+                        pending.remove(action)
+                        succeeded[action] = False
+                        result.skipped.append(action)
+                    elif all(succeeded.get(d) for d in action.deps):
+                        pending.remove(action)
+                        running[executor.submit(action.run)] = action
+                if not running:
+                    if pending:
+                        raise ValueError('Cannot apply {}: their dependencies '
+                                         'never finish'.format(', '.join(
+                                             str(a) for a in pending)))
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    action = running.pop(future)
+                    error = future.exception()
+                    succeeded[action] = error is None
+                    if error is None:
+                        result.done.append(action)
+                    else:
+                        logging.info('Cannot apply %s: %s', action, error)
+                        result.failed.append((action, error))
+                    if progress:
+                        progress(action, error)
+        return result
+
+
+def _list(value, inner):
+    """Items of a listing, which GeoServer sends as '' when empty."""
+    items = (value or {}).get(inner) or []
+    return items if isinstance(items, list) else [items]
+
+
+def _sld(entry):
+    if entry.get('file'):
+        with open(entry['file']) as f:
+            return f.read()
+    return entry.get('sld')
+
+
+class _Current:
+    """
+    Current state of the resources named in a desired state.
+
+    Only the listings and the resources mentioned in the desired state are
+    requested, concurrently.
+    """
+
+    def __init__(self, geoserver, state, executor):
+        self.geoserver = geoserver
+        gs = geoserver
+        desired = {kind: state.get(kind + 's') or [] for kind in KINDS}
+
+        listings = {
+            'workspaces': executor.submit(gs._get, 'workspaces'),
+            'styles': executor.submit(gs._get, 'styles'),
+            'layergroups': executor.submit(gs._get, 'layergroups')
+        }
+        layers = {e['name']: executor.submit(self._get, 'layers/' + e['name'])
+                  for e in desired['layer']}
+
+        self.workspaces = {w['name']: None for w in _list(
+            listings['workspaces'].result()['workspaces'], 'workspace')}
+        self.styles = {s['name']: None for s in _list(
+            listings['styles'].result()['styles'], 'style')}
+        self.layergroups = {g['name']: None for g in _list(
+            listings['layergroups'].result()['layerGroups'], 'layerGroup')}
+
+        namespaces = {e['name']: executor.submit(gs._get,
+                                                 'namespaces/' + e['name'])
+                      for e in desired['workspace']
+                      if e['name'] in self.workspaces and e.get('namespace')}
+        slds = {e['name']: executor.submit(
+            gs._request, 'styles/{}.sld'.format(e['name']), extension='')
+                for e in desired['style']
+                if e['name'] in self.styles and _sld(e) is not None}
+        groups = {e['name']: executor.submit(gs._get,
+                                             'layergroups/' + e['name'])
+                  for e in desired['layergroup']
+                  if e['name'] in self.layergroups}
+        stores = {(ws, kind): executor.submit(
+            gs._get, 'workspaces/{}/{}'.format(ws, kind))
+                  for ws in {e.get('workspace') for e in desired['datastore']}
+                  if ws in self.workspaces
+                  for kind in ('datastores', 'coveragestores')}
+
+        for name, f in namespaces.items():
+            self.workspaces[name] = f.result()['namespace']['uri']
+        for name, f in slds.items():
+            self.styles[name] = f.result()
+        for name, f in groups.items():
+            published = f.result()['layerGroup']['publishables']
+            self.layergroups[name] = [p['name'] for p in
+                                      _list(published, 'published')]
+        self.datastores = {}
+        for (ws, kind), f in stores.items():
+            inner = 'coverageStore' if kind == 'coveragestores' \
+                else 'dataStore'
+            for ds in _list(f.result()[inner + 's'], inner):
+                self.datastores[(ws, ds['name'])] = kind
+        self.layers = {}
+        for name, f in layers.items():
+            layer = f.result()
+            if layer is not None:
+                style = layer['layer'].get('defaultStyle') or {}
+                self.layers[name] = style.get('name')
+
+    def _get(self, path):
+        # Other errors must not be taken for a missing resource
+        try:
+            return self.geoserver._get(path)
+        except NotFoundError as e:
+            logging.info(e)
+            return None
+
+
+class _Planner:  # pylint: disable=too-few-public-methods
+    def __init__(self, geoserver, current):
+        self.geoserver = geoserver
+        self.current = current
+        self.actions = []
+        self.by_key = {}
+
+    def add(self, op, kind, name, run, deps=()):  # pylint: disable=too-many-arguments
+        action = Action(op, kind, name, run,
+                        [d for d in deps if d is not None])
+        self.actions.append(action)
+        self.by_key[(kind, name)] = action
+        return action
+
+    def get(self, kind, name):
+        return self.by_key.get((kind, name))
+
+    def store_creations(self, workspace):
+        return [a for a in self.actions if a.kind == 'datastore' and
+                a.op == CREATE and a.name.split(':')[0] == workspace]
+
+    def workspace(self, entry):
+        gs = self.geoserver
+        name = entry['name']
+        namespace = entry.get('namespace')
+        exists = name in self.current.workspaces
+        if entry.get('absent'):
+            if exists:
+                self.add(DELETE, 'workspace', name, lambda: gs._request(
+                    'workspaces/' + name, method='DELETE',
+                    params={'recurse': 'true'}))
+        elif not exists:
+            if not namespace:
+                raise ValueError('Missing namespace for workspace ' + name)
+            self.add(CREATE, 'workspace', name,
+                     lambda: gs.create_workspace(name, namespace))
+        elif namespace and namespace != self.current.workspaces[name]:
+            data = json.dumps({'namespace': {'prefix': name,
+                                             'uri': namespace}})
+            self.add(UPDATE, 'workspace', name, lambda: gs._request(
+                'namespaces/' + name, method='PUT', data=data,
+                headers={'Content-type': 'application/json'}))
+
+    def style(self, entry):
+        gs = self.geoserver
+        name = entry['name']
+        sld = _sld(entry)
+        exists = name in self.current.styles
+        if entry.get('absent'):
+            if exists:
+                self.add(DELETE, 'style', name, Style(name, gs).delete)
+        elif not exists:
+            if sld is None:
+                raise ValueError('Missing SLD for style ' + name)
+            self.add(CREATE, 'style', name,
+                     lambda: gs.create_style(name, sld))
+        elif sld is not None and \
+                sld.strip() != (self.current.styles[name] or '').strip():
+            self.add(UPDATE, 'style', name,
+                     lambda: Style(name, gs).set_sld(sld))
+
+    def datastore(self, entry):
+        gs = self.geoserver
+        name = entry['name']
+        ws = entry.get('workspace')
+        key = '{}:{}'.format(ws, name)
+        kind = self.current.datastores.get((ws, name))
+        if entry.get('absent'):
+            if kind:
+                self.add(DELETE, 'datastore', key, lambda: gs._request(
+                    'workspaces/{}/{}/{}'.format(ws, kind, name),
+                    method='DELETE', params={'recurse': 'true'}))
+        elif not kind:
+            if not entry.get('file'):
+                raise ValueError('Missing file for datastore ' + key)
+            file_type(entry['file'])
+            self.add(CREATE, 'datastore', key,
+                     lambda: upload(gs, ws, name, entry['file']),
+                     [self.get('workspace', ws)])
+
+    def layer(self, entry):
+        gs = self.geoserver
+        name = entry['name']
+        style = entry.get('style')
+        exists = name in self.current.layers
+        workspace = name.split(':')[0] if ':' in name else None
+        if entry.get('absent'):
+            if exists:
+                self.add(DELETE, 'layer', name, lambda: gs._request(
+                    'layers/' + name, method='DELETE'))
+            return
+        if exists and (not style or style == self.current.layers[name]):
+            return
+        creations = self.store_creations(workspace)
+        if not exists and not creations:
+            raise ValueError('Layer {} does not exist and no datastore '
+                             'creates it'.format(name))
+        if not style:
+            return
+        data = json.dumps({'layer': {'defaultStyle': {'name': style}}})
+        self.add(UPDATE, 'layer', name, lambda: gs._request(
+            'layers/' + name, method='PUT', data=data,
+            headers={'Content-type': 'application/json'}),
+                 creations + [self.get('style', style)])
+
+    def layergroup(self, entry):
+        gs = self.geoserver
+        name = entry['name']
+        layers = entry.get('layers') or []
+        current = self.current.layergroups
+        exists = name in current
+        if entry.get('absent'):
+            if exists:
+                self.add(DELETE, 'layergroup', name, lambda: gs._request(
+                    'layergroups/' + name, method='DELETE'))
+            return
+        if exists and current[name] == layers:
+            return
+        data = json.dumps({'layerGroup': {
+            'name': name,
+            'publishables': {'published': [
+                {'@type': 'layer', 'name': layer} for layer in layers]}
+        }})
+        headers = {'Content-type': 'application/json'}
+        deps = [self.get('layer', layer) for layer in layers]
+        for layer in layers:
+            deps.extend(self.store_creations(layer.split(':')[0]))
+        if exists:
+            self.add(UPDATE, 'layergroup', name, lambda: gs._request(
+                'layergroups/' + name, method='PUT', data=data,
+                headers=headers), deps)
+        else:
+            self.add(CREATE, 'layergroup', name, lambda: gs._request(
+                'layergroups', method='POST', expected_code=201, data=data,
+                headers=headers), deps)
+
+    def order_deletions(self):
+        """
+        Makes every deletion wait for the changes on the kinds that may
+        reference the deleted resource.
+        """
+        for action in self.actions:
+            if action.op == DELETE:
+                later = KINDS[KINDS.index(action.kind) + 1:]
+                action.deps.extend(a for a in self.actions
+                                   if a.kind in later)
+
+
+def check_cycles(actions):
+    """
+    Checks that no action depends on itself, directly or through others.
+
+    :type actions: List of :class:`Action`
+    :raise: :class:`ValueError` naming the actions of a cycle.
+    """
+    state = {}
+    for root in actions:
+        if root in state:
+            continue
+        # Iterative depth first search; path holds the actions being visited
+        path = [root]
+        stack = [iter(root.deps)]
+        state[root] = 'visiting'
+        while stack:
+            dep = next(stack[-1], None)
+            if dep is None:
+                stack.pop()
+                state[path.pop()] = 'done'
+            elif state.get(dep) == 'visiting':
+                cycle = path[path.index(dep):] + [dep]
+                raise ValueError('Changes depend on each other: ' +
+                                 ' > '.join(str(a) for a in cycle))
+            elif dep not in state:
+                state[dep] = 'visiting'
+                path.append(dep)
+                stack.append(iter(dep.deps))
+
+
+def plan(geoserver, state, max_workers=DEFAULT_WORKERS):
+    """
+    Computes the changes needed to take a GeoServer instance to a desired
+    state.
+
+    Only the resources in the state are considered: those missing are
+    created, those that differ are updated and those marked as ``absent``
+    are deleted. Existing datastores are not uploaded again and layers
+    cannot be created on their own, only through the datastore uploads.
+
+    :param geoserver: GeoServer instance to compare with.
+    :param state: Desired state, as returned by :func:`load_state`.
+    :param max_workers: number of concurrent requests used to get the
+      current state.
+    :type geoserver: :class:`geoserver.GeoServer`
+    :type state: dict
+    :type max_workers: int
+    :return: The changes to apply.
+    :rtype: :class:`Plan`
+    :raise: :class:`ValueError` if the state is invalid or cannot be reached.
+    :raise: :class:`IOError` if any error occurs while requesting the REST API.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        current = _Current(geoserver, state, executor)
+    planner = _Planner(geoserver, current)
+    for kind in KINDS:
+        for entry in state.get(kind + 's') or []:
+            getattr(planner, kind)(entry)
+    planner.order_deletions()
+    check_cycles(planner.actions)
+    return Plan(planner.actions)
@@ -1,4 +1,12 @@
 class Resource:
+    """
+    Named object of a GeoServer catalog.
+
+    Resources use ``__slots__`` so that large catalogs stay small in memory;
+    subclasses must declare ``__slots__`` as well.
+    """
+    __slots__ = ('name', 'geoserver')
+
     def __init__(self, name, geoserver):
         self.name = name
         self.geoserver = geoserver
@@ -8,3 +16,11 @@ class Resource:
 
     def get_geoserver(self):
         return self.geoserver
+
+    def __eq__(self, other):
+        return (self.__class__ == other.__class__ and
+                self.name == other.name and
+                self.geoserver == other.geoserver)
+
+    def __hash__(self):
+        return hash((self.__class__, self.name))
@@ -0,0 +1,159 @@
+"""
+ResponseCache
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 60
+
+# Changes to a workspace or to one of its stores, such as uploads and
+# recursive deletions, which create or remove layers
+_STORE_CHANGE = re.compile(
+    r'workspaces/([^/]+)(/(datastores|coveragestores)/[^/]+)?')
+
+
+class _Entry:
+    def __init__(self, value, size, expires, etag, last_modified):  # pylint: disable=too-many-arguments
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ResponseCache:
+    """
+    LRU cache for the responses of GET requests to the REST API.
+
+    Entries are keyed by their path relative to the REST endpoint (for
+    instance ``styles/burg``) and expire after a time to live that depends on
+    the resource type, the first segment of the path. Expired entries with an
+    ``ETag`` or ``Last-Modified`` header are revalidated with a conditional
+    request instead of being downloaded again.
+
+    :param max_entries: maximum number of entries; the least recently used
+      ones are evicted first.
+    :param max_bytes: maximum size of all the response bodies, if any.
+    :param ttl: time to live in seconds for each resource type, such as
+      ``{'layers': 300, 'styles': 30}``.
+    :param default_ttl: time to live in seconds for other resource types.
+    :type max_entries: int
+    :type max_bytes: int
+    :type ttl: dict
+    :type default_ttl: float
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=None,
+                 ttl=None, default_ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl or {}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ttl(self, key):
+        return self.ttl.get(key.split('/')[0], self.default_ttl)
+
+    def lookup(self, key):
+        """
+        Get the cached entry for a key.
+
+        :return: A ``(entry, fresh)`` tuple; entry is None if the key is not
+          cached and fresh tells whether it can be used without revalidation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            fresh = entry.expires > time.monotonic()
+            if fresh:
+                self.hits += 1
+            elif not (entry.etag or entry.last_modified):
+                self._remove(key)
+                self.misses += 1
+                return None, False
+            return entry, fresh
+
+    def put(self, key, value, size, etag=None, last_modified=None):  # pylint: disable=too-many-arguments
+        """
+        Stores a response, evicting the least recently used entries if needed.
+        """
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        entry = _Entry(value, size, time.monotonic() + self._ttl(key),
+                       etag, last_modified)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while (len(self._entries) > self.max_entries or
+                   (self.max_bytes is not None and
+                    self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def revalidated(self, key):
+        """
+        Marks an entry as fresh again after the server answered
+        ``304 Not Modified``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self._ttl(key)
+                self.revalidations += 1
+
+    def invalidate(self, key):
+        """
+        Removes the entries affected by a change on a path: the path itself,
+        everything below it and the listing containing it.
+
+        A change to a workspace or to a store, such as an upload, also
+        removes the store listings of the workspace, everything below the
+        store, and the layers and layer groups, which it may create or
+        remove.
+        """
+        keys = {key}
+        if '/' in key:
+            keys.add(key.rsplit('/', 1)[0])
+        prefixes = [key + '/']
+        m = _STORE_CHANGE.match(key)
+        if m:
+            workspace = 'workspaces/' + m.group(1)
+            store = workspace + (m.group(2) or '')
+            keys.update([store, workspace + '/datastores',
+                         workspace + '/coveragestores', 'layers',
+                         'layergroups'])
+            prefixes.extend([store + '/', 'layers/' + m.group(1) + ':',
+                             'layergroups/'])
+        prefixes = tuple(prefixes)
+        with self._lock:
+            for k in list(self._entries):
+                if k in keys or k.startswith(prefixes):
+                    self._remove(k)
+
+    def clear(self):
+        """
+        Removes all the entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key).size
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,197 @@
+"""
+Retry
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30
+RETRY_STATUSES = (429, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a request to the REST API.
+
+    Only idempotent requests are retried, after a connection error or a
+    response with one of the retryable status codes. The wait grows
+    exponentially with every attempt, with random jitter so that concurrent
+    clients don't retry all at once, and is never shorter than the
+    ``Retry-After`` header of the response.
+
+    :param retries: maximum number of retries of a request.
+    :param backoff: wait in seconds before the first retry; it doubles with
+      every retry.
+    :param max_backoff: maximum wait in seconds, also applied to
+      ``Retry-After``.
+    :param statuses: response codes to retry.
+    :param methods: HTTP methods to retry.
+    :param jitter: if True, wait a random time between 0 and the backoff.
+    :type retries: int
+    :type backoff: float
+    :type max_backoff: float
+    :type statuses: tuple of int
+    :type methods: tuple of string
+    :type jitter: bool
+    """
+
+    def __init__(self, retries=DEFAULT_RETRIES,  # pylint: disable=too-many-arguments
+                 backoff=DEFAULT_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF,
+                 statuses=RETRY_STATUSES,
+                 methods=IDEMPOTENT_METHODS,
+                 jitter=True):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.methods = methods
+        self.jitter = jitter
+        self.retried = 0
+        self.exhausted = 0
+        self.retry_after = 0
+        self._lock = threading.Lock()
+
+    def should_retry(self, method, attempt, status=None, replayable=True):
+        """
+        Tells whether a failed attempt must be retried, counting it.
+
+        :param method: HTTP method of the request.
+        :param attempt: number of the failed attempt, starting at 0.
+        :param status: response code, or None after a connection error.
+        :param replayable: False if the request body cannot be sent again,
+          such as a stream read from disk.
+        """
+        if status is not None and status not in self.statuses:
+            return False
+        if method.upper() not in self.methods or not replayable:
+            return False
+        with self._lock:
+            if attempt >= self.retries:
+                self.exhausted += 1
+                return False
+            self.retried += 1
+            return True
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Get the seconds to wait before retrying.
+
+        :param attempt: number of the failed attempt, starting at 0.
+        :param retry_after: ``Retry-After`` header of the response, if any.
+        :rtype: float
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        seconds = _retry_after_seconds(retry_after)
+        if seconds is not None:
+            with self._lock:
+                self.retry_after += 1
+            delay = max(delay, min(seconds, self.max_backoff))
+        return delay
+
+
+def _retry_after_seconds(value):
+    """Seconds of a ``Retry-After`` header, either a number or a date."""
+    if not value:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Fails requests fast while a GeoServer instance is clearly down.
+
+    After ``failure_threshold`` consecutive failures (connection errors or
+    5xx responses) the circuit opens and requests are rejected without
+    being sent. Once ``reset_timeout`` seconds have passed, a single trial
+    request is let through: the circuit closes if it succeeds and opens
+    again otherwise.
+
+    :param failure_threshold: consecutive failures that open the circuit.
+    :param reset_timeout: seconds before a trial request is let through.
+    :type failure_threshold: int
+    :type reset_timeout: float
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._state = CLOSED
+        self._opened_at = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        Current state: ``closed``, ``open`` or ``half-open``.
+        """
+        with self._lock:
+            if self._state == OPEN and self._elapsed():
+                return HALF_OPEN
+            return self._state
+
+    def _elapsed(self):
+        return time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def allow(self):
+        """
+        Tells whether a request can be sent, counting it as rejected if not.
+
+        :rtype: bool
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._elapsed():
+                self._state = HALF_OPEN
+                self._trial = False
+            if self._state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success):
+        """
+        Records the outcome of a request.
+
+        :param success: False after a connection error or a 5xx response.
+        :type success: bool
+        """
+        with self._lock:
+            if success:
+                self.failures = 0
+                self._state = CLOSED
+                return
+            self.failures += 1
+            if self._state == HALF_OPEN or \
+                    self.failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,236 @@
+"""
+Snapshot
+"""
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from geoserver.GeoServer import NotFoundError
+
+DEFAULT_WORKERS = 8
+VERSION = 1
+
+# Result of revalidating a record that has not changed
+_UNCHANGED = object()
+
+# Store of a layer, taken from the href of its resource
+_RESOURCE_HREF = re.compile(
+    r'/workspaces/[^/]+/(datastores|coveragestores)/([^/]+)/')
+
+
+def _list(value, inner):
+    """Items of a listing, which GeoServer sends as '' when empty."""
+    items = (value or {}).get(inner) or []
+    return items if isinstance(items, list) else [items]
+
+
+def read_snapshot(path):
+    """
+    Reads the records of a snapshot file.
+
+    :param path: Path of the snapshot file.
+    :type path: string
+    :return: The records, without the header line.
+    :rtype: List of dict
+    :raise: :class:`ValueError` if the file is not a snapshot.
+    """
+    return _read(path)[1]
+
+
+def _read(path):
+    with open(path) as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('type') != 'snapshot':
+            raise ValueError('Not a snapshot: ' + path)
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+class SnapshotResult:
+    """
+    Result of taking a snapshot: the records written and the number of
+    resources whose details were downloaded, rather than reused.
+    """
+
+    def __init__(self, records, fetched):
+        self.records = records
+        self.fetched = fetched
+
+    def count(self, record_type):
+        return sum(1 for r in self.records if r['type'] == record_type)
+
+
+class _Snapshot:
+    def __init__(self, geoserver, previous, executor):
+        self.geoserver = geoserver
+        self.executor = executor
+        self.previous = {}
+        for record in previous:
+            self.previous.setdefault(record['type'], {})[
+                _key(record)] = record
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def _old(self, record_type, key):
+        return self.previous.get(record_type, {}).get(key)
+
+    def _records(self, record_type, keys, fetch):
+        """
+        Records of the given keys, fetched concurrently; previous records
+        are revalidated and reused if they haven't changed.
+        """
+        records = self.executor.map(
+            lambda key: fetch(key, self._old(record_type, key)), keys)
+        return [r for r in records if r is not None]
+
+    def take(self):
+        gs = self.geoserver
+        listings = {path: self.executor.submit(gs._get, path)
+                    for path in ('workspaces', 'styles', 'layers',
+                                 'layergroups')}
+        workspaces = [w['name'] for w in _list(
+            listings['workspaces'].result()['workspaces'], 'workspace')]
+        stores = {(ws, kind): self.executor.submit(
+            gs._get, 'workspaces/{}/{}'.format(ws, kind))
+                  for ws in workspaces
+                  for kind in ('datastores', 'coveragestores')}
+
+        records = self._records('workspace', workspaces, self._workspace)
+        for (ws, kind), f in stores.items():
+            inner = 'coverageStore' if kind == 'coveragestores' \
+                else 'dataStore'
+            records.extend({'type': inner.lower(), 'workspace': ws,
+                            'name': s['name']}
+                           for s in _list(f.result()[inner + 's'], inner))
+        records.extend({'type': 'style', 'name': s['name']} for s in _list(
+            listings['styles'].result()['styles'], 'style'))
+        records.extend(self._records('layer', [x['name'] for x in _list(
+            listings['layers'].result()['layers'], 'layer')], self._layer))
+        records.extend(self._records('layergroup', [g['name'] for g in _list(
+            listings['layergroups'].result()['layerGroups'], 'layerGroup')],
+                                     self._layergroup))
+        return records
+
+    def _get(self, path, old=None):
+        """
+        Requests a resource, conditionally if its previous record has
+        validators.
+
+        Returns the response and its validators, :data:`_UNCHANGED` if the
+        previous record is still valid or None if the resource does not
+        exist.
+        """
+        gs = self.geoserver
+        url = urljoin(gs.url, path) + '.json'
+        headers = {}
+        if old and old.get('etag'):
+            headers['If-None-Match'] = old['etag']
+        if old and old.get('last_modified'):
+            headers['If-Modified-Since'] = old['last_modified']
+        r = gs._send('get', url, headers)
+        if headers and r.status_code == 304:
+            return _UNCHANGED, None
+        try:
+            value = gs._response(r, 'get', url, '.json', 200)
+        except NotFoundError as e:
+            # Removed since the listing was requested
+            logging.info(e)
+            return None, None
+        with self._lock:
+            self.fetched += 1
+        validators = {'etag': r.headers.get('ETag'),
+                      'last_modified': r.headers.get('Last-Modified')}
+        return value, {k: v for k, v in validators.items() if v}
+
+    def _workspace(self, name, old):
+        namespace, validators = self._get('namespaces/' + name, old)
+        if namespace is _UNCHANGED:
+            return old
+        return dict({'type': 'workspace', 'name': name,
+                     'namespace': namespace['namespace']['uri']
+                                  if namespace else None}, **validators or {})
+
+    def _layer(self, name, old):
+        layer, validators = self._get('layers/' + name, old)
+        if layer is _UNCHANGED:
+            return old
+        if layer is None:
+            return None
+        layer = layer['layer']
+        style = layer.get('defaultStyle') or {}
+        href = (layer.get('resource') or {}).get('href', '')
+        store = _RESOURCE_HREF.search(href)
+        return dict({'type': 'layer', 'name': name,
+                     'style': style.get('name'),
+                     'store': store.group(2) if store else None},
+                    **validators)
+
+    def _layergroup(self, name, old):
+        group, validators = self._get('layergroups/' + name, old)
+        if group is _UNCHANGED:
+            return old
+        if group is None:
+            return None
+        published = group['layerGroup'].get('publishables')
+        return dict({'type': 'layergroup', 'name': name,
+                     'layers': [p['name']
+                                for p in _list(published, 'published')]},
+                    **validators)
+
+
+def _key(record):
+    if 'workspace' in record:
+        return (record['workspace'], record['name'])
+    return record['name']
+
+
+def snapshot(geoserver, path, refresh=False, max_workers=DEFAULT_WORKERS):
+    """
+    Writes a snapshot of the catalog to a JSON lines file.
+
+    The file has a header line and a record per workspace (with its
+    namespace URI), store, style, layer (with its default style and store)
+    and layer group (with its layers). The details of workspaces, layers
+    and layer groups are kept with the ETag and Last-Modified validators of
+    their responses, if any.
+
+    When refreshing, the details of the resources in the previous snapshot
+    are requested conditionally with their validators, and their records
+    are reused if the server answers that they have not changed; those
+    without validators are requested again.
+
+    :param geoserver: GeoServer instance to take the snapshot from.
+    :param path: Path of the snapshot file; it's replaced atomically.
+    :param refresh: if True and the file exists, reuse its records for the
+      resources that have not changed; it's ignored if the file was taken
+      from another GeoServer instance.
+    :param max_workers: number of concurrent requests.
+    :type geoserver: :class:`geoserver.GeoServer`
+    :type path: string
+    :type refresh: bool
+    :type max_workers: int
+    :return: The records written and the number of resources fetched.
+    :rtype: :class:`SnapshotResult`
+    :raise: :class:`IOError` if any error occurs while requesting the REST
+      API, other than a resource removed since it was listed.
+    """
+    previous = []
+    if refresh and os.path.exists(path):
+        header, records = _read(path)
+        if header.get('url') == geoserver.url:
+            previous = records
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        s = _Snapshot(geoserver, previous, executor)
+        records = s.take()
+
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(json.dumps({'type': 'snapshot', 'version': VERSION,
+                            'url': geoserver.url},
+                           separators=(',', ':')) + '\n')
+        for record in records:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+    os.replace(tmp, path)
+    return SnapshotResult(records, s.fetched)
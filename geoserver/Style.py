@@ -2,11 +2,15 @@ from geoserver.Resource import Resource
 
 
 class Style(Resource):
+    __slots__ = ()
+
     def __init__(self, name, geoserver):
         Resource.__init__(self, name, geoserver)
 
     def delete(self):
-        self.geoserver._request('styles/' + self.name, method='DELETE')
+        return self.geoserver._request('styles/' + self.name, method='DELETE')
 
     def set_sld(self, sld):
-        pass
+        return self.geoserver._request(
+            'styles/' + self.name, method='PUT', extension='', data=sld,
+            headers={'Content-type': 'application/vnd.ogc.sld+xml'})
@@ -0,0 +1,233 @@
+"""
+StyleSync
+"""
+import glob
+import hashlib
+import logging
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from geoserver.Style import Style
+
+DEFAULT_WORKERS = 8
+
+SLD_NAMESPACE = 'http://www.opengis.net/sld'
+SE_NAMESPACE = 'http://www.opengis.net/se'
+VERSIONS = ('1.0.0', '1.1.0')
+
+SYMBOLIZERS = ('PointSymbolizer', 'LineSymbolizer', 'PolygonSymbolizer',
+               'TextSymbolizer', 'RasterSymbolizer')
+
+# Structure checked for each element of a style: the children of which at
+# least one is required, and the children allowed (None for any)
+_STRUCTURE = {
+    'StyledLayerDescriptor': (frozenset(['NamedLayer', 'UserLayer']), None),
+    'NamedLayer': (frozenset(['UserStyle', 'NamedStyle']), None),
+    'UserLayer': (frozenset(['UserStyle']), None),
+    'UserStyle': (frozenset(['FeatureTypeStyle', 'CoverageStyle']), None),
+    'FeatureTypeStyle': (frozenset(['Rule']), None),
+    'CoverageStyle': (frozenset(['Rule']), None),
+    'Rule': (frozenset(SYMBOLIZERS), frozenset(SYMBOLIZERS + (
+        'Name', 'Title', 'Abstract', 'Description', 'LegendGraphic',
+        'ElseFilter', 'MinScaleDenominator', 'MaxScaleDenominator')))
+}
+
+# Namespaces of the elements whose structure is checked
+_STYLE_NAMESPACES = (SLD_NAMESPACE, SE_NAMESPACE)
+# Namespaces of filters, allowed in rules
+_FILTER_NAMESPACES = ('http://www.opengis.net/ogc',
+                      'http://www.opengis.net/fes/2.0')
+
+
+def _split(tag):
+    """Namespace and local name of a tag."""
+    if tag[:1] == '{':
+        namespace, local = tag[1:].split('}', 1)
+        return namespace, local
+    return '', tag
+
+
+def validate_sld(sld):
+    """
+    Checks that an SLD is well formed and has the structure of a style
+    (layers with styles, feature type styles with rules and rules with
+    symbolizers) without requesting anything.
+
+    :param sld: SLD content.
+    :type sld: string
+    :rtype: None
+    :raise: :class:`ValueError` if the SLD is not valid.
+    """
+    try:
+        root = ET.fromstring(sld)
+    except ET.ParseError as e:
+        raise ValueError('Malformed XML: {}'.format(e))
+    if _split(root.tag) != (SLD_NAMESPACE, 'StyledLayerDescriptor'):
+        raise ValueError('Not a StyledLayerDescriptor')
+    version = root.get('version')
+    if version not in VERSIONS:
+        raise ValueError('Unsupported SLD version: {}'.format(version))
+
+    for element in root.iter():
+        namespace, name = _split(element.tag)
+        if namespace not in _STYLE_NAMESPACES or name not in _STRUCTURE:
+            continue
+        required, allowed = _STRUCTURE[name]
+        children = [_split(child.tag) for child in element]
+        if not any(n in required for ns, n in children
+                   if ns in _STYLE_NAMESPACES):
+            raise ValueError('{} without {}'.format(
+                name, ' or '.join(sorted(required))))
+        if allowed is None:
+            continue
+        for ns, n in children:
+            if ns in _FILTER_NAMESPACES:
+                continue
+            if ns not in _STYLE_NAMESPACES or n not in allowed:
+                raise ValueError('Unexpected {} in {}'.format(n, name))
+
+
+def sld_hash(sld):
+    """
+    Hash of the content of an SLD, ignoring line endings and surrounding
+    blank space.
+
+    :type sld: string
+    :rtype: string
+    """
+    text = '\n'.join(sld.strip().splitlines())
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class StyleFile:
+    """
+    SLD file to sync: the style name is taken from the file name.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.sld = None
+        self.hash = None
+
+
+class SyncResult:
+    """
+    Result of a sync: the style files created, updated, skipped because the
+    server has the same content, invalid (with the validation error) and
+    failed (with the request error).
+    """
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        self.skipped = []
+        self.invalid = []
+        self.failed = []
+
+
+def scan(path):
+    """
+    Finds the SLD files of a directory.
+
+    :param path: Directory to scan.
+    :type path: string
+    :return: The style files, sorted by path.
+    :rtype: List of :class:`StyleFile`
+    """
+    return [StyleFile(p)
+            for p in sorted(glob.glob(os.path.join(path, '*.sld')))]
+
+
+class StyleSync:
+    """
+    Makes the styles of a GeoServer instance match the SLD files of a
+    directory.
+
+    Every file is validated locally first, so invalid files never reach the
+    server. Then the SLD of every existing style is requested and compared
+    by hash, and only new and changed styles are uploaded, concurrently.
+    Styles missing from the directory are left alone.
+
+    :param geoserver: GeoServer instance to sync the styles to.
+    :param workers: number of concurrent requests.
+    :type geoserver: :class:`geoserver.GeoServer`
+    :type workers: int
+    """
+
+    def __init__(self, geoserver, workers=DEFAULT_WORKERS):
+        self.geoserver = geoserver
+        self.workers = workers
+
+    def _remote_hash(self, name):
+        try:
+            sld = self.geoserver._request('styles/{}.sld'.format(name),
+                                          extension='')
+        except IOError as e:
+            # Styles without an SLD file are uploaded again
+            logging.info(e)
+            return None
+        return sld_hash(sld)
+
+    def run(self, path, progress=None):
+        """
+        Syncs the SLD files of a directory.
+
+        :param path: Directory with a ``.sld`` file per style.
+        :param progress: Function called with each style file and its
+          outcome (``created``, ``updated``, ``skipped``, ``invalid`` or
+          ``failed``) and error, if any, as soon as it is known.
+        :type path: string
+        :type progress: callable
+        :return: The style files created, updated, skipped, invalid and
+          failed.
+        :rtype: :class:`SyncResult`
+        :raise: :class:`IOError` if the styles cannot be listed.
+        """
+        result = SyncResult()
+
+        def report(style_file, outcome, error=None):
+            getattr(result, outcome).append(
+                style_file if error is None else (style_file, error))
+            if progress:
+                progress(style_file, outcome, error)
+
+        valid = []
+        for style_file in scan(path):
+            try:
+                with open(style_file.path, encoding='utf-8') as f:
+                    style_file.sld = f.read()
+                validate_sld(style_file.sld)
+            except (OSError, ValueError) as e:
+                report(style_file, 'invalid', e)
+                continue
+            style_file.hash = sld_hash(style_file.sld)
+            valid.append(style_file)
+        if not valid:
+            return result
+
+        gs = self.geoserver
+        existing = set(s['name'] for s in gs._listing('styles', 'style'))
+        names = [f.name for f in valid if f.name in existing]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            remote = dict(zip(names, executor.map(self._remote_hash, names)))
+
+            def upload(style_file):
+                try:
+                    if style_file.name in existing:
+                        Style(style_file.name, gs).set_sld(style_file.sld)
+                        report(style_file, 'updated')
+                    else:
+                        gs.create_style(style_file.name, style_file.sld)
+                        report(style_file, 'created')
+                except IOError as e:
+                    report(style_file, 'failed', e)
+
+            pending = []
+            for style_file in valid:
+                if remote.get(style_file.name) == style_file.hash:
+                    report(style_file, 'skipped')
+                else:
+                    pending.append(style_file)
+            list(executor.map(upload, pending))
+        return result
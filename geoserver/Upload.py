@@ -0,0 +1,181 @@
+"""
+Upload
+"""
+import os
+import zipfile
+
+SHAPEFILE = 'shp'
+GEOTIFF = 'tiff'
+SHAPEFILE_EXTENSIONS = ('.shp', '.shx', '.dbf', '.prj', '.cpg')
+GEOTIFF_EXTENSIONS = ('.tif', '.tiff')
+CHUNK_SIZE = 64 * 1024
+
+
+def file_type(path):
+    """
+    Get the type of a file to upload from its extension.
+
+    :return: Either ``shp`` or ``tiff``.
+    :rtype: string
+    :raise: :class:`ValueError` if it is neither a shapefile nor a GeoTIFF.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.shp':
+        return SHAPEFILE
+    if ext in GEOTIFF_EXTENSIONS:
+        return GEOTIFF
+    raise ValueError('Not a shapefile or GeoTIFF: ' + path)
+
+
+def shapefile_files(path):
+    """
+    Get the existing files of a shapefile (``.shp``, ``.shx``, ``.dbf``,
+    ``.prj`` and ``.cpg``).
+    """
+    stem = os.path.splitext(path)[0]
+    return [f for f in (stem + ext for ext in SHAPEFILE_EXTENSIONS)
+            if os.path.exists(f)]
+
+
+class FileStream:
+    """
+    Request body reading a file from disk in chunks.
+
+    :param path: Path of the file.
+    :param progress: Function called with the bytes sent so far and the
+      total size after every chunk.
+    """
+
+    def __init__(self, path, progress=None):
+        self._file = open(path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._sent = 0
+        self._progress = progress
+
+    def __len__(self):
+        return self._size
+
+    def read(self, size=CHUNK_SIZE):
+        data = self._file.read(size)
+        if data:
+            self._sent += len(data)
+            if self._progress:
+                self._progress(self._sent, self._size)
+        return data
+
+    def __iter__(self):
+        return iter(self.read, b'')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _Sink:
+    """Unseekable output of a zip file, drained as the zip is written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_stream(paths, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Zips files on the fly, yielding the zip file in chunks.
+
+    Files are read and compressed a chunk at a time and nothing is written to
+    disk, so memory use doesn't depend on the size of the files.
+
+    :param paths: Paths of the files to zip; they are stored by file name.
+    :param progress: Function called with the bytes yielded so far (and None
+      as the total size, which is not known in advance) after every chunk.
+    :param chunk_size: Size of the chunks read from the files.
+    :type paths: List of string
+    :type progress: callable
+    :type chunk_size: int
+    """
+    sink = _Sink()
+    sent = [0]
+
+    def drain():
+        data = sink.take()
+        if data:
+            sent[0] += len(data)
+            if progress:
+                progress(sent[0], None)
+        return data
+
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as z:
+        for path in paths:
+            large = os.path.getsize(path) >= zipfile.ZIP64_LIMIT // 2
+            with open(path, 'rb') as src, \
+                    z.open(os.path.basename(path), 'w',
+                           force_zip64=large) as dst:
+                for chunk in iter(lambda: src.read(chunk_size), b''):
+                    dst.write(chunk)
+                    data = drain()
+                    if data:
+                        yield data
+            data = drain()
+            if data:
+                yield data
+    data = drain()
+    if data:
+        yield data
+
+
+def upload(geoserver, workspace, store, path, progress=None):  # pylint: disable=too-many-arguments
+    """
+    Uploads a shapefile or GeoTIFF into a store, creating the store and its
+    layer if they don't exist.
+
+    The file is streamed from disk; shapefiles are zipped on the fly with
+    their sidecar files.
+
+    :param geoserver: GeoServer instance to upload the file to.
+    :param workspace: Name of the workspace containing the store.
+    :param store: Name of the store.
+    :param path: Path of the ``.shp`` or GeoTIFF file.
+    :param progress: Function called with the bytes sent so far and the total
+      size (None for shapefiles) as the upload goes on.
+    :type geoserver: :class:`geoserver.GeoServer`
+    :type workspace: string
+    :type store: string
+    :type path: string
+    :type progress: callable
+    :rtype: None
+    :raise: :class:`ValueError` if the file is neither a shapefile nor a
+      GeoTIFF.
+    :raise: :class:`IOError` if any error occurs while requesting the REST API.
+    """
+    base = 'workspaces/{}/'.format(workspace)
+    if file_type(path) == SHAPEFILE:
+        _put(geoserver, base + 'datastores/{}/file.shp'.format(store),
+             zip_stream(shapefile_files(path), progress), 'application/zip')
+    else:
+        with FileStream(path, progress) as data:
+            _put(geoserver,
+                 base + 'coveragestores/{}/file.geotiff'.format(store),
+                 data, 'image/tiff')
+
+
+def _put(geoserver, path, data, content_type):
+    geoserver._request(  # pylint: disable=protected-access
+        path, method='PUT', extension='', expected_code=201,
+        headers={'Content-type': content_type}, data=data)
@@ -1,19 +1,24 @@
 from geoserver.Resource import Resource
+from geoserver.Datastore import Datastore
 
 
 class Workspace(Resource):
+    __slots__ = ('namespace',)
+
     def __init__(self, name, geoserver, namespace):
         Resource.__init__(self, name, geoserver)
         self.namespace = namespace
 
     def delete(self):
-        self.geoserver._request('workspaces/' + self.name, method='DELETE')
+        return self.geoserver._request('workspaces/' + self.name, method='DELETE')
 
     def get_datastores(self):
         pass
 
     def get_datastore(self, name):
-        pass
+        # The client fetches it, so that it can be awaited with an
+        # AsyncGeoServer
+        return self.geoserver._fetch_datastore(self, name)
 
     def get_namespace(self):
         return self.namespace
@@ -1,2 +1,245 @@
 """GeoServer API package"""
 
+import os
+import sys
+
+DEFAULT_URL = 'http://localhost:8080/geoserver'
+DEFAULT_USER = 'admin'
+DEFAULT_PASSWORD = 'geoserver'
+DEFAULT_MAX_RETRIES = 3
+
+
+def add_connection_arguments(parser):
+    """
+    Adds the options to connect to the GeoServer instance, or to every node
+    of a cluster.
+
+    They default to the GEOSERVER_URL, GEOSERVER_USER and GEOSERVER_PASSWORD
+    environment variables.
+    """
+    parser.add_argument(
+        '--url', action='append',
+        help='URL of the GeoServer instance; repeat it for every node of a '
+        'cluster, the first one answering reads')
+    parser.add_argument(
+        '--quorum', type=int,
+        help='Minimum number of nodes where a change must succeed (all of '
+        'them by default)')
+    parser.add_argument(
+        '--user', default=os.environ.get('GEOSERVER_USER', DEFAULT_USER),
+        help='User for the REST API')
+    parser.add_argument(
+        '--password',
+        default=os.environ.get('GEOSERVER_PASSWORD', DEFAULT_PASSWORD),
+        help='Password for the REST API')
+    parser.add_argument(
+        '--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+        help='Number of retries of failed idempotent requests')
+    parser.add_argument(
+        '--max-in-flight', type=int,
+        help='Maximum number of concurrent requests; the limit adapts to '
+        'the latency and errors of the instance')
+    parser.add_argument(
+        '--rate', type=float,
+        help='Maximum number of requests per second')
+
+
+def add_metrics_arguments(parser):
+    """
+    Adds the options to report the requests made by a command.
+    """
+    parser.add_argument(
+        '--stats', action='store_true',
+        help='Print request statistics per endpoint after the command')
+    parser.add_argument(
+        '--metrics-file',
+        help='Write request metrics in OpenMetrics text format to a file')
+
+
+def add_listing_arguments(parser, resources, workspace=True):
+    """
+    Adds the options to filter and limit the resources listed when a
+    command runs without a subcommand.
+
+    :param resources: Name of the resources in the help, such as ``layers``.
+    :param workspace: if True, add the option to filter by workspace.
+    """
+    if workspace:
+        parser.add_argument(
+            '-w', '--workspace',
+            help='Only list the {} of this workspace'.format(resources))
+    parser.add_argument(
+        '-n', '--name', dest='pattern',
+        help='Only list the {} whose name matches this glob pattern'
+        .format(resources))
+    parser.add_argument(
+        '--limit', type=int,
+        help='Maximum number of {} to list'.format(resources))
+
+
+def print_rows(resources, columns, limit=None):
+    """
+    Prints a tab separated row for every resource as soon as it is
+    produced, stopping after ``limit`` rows.
+
+    :param resources: Iterator of resources; it's closed at the end.
+    :param columns: Function giving the values of the row of a resource.
+    """
+    try:
+        for i, resource in enumerate(resources):
+            if limit is not None and i >= limit:
+                break
+            print('\t'.join('' if v is None else str(v)
+                            for v in columns(resource)), flush=True)
+    finally:
+        close = getattr(resources, 'close', None)
+        if close:
+            close()
+
+
+def start_metrics(args):
+    """
+    Sets up the request metrics of a command if they are required by the
+    options, so that :func:`connect` reports to them.
+    """
+    args.metrics = None
+    if getattr(args, 'stats', False) or getattr(args, 'metrics_file', None):
+        from geoserver.Metrics import Metrics
+        args.metrics = Metrics()
+
+
+def report_metrics(args):
+    """
+    Prints and writes the request metrics of a command, as required by the
+    options.
+    """
+    metrics = getattr(args, 'metrics', None)
+    if metrics is None:
+        return
+    if args.stats:
+        print(metrics.summary(), file=sys.stderr)
+        governor = getattr(args, 'governor', None)
+        if governor is not None:
+            print('in-flight limit {}, peak {}, throttled {}, decreased {}'
+                  .format(governor.limit, governor.peak_in_flight,
+                          governor.throttled, governor.decreases),
+                  file=sys.stderr)
+    if args.metrics_file:
+        with open(args.metrics_file, 'w') as f:
+            f.write(metrics.openmetrics())
+
+
+class _Shared:
+    """
+    Context manager giving a long-lived client without closing it.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def __enter__(self):
+        return self.client
+
+    def __exit__(self, *args):
+        pass
+
+
+def get_urls(args):
+    """
+    Get the URLs of the GeoServer nodes given with ``--url``, or the
+    default URL.
+
+    :rtype: List of string
+    """
+    return getattr(args, 'url', None) or \
+        [os.environ.get('GEOSERVER_URL', DEFAULT_URL)]
+
+
+def _client_arguments(args, kwargs):
+    """
+    Arguments of a GeoServer client from the connection options.
+    """
+    kwargs = dict(kwargs)
+    if getattr(args, 'max_retries', 0) and 'retry' not in kwargs:
+        from geoserver.Retry import RetryPolicy
+        kwargs['retry'] = RetryPolicy(retries=args.max_retries)
+    if getattr(args, 'metrics', None) is not None:
+        kwargs.setdefault('on_request', args.metrics)
+    if (getattr(args, 'max_in_flight', None) or getattr(args, 'rate', None)) \
+            and 'governor' not in kwargs:
+        from geoserver.Governor import DEFAULT_MAX_IN_FLIGHT, Governor
+        kwargs['governor'] = Governor(
+            max_in_flight=args.max_in_flight or DEFAULT_MAX_IN_FLIGHT,
+            rate=args.rate)
+    return kwargs
+
+
+def connect(args, **kwargs):
+    """
+    Creates a GeoServer client from the connection options. With several
+    ``--url``, it connects to the first one.
+
+    Inside ``geoserver shell`` and ``geoserver batch`` it gives the client
+    shared by all the commands instead, ignoring ``kwargs``, and leaves it
+    open at the end of the ``with`` block.
+
+    :param kwargs: Other arguments for :class:`geoserver.GeoServer`.
+    """
+    if getattr(args, 'client', None) is not None:
+        return _Shared(args.client)
+    from geoserver.GeoServer import GeoServer
+    kwargs = _client_arguments(args, kwargs)
+    if 'governor' in kwargs:
+        args.governor = kwargs['governor']
+    return GeoServer(get_urls(args)[0], args.user, args.password, **kwargs)
+
+
+def connect_cluster(args, **kwargs):
+    """
+    Creates a cluster with a GeoServer client for every ``--url``, each one
+    with its own request limits, to apply changes to all of them.
+
+    Inside ``geoserver shell`` and ``geoserver batch`` it gives the cluster
+    shared by all the commands instead, and leaves it open at the end of
+    the ``with`` block. The shared client, if any, is the first node.
+
+    :param kwargs: Other arguments for every :class:`geoserver.GeoServer`.
+    """
+    if getattr(args, 'cluster', None) is not None:
+        return _Shared(args.cluster)
+    from geoserver.GeoServer import GeoServer
+    from geoserver.GeoServerCluster import GeoServerCluster
+    urls = get_urls(args)
+    client = getattr(args, 'client', None)
+    nodes = [] if client is None else [client]
+    nodes += [GeoServer(url, args.user, args.password,
+                        **_client_arguments(args, kwargs))
+              for url in urls[len(nodes):]]
+    cluster = GeoServerCluster(nodes, getattr(args, 'quorum', None))
+    return cluster if client is None or len(nodes) > 1 else _Shared(cluster)
+
+
+def change_cluster(args, change):
+    """
+    Applies a change to every node given with ``--url`` and prints a tab
+    separated row with the URL and the outcome of each one.
+
+    :param change: Function called with a
+      :class:`geoserver.GeoServerCluster.GeoServerCluster`, giving the
+      outcome in every node.
+    :raise: :class:`geoserver.GeoServerCluster.QuorumError` if the change
+      fails in more nodes than the quorum allows.
+    """
+    from geoserver.GeoServerCluster import QuorumError
+    with connect_cluster(args) as cluster:
+        result = None
+        try:
+            result = change(cluster)
+        except QuorumError as e:
+            result = e.result
+            raise
+        finally:
+            for node in result if result is not None else ():
+                print('{}\t{}'.format(node.url, 'OK' if node.ok else
+                                      'FAILED: {}'.format(node.error)),
+                      flush=True)
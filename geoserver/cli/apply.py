@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+
+import sys
+from geoserver.cli import connect
+
+HELP = 'Applies a desired state from a YAML or JSON file.'
+
+
+def configure_parser(parser):
+    parser.description = HELP
+    parser.add_argument('file', help='YAML or JSON file with the desired state')
+    parser.add_argument('--plan', action='store_true',
+                        help='Only print the changes, without applying them')
+    parser.add_argument('-j', '--workers', type=int, default=4,
+                        help='Number of concurrent requests')
+
+
+def run(args):
+    from geoserver.GeoServer import DEFAULT_POOL_SIZE
+    from geoserver.Plan import load_state, plan
+
+    def progress(action, error):
+        if error:
+            print('Failed {}: {}'.format(action, error), file=sys.stderr)
+        else:
+            print(action)
+
+    state = load_state(args.file)
+    with connect(args, pool_size=max(DEFAULT_POOL_SIZE, args.workers)) as gs:
+        changes = plan(gs, state, max_workers=args.workers)
+        if args.plan:
+            if changes:
+                print(changes)
+            print('{} changes'.format(len(changes)))
+            return
+        result = changes.execute(max_workers=args.workers, progress=progress)
+    for action in result.skipped:
+        print('Skipped {}'.format(action), file=sys.stderr)
+    print('{} applied, {} skipped, {} failed'.format(
+        len(result.done), len(result.skipped), len(result.failed)))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+
+import argparse
+import contextlib
+import shlex
+import sys
+from geoserver.cli import connect, connect_cluster, get_urls
+
+HELP = 'Runs commands from a file, one per line, with a single connection.'
+
+# Options of the batch or shell command kept by the commands it runs
+SHARED = ('url', 'quorum', 'user', 'password', 'max_retries', 'max_in_flight',
+          'rate', 'stats', 'metrics_file', 'metrics', 'governor', 'client',
+          'cluster')
+NESTED = ('batch', 'shell')
+
+
+def configure_parser(parser):
+    parser.description = HELP
+    parser.add_argument('file',
+                        help="File with a command per line ('-' for stdin)")
+    parser.add_argument('-k', '--keep-going', action='store_true',
+                        help='Run the remaining commands after a failure')
+    parser.add_argument('--coalesce-reload', action='store_true',
+                        help='Send a single reload and a single reset, if '
+                        'any command asks for them, after the last command')
+
+
+@contextlib.contextmanager
+def shared_client(args):
+    """
+    Opens the client shared by all the commands run with ``args``, with a
+    response cache so lookups stay warm from one command to the next.
+
+    With several ``--url``, the cluster used by the commands that change
+    every node is shared too, with the shared client as its first node.
+    With ``--coalesce-reload``, the reloads and resets of all the commands
+    are deferred until the end.
+    """
+    from geoserver.ResponseCache import ResponseCache
+    with contextlib.ExitStack() as stack:
+        gs = stack.enter_context(connect(args, cache=ResponseCache()))
+        args.client = gs
+        try:
+            nodes = [gs]
+            if len(get_urls(args)) > 1:
+                args.cluster = stack.enter_context(connect_cluster(args))
+                nodes = args.cluster.nodes
+            if getattr(args, 'coalesce_reload', False):
+                for node in nodes:
+                    stack.enter_context(node.deferred_reload())
+            yield gs
+        finally:
+            args.client = None
+            args.cluster = None
+
+
+def parse_command(args, line):
+    """
+    Parses a command line, keeping the connection options of ``args``.
+
+    :return: The arguments of the command, or None for blank lines,
+      comments and help requests.
+    """
+    from geoserver.cli.parser import parser
+    tokens = shlex.split(line, comments=True)
+    if not tokens:
+        return None
+    namespace = argparse.Namespace(**{k: getattr(args, k) for k in SHARED
+                                      if hasattr(args, k)})
+    try:
+        command = parser.parse_args(tokens, namespace)
+    except SystemExit as e:
+        if e.code:
+            raise ValueError('Invalid command: ' + line.strip())
+        return None
+    if command.cmd is None:
+        raise ValueError('Missing command: ' + line.strip())
+    if command.cmd in NESTED:
+        raise ValueError('Cannot run {} from {}'.format(
+            command.cmd, args.cmd))
+    return command
+
+
+def run_command(args, line):
+    """
+    Runs a command line with the shared client of ``args``.
+    """
+    from geoserver.cli.parser import actions
+    command = parse_command(args, line)
+    if command is not None:
+        actions[command.cmd].run(command)
+
+
+def run(args):
+    if args.file == '-':
+        lines = contextlib.nullcontext(sys.stdin)
+    else:
+        lines = open(args.file)
+    failed = 0
+    with lines as f, shared_client(args):
+        for number, line in enumerate(f, 1):
+            try:
+                run_command(args, line)
+            except Exception as e:  # pylint: disable=broad-except
+                failed += 1
+                print('{}:{}: {}'.format(args.file, number, e),
+                      file=sys.stderr)
+                if not args.keep_going:
+                    break
+    if failed:
+        raise ValueError('{} commands failed'.format(failed))
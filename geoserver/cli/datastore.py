@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+import sys
+from geoserver.cli import connect
+
 HELP = 'Manage datastores'
 GET = 'get'
 CREATE = 'create'
@@ -100,5 +103,35 @@ def configure_parser(parser):
     delete.add_argument('name', help='Name of the datastore')
 
 
+def _print_progress(sent, total):
+    if total:
+        msg = '\r{:.1f}% of {} bytes sent'.format(100.0 * sent / total, total)
+    else:
+        msg = '\r{} bytes sent'.format(sent)
+    print(msg, end='', file=sys.stderr)
+
+
+def _create_from_file(args):
+    if not args.file:
+        raise ValueError('A file is required')
+    from geoserver.Upload import file_type
+    if file_type(args.file) != args.datastore_type:
+        raise ValueError('Not a {}: {}'.format(
+            'shapefile' if args.datastore_type == SHP else 'GeoTIFF',
+            args.file))
+    from geoserver.Datastore import Datastore
+    with connect(args) as gs:
+        ws = gs.get_workspace(args.workspace)
+        if not ws:
+            raise ValueError('Invalid workspace: ' + (args.workspace or ''))
+        Datastore(args.name, gs, ws, args.datastore_type, None).set_file(
+            args.file, _print_progress)
+    print(file=sys.stderr)
+
+
 def run(args):
-    print(args)
+    if (args.store_cmd == CREATE and
+            args.datastore_type in (SHP, GEOTIFF)):
+        _create_from_file(args)
+    else:
+        print(args)
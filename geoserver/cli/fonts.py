@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+from geoserver.cli import connect
+
 HELP = "Show GeoServer's fonts"
 
 
@@ -9,4 +11,6 @@ def configure_parser(parser):
 
 
 def run(args):
-    print(args)
+    with connect(args) as gs:
+        for font in gs.fonts():
+            print(font)
@@ -1,13 +1,41 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+import sys
+from geoserver.cli import connect
+
 HELP = 'Imports a file or directory.'
 
 
 def configure_parser(parser):
     parser.description = HELP
     parser.add_argument('file', help='File or directory')
+    parser.add_argument('-w', '--workspace', required=True,
+                        help='Workspace for the new stores')
+    parser.add_argument('-j', '--workers', type=int, default=4,
+                        help='Number of concurrent uploads')
+    parser.add_argument('-r', '--retries', type=int, default=2,
+                        help='Number of retries for each failed file')
+    parser.add_argument('-m', '--manifest',
+                        help=('File recording the imported files, to '
+                              'resume an interrupted import'))
 
 
 def run(args):
-    print(args)
+    from geoserver.GeoServer import DEFAULT_POOL_SIZE
+    from geoserver.Importer import Importer
+
+    def progress(import_file, error):
+        if error:
+            print('Failed {}: {}'.format(import_file.path, error),
+                  file=sys.stderr)
+        else:
+            print('Imported {} as {}'.format(import_file.path,
+                                             import_file.store))
+
+    with connect(args, pool_size=max(DEFAULT_POOL_SIZE, args.workers)) as gs:
+        importer = Importer(gs, args.workspace, workers=args.workers,
+                            retries=args.retries, manifest=args.manifest)
+        result = importer.run(args.file, progress)
+    print('{} imported, {} skipped, {} failed'.format(
+        len(result.imported), len(result.skipped), len(result.failed)))
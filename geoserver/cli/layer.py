@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+from geoserver.cli import add_listing_arguments, connect, print_rows
+
 HELP = 'Manage layers'
 GET = 'get'
 CREATE = 'create'
@@ -13,6 +15,7 @@ def configure_parser(parser):
     subparsers = parser.add_subparsers(
         title='Commands', dest='layer_cmd',
         help='Get info from all layers')
+    add_listing_arguments(parser, 'layers')
 
     # Get
     get = subparsers.add_parser(
@@ -49,5 +52,17 @@ def configure_parser(parser):
     delete.add_argument('name', help='Name of the layer')
 
 
+def _columns(layer):
+    style = layer.get_default_style()
+    datastore = layer.get_datastore()
+    return (layer.get_name(), style.get_name() if style else None,
+            datastore.get_name() if datastore else None)
+
+
 def run(args):
-    print(args)
+    if args.layer_cmd is None:
+        with connect(args) as gs:
+            print_rows(gs.iter_layers(args.workspace, args.pattern),
+                       _columns, args.limit)
+    else:
+        print(args)
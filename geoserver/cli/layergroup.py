@@ -2,6 +2,7 @@
 # # -*- coding: utf-8 -*-
 
 import argparse
+from geoserver.cli import add_listing_arguments, connect, print_rows
 
 HELP = 'Manage layer groups'
 GET = 'get'
@@ -15,6 +16,7 @@ def configure_parser(parser):
     subparsers = parser.add_subparsers(
         title='Commands', dest='layer_cmd',
         help='Get info from all layer groups')
+    add_listing_arguments(parser, 'layer groups')
 
     # Get
     get = subparsers.add_parser(
@@ -55,5 +57,15 @@ def configure_parser(parser):
     delete.add_argument('name', help='Name of the layer group')
 
 
+def _columns(group):
+    return (group.get_name(),
+            ','.join(layer.get_name() for layer in group.get_layers()))
+
+
 def run(args):
-    print(args)
+    if args.layer_cmd is None:
+        with connect(args) as gs:
+            print_rows(gs.iter_layergroups(args.workspace, args.pattern),
+                       _columns, args.limit)
+    else:
+        print(args)
@@ -2,24 +2,95 @@
 # # -*- coding: utf-8 -*-
 
 import argparse
-from geoserver.cli import imports, workspace, datastore, layer, layergroup, style, reload, reset, fonts
-
-actions = {
-    'import': imports,
-    'ws': workspace,
-    'ds': datastore,
-    'layer': layer,
-    'layergroup': layergroup,
-    'style': style,
-    'reload': reload,
-    'reset': reset,
-    'fonts': fonts
+import importlib
+from collections.abc import Mapping
+from geoserver.cli import add_connection_arguments, add_metrics_arguments
+
+# Module and help of every command. Modules are only imported when their
+# command runs (or its help is shown), so the help must match their HELP.
+COMMANDS = {
+    'apply': ('geoserver.cli.apply',
+              'Applies a desired state from a YAML or JSON file.'),
+    'batch': ('geoserver.cli.batch',
+              'Runs commands from a file, one per line, with a single '
+              'connection.'),
+    'import': ('geoserver.cli.imports', 'Imports a file or directory.'),
+    'ws': ('geoserver.cli.workspace', 'Manage workspaces'),
+    'ds': ('geoserver.cli.datastore', 'Manage datastores'),
+    'layer': ('geoserver.cli.layer', 'Manage layers'),
+    'layergroup': ('geoserver.cli.layergroup', 'Manage layer groups'),
+    'style': ('geoserver.cli.style', 'Manage styles'),
+    'reload': ('geoserver.cli.reload', 'Reload GeoServer'),
+    'reset': ('geoserver.cli.reset', 'Reset GeoServer'),
+    'fonts': ('geoserver.cli.fonts', "Show GeoServer's fonts"),
+    'shell': ('geoserver.cli.shell',
+              'Runs commands interactively with a single connection.'),
+    'snapshot': ('geoserver.cli.snapshot',
+                 'Writes a snapshot of the catalog to a file.')
 }
 
+
+class Actions(Mapping):
+    """
+    Modules of the commands, imported on first access.
+    """
+
+    def __getitem__(self, key):
+        return importlib.import_module(COMMANDS[key][0])
+
+    def __iter__(self):
+        return iter(COMMANDS)
+
+    def __len__(self):
+        return len(COMMANDS)
+
+
+class LazyParser(argparse.ArgumentParser):
+    """
+    Parser of a command that adds its arguments from the command module the
+    first time it parses or formats help.
+    """
+
+    def __init__(self, *args, module=None, **kwargs):
+        argparse.ArgumentParser.__init__(self, *args, **kwargs)
+        self._module = module
+
+    def configure(self):
+        if self._module is not None:
+            module, self._module = self._module, None
+            importlib.import_module(module).configure_parser(self)
+        return self
+
+    def parse_known_args(self, args=None, namespace=None):
+        self.configure()
+        return argparse.ArgumentParser.parse_known_args(self, args, namespace)
+
+    def format_help(self):
+        self.configure()
+        return argparse.ArgumentParser.format_help(self)
+
+    def format_usage(self):
+        self.configure()
+        return argparse.ArgumentParser.format_usage(self)
+
+
+actions = Actions()
+
 parser = argparse.ArgumentParser(description='GeoServer CLI')
+add_connection_arguments(parser)
+add_metrics_arguments(parser)
+
+subparsers = parser.add_subparsers(title='Commands', dest='cmd',
+                                   parser_class=LazyParser)
+
+for key in sorted(COMMANDS):
+    subparsers.add_parser(key, help=COMMANDS[key][1], module=COMMANDS[key][0])
 
-subparsers = parser.add_subparsers(title='Commands', dest='cmd')
 
-for key in sorted(actions.keys()):
-    subparser = subparsers.add_parser(key, help=actions[key].HELP)
-    actions[key].configure_parser(subparser)
+def full_parser():
+    """
+    Get the parser with the arguments of all the commands, for the docs.
+    """
+    for subparser in subparsers.choices.values():
+        subparser.configure()
+    return parser
@@ -1,12 +1,20 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+from geoserver.cli import change_cluster
+
 HELP = 'Reload GeoServer'
 
+DEFAULT_CONCURRENCY = 1
+
 
 def configure_parser(parser):
-    parser.description = HELP
+    parser.description = HELP + ('. With several --url, the nodes reload a '
+                                 'few at a time.')
+    parser.add_argument('-c', '--concurrency', type=int,
+                        default=DEFAULT_CONCURRENCY,
+                        help='Maximum number of nodes reloading at once')
 
 
 def run(args):
-    print(args)
+    change_cluster(args, lambda cluster: cluster.reload(args.concurrency))
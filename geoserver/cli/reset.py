@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+from geoserver.cli import change_cluster
+
 HELP = 'Reset GeoServer'
 
 
@@ -9,4 +11,4 @@ def configure_parser(parser):
 
 
 def run(args):
-    print(args)
+    change_cluster(args, lambda cluster: cluster.reset())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+
+import cmd
+import sys
+from geoserver.cli import get_urls
+from geoserver.cli.batch import run_command, shared_client
+
+HELP = 'Runs commands interactively with a single connection.'
+
+
+def configure_parser(parser):
+    parser.description = HELP
+
+
+class Shell(cmd.Cmd):
+    """
+    Read-eval-print loop running the commands of the CLI, one per line.
+    """
+    prompt = 'geoserver> '
+
+    def __init__(self, args, stdin=None, stdout=None):
+        cmd.Cmd.__init__(self, stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+            self.prompt = ''
+        self.args = args
+        self.intro = ('Connected to {}. Type help for the commands and '
+                      'exit to quit.'.format(', '.join(get_urls(args))))
+
+    def default(self, line):
+        try:
+            run_command(self.args, line)
+        except Exception as e:  # pylint: disable=broad-except
+            print(e, file=sys.stderr)
+
+    def do_help(self, arg):
+        self.default(arg + ' --help' if arg else '--help')
+
+    def do_exit(self, _):
+        """Exits the shell."""
+        return True
+
+    def do_EOF(self, _):  # pylint: disable=invalid-name
+        print(file=self.stdout)
+        return True
+
+    def emptyline(self):
+        pass
+
+
+def run(args):
+    with shared_client(args):
+        Shell(args).cmdloop()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# # -*- coding: utf-8 -*-
+
+from geoserver.cli import connect
+
+HELP = 'Writes a snapshot of the catalog to a file.'
+
+
+def configure_parser(parser):
+    parser.description = HELP
+    parser.add_argument('file', help='JSON lines file for the snapshot')
+    parser.add_argument('--refresh', action='store_true',
+                        help=('Reuse the records of the existing snapshot '
+                              'for the resources that have not changed'))
+    parser.add_argument('-j', '--workers', type=int, default=8,
+                        help='Number of concurrent requests')
+
+
+def run(args):
+    from geoserver.GeoServer import DEFAULT_POOL_SIZE
+
+    with connect(args, pool_size=max(DEFAULT_POOL_SIZE, args.workers),
+                 max_workers=args.workers) as gs:
+        result = gs.snapshot(args.file, refresh=args.refresh)
+    print('{} workspaces, {} layers, {} layer groups ({} fetched)'.format(
+        result.count('workspace'), result.count('layer'),
+        result.count('layergroup'), result.fetched))
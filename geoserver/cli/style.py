@@ -1,11 +1,16 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+import sys
+from geoserver.cli import add_listing_arguments, change_cluster, connect, \
+    print_rows
+
 HELP = 'Manage styles'
 GET = 'get'
 CREATE = 'create'
 UPDATE = 'update'
 DELETE = 'delete'
+SYNC = 'sync'
 
 
 def configure_parser(parser):
@@ -13,6 +18,7 @@ def configure_parser(parser):
     subparsers = parser.add_subparsers(
         title='Commands', dest='style_cmd',
         help='Get info from all styles')
+    add_listing_arguments(parser, 'styles', workspace=False)
 
     # Get
     get = subparsers.add_parser(
@@ -42,6 +48,52 @@ def configure_parser(parser):
                                    description='Deletes a style')
     delete.add_argument('name', help='Name of the style')
 
+    # Sync
+    sync = subparsers.add_parser(
+        SYNC, help='Uploads the new and changed SLD files of a directory',
+        description=('Uploads the new and changed SLD files of a directory, '
+                     'named after the styles. Files are validated before '
+                     'any request and unchanged styles are skipped.'))
+    sync.add_argument('dir', help='Directory with the SLD files')
+    sync.add_argument('-j', '--workers', type=int, default=8,
+                      help='Number of concurrent requests')
+
+
+def _sync(args):
+    from geoserver.GeoServer import DEFAULT_POOL_SIZE
+    from geoserver.StyleSync import StyleSync
+
+    def progress(style_file, outcome, error):
+        if error:
+            print('{} {}: {}'.format(outcome.capitalize(), style_file.path,
+                                     error), file=sys.stderr)
+        else:
+            print('{} {}'.format(outcome.capitalize(), style_file.name))
+
+    with connect(args, pool_size=max(DEFAULT_POOL_SIZE, args.workers)) as gs:
+        result = StyleSync(gs, workers=args.workers).run(args.dir, progress)
+    print('{} created, {} updated, {} skipped, {} invalid, {} failed'.format(
+        len(result.created), len(result.updated), len(result.skipped),
+        len(result.invalid), len(result.failed)))
+    if result.invalid or result.failed:
+        raise ValueError('{} styles not synced'.format(
+            len(result.invalid) + len(result.failed)))
+
+
+def _create(args):
+    with open(args.file, encoding='utf-8') as f:
+        sld = f.read()
+    change_cluster(args, lambda cluster: cluster.create_style(args.name, sld))
+
 
 def run(args):
-    print(args)
+    if args.style_cmd == SYNC:
+        _sync(args)
+    elif args.style_cmd == CREATE:
+        _create(args)
+    elif args.style_cmd is None:
+        with connect(args) as gs:
+            print_rows(gs.iter_styles(args.pattern),
+                       lambda style: (style.get_name(),), args.limit)
+    else:
+        print(args)
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # # -*- coding: utf-8 -*-
 
+from geoserver.cli import add_listing_arguments, change_cluster, connect, \
+    print_rows
+
 HELP = 'Manage workspaces'
 GET = 'get'
 CREATE = 'create'
@@ -13,6 +16,7 @@ def configure_parser(parser):
     subparsers = parser.add_subparsers(
         title='Commands', dest='workspace_cmd',
         help='Get info from all workspaces')
+    add_listing_arguments(parser, 'workspaces', workspace=False)
 
     # Get
     get = subparsers.add_parser(
@@ -40,4 +44,13 @@ def configure_parser(parser):
 
 
 def run(args):
-    print(args)
+    if args.workspace_cmd is None:
+        with connect(args) as gs:
+            print_rows(gs.iter_workspaces(args.pattern),
+                       lambda ws: (ws.get_name(), ws.get_namespace()),
+                       args.limit)
+    elif args.workspace_cmd == CREATE:
+        change_cluster(args, lambda cluster: cluster.create_workspace(
+            args.name, args.namespace))
+    else:
+        print(args)
@@ -12,6 +12,7 @@ setup(
     download_url='https://github.com/geomatico/geoserver-cli/archive/0.1.0.tar.gz',
     keywords=['geomatico', 'geoserver', 'cli'],
     classifiers=[],
+    python_requires='>=3.8',
     scripts=['geoserver/cli/geoserver'],
     install_requires=[]
 )
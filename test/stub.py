@@ -0,0 +1,566 @@
+"""
+In-process stub of the GeoServer REST API.
+
+It serves the subset of endpoints used by :class:`geoserver.GeoServer` from an
+in-memory catalog and records every request and every TCP connection it
+accepts, so tests and benchmarks can run without a live GeoServer.
+"""
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = '/geoserver/rest/'
+
+
+class Catalog:
+    """
+    In-memory catalog served by :class:`StubGeoServer`.
+
+    Layers are keyed by their qualified name (``workspace:name``) and point to
+    a datastore of their workspace and to their default style.
+    """
+
+    def __init__(self):
+        self.workspaces = {}
+        self.datastores = {}
+        self.styles = {}
+        self.layers = {}
+        self.layergroups = {}
+        self.fonts = ['Arial', 'Times New Roman', 'Verdana']
+
+    def add_workspace(self, name, uri=None):
+        self.workspaces[name] = uri or 'http://' + name
+        return self
+
+    def add_datastore(self, workspace, name):
+        self.datastores[(workspace, name)] = {'type': 'Shapefile'}
+        return self
+
+    def add_coveragestore(self, workspace, name):
+        self.datastores[(workspace, name)] = {'type': 'GeoTIFF'}
+        return self
+
+    def add_style(self, name, sld=''):
+        self.styles[name] = sld
+        return self
+
+    def add_layer(self, workspace, name, datastore, style):
+        self.layers[workspace + ':' + name] = {
+            'workspace': workspace,
+            'name': name,
+            'datastore': datastore,
+            'style': style
+        }
+        return self
+
+    def add_layergroup(self, name, layers):
+        self.layergroups[name] = list(layers)
+        return self
+
+
+def synthetic_catalog(workspaces=1, layers=10, styles=1, layergroups=0,
+                      layers_per_group=5):
+    """
+    Builds a catalog with the given number of objects.
+
+    Layers are spread round-robin across workspaces and styles, and every
+    workspace has a single datastore.
+    """
+    catalog = Catalog()
+    for w in range(workspaces):
+        catalog.add_workspace('ws%d' % w)
+        catalog.add_datastore('ws%d' % w, 'ds%d' % w)
+    for s in range(styles):
+        catalog.add_style('style%d' % s)
+    names = []
+    for i in range(layers):
+        w = i % workspaces
+        catalog.add_layer('ws%d' % w, 'layer%d' % i, 'ds%d' % w,
+                          'style%d' % (i % styles))
+        names.append('ws%d:layer%d' % (w, i))
+    for g in range(layergroups):
+        members = [names[(g + j) % len(names)]
+                   for j in range(min(layers_per_group, len(names)))]
+        catalog.add_layergroup('group%d' % g, members)
+    return catalog
+
+
+def _listing(key, entries):
+    """
+    Listing of entries as GeoServer sends it: an empty string if there are
+    none and an object instead of an array if there is only one.
+    """
+    if not entries:
+        return {key: ''}
+    return {key: {key[:-1]: entries if len(entries) > 1 else entries[0]}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.stub.on_connection()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._dispatch('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._dispatch('POST')
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        self._dispatch('PUT')
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            body = self._read_chunked()
+        else:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+        stub = self.server.stub
+        path = self.path.split('?', 1)[0]
+        stub.on_request(method, path)
+        if stub.latency:
+            time.sleep(stub.latency)
+        if not path.startswith(PREFIX):
+            self._send(404)
+            return
+        path = re.sub(r'\.(json|xml)$', '', path[len(PREFIX):])
+        with stub.lock:
+            truncated = stub.truncation(path)
+        if truncated:
+            self._send_truncated()
+            return
+        with stub.lock:
+            failure = stub.failure(path)
+            code, payload = failure or stub.handle(method, path, body)
+        headers = {}
+        if failure and stub.retry_after is not None:
+            headers['Retry-After'] = str(stub.retry_after)
+        self._send(code, payload, etag=stub.etags and method == 'GET',
+                   headers=headers)
+
+    def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0], 16)
+            if not size:
+                self.rfile.readline()
+                return b''.join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _send_truncated(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self.wfile.write(b'10\r\n{"fonts"')
+        self.close_connection = True
+
+    def _send(self, code, payload=None, etag=False, headers=None):
+        if payload is None:
+            data = b''
+        elif isinstance(payload, str):
+            data = payload.encode('utf-8')
+        else:
+            data = json.dumps(payload).encode('utf-8')
+        headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        if etag and code == 200:
+            headers['ETag'] = '"{}"'.format(hashlib.md5(data).hexdigest())
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                code, data = 304, b''
+        self.send_response(code)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if self.server.stub.chunked and self.command == 'GET':
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(0, len(data), 64):
+                chunk = data[i:i + 64]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+            return
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubGeoServer:
+    """
+    Stub GeoServer REST server running on a background thread.
+
+    :param catalog: Catalog to serve; an empty one is used if not given.
+    :param etags: whether to send ETags and answer conditional requests.
+    :param latency: seconds every request waits before being answered, to
+      simulate a remote server; requests wait concurrently.
+    :param store_resets: whether single datastores can be reset, like in
+      recent GeoServer versions.
+    :param chunked: whether to send the bodies of GET responses in chunks,
+      without Content-Length, like GeoServer does for long listings.
+    :type catalog: :class:`Catalog`
+    :type etags: bool
+    :type latency: float
+    :type store_resets: bool
+    :type chunked: bool
+    """
+
+    def __init__(self, catalog=None, etags=False, latency=0,
+                 store_resets=True, chunked=False):
+        self.catalog = catalog or Catalog()
+        self.etags = etags
+        self.latency = latency
+        self.store_resets = store_resets
+        self.chunked = chunked
+        self.lock = threading.Lock()
+        self.requests = []
+        self.connections = 0
+        self.failures = []
+        self.truncated = []
+        self.retry_after = None
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://{}:{}/geoserver'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = []
+            self.connections = 0
+
+    def on_connection(self):
+        with self.lock:
+            self.connections += 1
+
+    def on_request(self, method, path):
+        with self.lock:
+            self.requests.append((method, path))
+
+    def fail(self, path, times=1, code=503):
+        """
+        Makes the next requests to a path (relative to the REST endpoint,
+        without extension) fail with the given code.
+
+        Failed responses carry a ``Retry-After`` header if
+        :attr:`retry_after` is set.
+        """
+        with self.lock:
+            self.failures.append([path, times, code])
+
+    def failure(self, path):
+        """Returns the injected failure for a path, if any."""
+        for f in self.failures:
+            if f[0] == path and f[1] > 0:
+                f[1] -= 1
+                return f[2], None
+        return None
+
+    def truncate(self, path, times=1):
+        """
+        Makes the next responses to a path (relative to the REST endpoint,
+        without extension) close the connection in the middle of a chunked
+        body.
+        """
+        with self.lock:
+            self.truncated.append([path, times])
+
+    def truncation(self, path):
+        """Tells whether the response to a path must be truncated."""
+        for t in self.truncated:
+            if t[0] == path and t[1] > 0:
+                t[1] -= 1
+                return True
+        return False
+
+    def _href(self, path):
+        return self.url + '/rest/' + path + '.json'
+
+    def handle(self, method, path, body):  # pylint: disable=too-many-return-statements,too-many-branches
+        """Returns the response code and payload for a request."""
+        c = self.catalog
+        parts = path.split('/')
+        if method == 'GET':
+            return self._handle_get(parts)
+        if method == 'POST' and parts == ['workspaces']:
+            name = json.loads(body.decode('utf-8'))['workspace']['name']
+            if name in c.workspaces:
+                return 409, None
+            c.add_workspace(name)
+            return 201, name
+        if method == 'PUT' and parts[0] == 'namespaces' and len(parts) == 2:
+            if parts[1] not in c.workspaces:
+                return 404, None
+            ns = json.loads(body.decode('utf-8'))['namespace']
+            c.workspaces[parts[1]] = ns['uri']
+            return 200, None
+        if method == 'POST' and parts == ['styles']:
+            name = json.loads(body.decode('utf-8'))['style']['name']
+            if name in c.styles:
+                return 403, None
+            c.add_style(name)
+            return 201, name
+        if method == 'PUT' and parts[0] == 'styles' and len(parts) == 2:
+            if parts[1] not in c.styles:
+                return 404, None
+            sld = body.decode('utf-8')
+            if '<StyledLayerDescriptor' not in sld:
+                return 400, None
+            c.styles[parts[1]] = sld
+            return 200, None
+        if parts[0] == 'layergroups' or (method == 'PUT' and
+                                         parts[0] == 'layers'):
+            return self._write_layers(method, parts, body)
+        if method == 'DELETE' and parts[0] == 'workspaces':
+            return self._delete_from_workspace(parts)
+        if method == 'DELETE' and len(parts) == 2:
+            collection = {'workspaces': c.workspaces, 'styles': c.styles,
+                          'layers': c.layers,
+                          'layergroups': c.layergroups}.get(parts[0])
+            if collection is None or parts[1] not in collection:
+                return 404, None
+            del collection[parts[1]]
+            return 200, None
+        if method == 'PUT' and len(parts) == 5 and parts[0] == 'workspaces':
+            return self._upload(parts, body)
+        if method == 'POST' and parts in (['reload'], ['reset']):
+            return 200, None
+        if method == 'POST' and len(parts) == 5 and parts[2] == 'datastores' \
+                and parts[4] == 'reset' and self.store_resets:
+            return (200 if (parts[1], parts[3]) in c.datastores else 404), None
+        return 405, None
+
+    def _write_layers(self, method, parts, body):
+        c = self.catalog
+        data = json.loads(body.decode('utf-8')) if body else {}
+        if method == 'PUT' and parts[0] == 'layers' and len(parts) == 2:
+            if parts[1] not in c.layers:
+                return 404, None
+            c.layers[parts[1]]['style'] = \
+                data['layer']['defaultStyle']['name']
+            return 200, None
+        if method in ('POST', 'PUT'):
+            group = data['layerGroup']
+            name = group['name'] if method == 'POST' else parts[1]
+            if (name in c.layergroups) == (method == 'POST'):
+                return (409 if method == 'POST' else 404), None
+            members = [p['name'] for p in
+                       group['publishables']['published']]
+            if any(m not in c.layers and m not in c.layergroups
+                   for m in members):
+                return 400, None
+            c.add_layergroup(name, members)
+            return (201 if method == 'POST' else 200), name
+        if method == 'DELETE' and len(parts) == 2:
+            if parts[1] not in c.layergroups:
+                return 404, None
+            del c.layergroups[parts[1]]
+            return 200, None
+        return 405, None
+
+    def _delete_from_workspace(self, parts):
+        c = self.catalog
+        ws = parts[1]
+        if len(parts) == 2:
+            if ws not in c.workspaces:
+                return 404, None
+            del c.workspaces[ws]
+            stores = [k for k in c.datastores if k[0] == ws]
+        elif len(parts) == 4 and parts[2] in ('datastores', 'coveragestores'):
+            if (ws, parts[3]) not in c.datastores:
+                return 404, None
+            stores = [(ws, parts[3])]
+        else:
+            return 405, None
+        for store in stores:
+            del c.datastores[store]
+            for name, layer in list(c.layers.items()):
+                if (layer['workspace'], layer['datastore']) == store:
+                    del c.layers[name]
+        return 200, None
+
+    def _upload(self, parts, body):
+        c = self.catalog
+        ws, kind, name, target = parts[1:]
+        if ws not in c.workspaces:
+            return 404, None
+        if kind == 'datastores' and target == 'file.shp':
+            try:
+                files = zipfile.ZipFile(io.BytesIO(body)).namelist()
+            except zipfile.BadZipFile:
+                return 400, None
+            shp = [f for f in files if f.endswith('.shp')]
+            if not shp:
+                return 400, None
+            c.add_datastore(ws, name)
+            c.add_layer(ws, shp[0][:-4], name, 'style0')
+        elif kind == 'coveragestores' and target == 'file.geotiff':
+            if not body.startswith((b'II*\x00', b'MM\x00*')):
+                return 400, None
+            c.add_coveragestore(ws, name)
+            c.add_layer(ws, name, name, 'style0')
+        else:
+            return 405, None
+        return 201, None
+
+    def _handle_get(self, parts):  # pylint: disable=too-many-return-statements
+        c = self.catalog
+        if parts == ['workspaces']:
+            return 200, _listing('workspaces', [
+                {'name': n, 'href': self._href('workspaces/' + n)}
+                for n in c.workspaces])
+        if parts == ['namespaces']:
+            return 200, _listing('namespaces', [
+                {'name': n, 'href': self._href('namespaces/' + n)}
+                for n in c.workspaces])
+        if parts == ['styles']:
+            return 200, _listing('styles', [
+                {'name': n, 'href': self._href('styles/' + n)}
+                for n in c.styles])
+        if parts == ['layers']:
+            return 200, _listing('layers', [
+                {'name': n, 'href': self._href('layers/' + n)}
+                for n in c.layers])
+        if parts == ['layergroups']:
+            return 200, _listing('layerGroups', [
+                {'name': n, 'href': self._href('layergroups/' + n)}
+                for n in c.layergroups])
+        if parts == ['fonts']:
+            return 200, {'fonts': c.fonts}
+        if len(parts) == 2 and parts[0] == 'workspaces':
+            if parts[1] not in c.workspaces:
+                return 404, None
+            return 200, {'workspace': {'name': parts[1]}}
+        if len(parts) == 2 and parts[0] == 'namespaces':
+            if parts[1] not in c.workspaces:
+                return 404, None
+            return 200, {'namespace': {'prefix': parts[1],
+                                       'uri': c.workspaces[parts[1]]}}
+        if len(parts) == 2 and parts[0] == 'styles' and \
+                parts[1].endswith('.sld'):
+            name = parts[1][:-4]
+            if name not in c.styles:
+                return 404, None
+            return 200, c.styles[name]
+        if len(parts) == 2 and parts[0] == 'styles':
+            if parts[1] not in c.styles:
+                return 404, None
+            return 200, {'style': {'name': parts[1],
+                                   'filename': parts[1] + '.sld'}}
+        if len(parts) == 2 and parts[0] == 'layers':
+            return self._get_layer(parts[1])
+        if len(parts) == 2 and parts[0] == 'layergroups':
+            if parts[1] not in c.layergroups:
+                return 404, None
+            return 200, {'layerGroup': {
+                'name': parts[1],
+                'publishables': {'published': [
+                    {'@type': 'layerGroup', 'name': n,
+                     'href': self._href('layergroups/' + n)}
+                    if n in c.layergroups else
+                    {'@type': 'layer', 'name': n,
+                     'href': self._href('layers/' + n)}
+                    for n in c.layergroups[parts[1]]]}}}
+        if len(parts) == 3 and parts[0] == 'workspaces' and \
+                parts[2] in ('datastores', 'coveragestores'):
+            return self._get_stores(parts[1], parts[2])
+        if len(parts) == 4 and parts[0] == 'workspaces' and \
+                parts[2] in ('datastores', 'coveragestores'):
+            # Like GeoServer, coverage stores are not found as datastores
+            coverage = parts[2] == 'coveragestores'
+            if self._store_kind(parts[1], parts[3]) != coverage:
+                return 404, None
+            return 200, {'coverageStore' if coverage else 'dataStore': {
+                'name': parts[3],
+                'type': c.datastores[(parts[1], parts[3])]['type'],
+                'workspace': {'name': parts[1]}}}
+        if len(parts) == 6 and parts[4] in ('featuretypes', 'coverages'):
+            coverage = parts[4] == 'coverages'
+            name = parts[1] + ':' + parts[5]
+            if name not in c.layers or \
+                    self._store_kind(parts[1], parts[3]) != coverage:
+                return 404, None
+            kind = 'coverage' if coverage else 'featureType'
+            return 200, {kind: {
+                'name': parts[5],
+                'namespace': {'name': parts[1]},
+                'store': {'@class': 'coverageStore' if coverage
+                                    else 'dataStore',
+                          'name': parts[1] + ':' + parts[3]}}}
+        return 404, None
+
+    def _store_kind(self, ws, name):
+        """True for coverage stores, False for datastores, None if absent."""
+        store = self.catalog.datastores.get((ws, name))
+        return None if store is None else store['type'] == 'GeoTIFF'
+
+    def _get_stores(self, ws, kind):
+        c = self.catalog
+        if ws not in c.workspaces:
+            return 404, None
+        coverage = kind == 'coveragestores'
+        names = [k[1] for k, v in c.datastores.items()
+                 if k[0] == ws and (v['type'] == 'GeoTIFF') == coverage]
+        key = 'coverageStores' if coverage else 'dataStores'
+        if not names:
+            # GeoServer returns an empty string for empty listings
+            return 200, {key: ''}
+        return 200, {key: {key[:-1]: [
+            {'name': n, 'href': self._href(
+                'workspaces/{}/{}/{}'.format(ws, kind, n))}
+            for n in names]}}
+
+    def _get_layer(self, name):
+        c = self.catalog
+        if ':' not in name:
+            # Like GeoServer, resolve unqualified names when they are unique
+            matches = [n for n in c.layers if n.split(':')[1] == name]
+            name = matches[0] if len(matches) == 1 else name
+        if name not in c.layers:
+            return 404, None
+        layer = c.layers[name]
+        coverage = self._store_kind(layer['workspace'], layer['datastore'])
+        resource = 'workspaces/{}/{}/{}/{}/{}'.format(
+            layer['workspace'],
+            'coveragestores' if coverage else 'datastores',
+            layer['datastore'],
+            'coverages' if coverage else 'featuretypes', layer['name'])
+        return 200, {'layer': {
+            'name': layer['name'],
+            'type': 'RASTER' if coverage else 'VECTOR',
+            'defaultStyle': {'name': layer['style'],
+                             'href': self._href('styles/' + layer['style'])},
+            'resource': {'@class': 'coverage' if coverage else 'featureType',
+                         'name': name, 'href': self._href(resource)}}}
@@ -0,0 +1,186 @@
+#pylint: disable=missing-docstring
+
+import asyncio
+import unittest
+from test.stub import Catalog, StubGeoServer, synthetic_catalog
+from geoserver.AsyncGeoServer import AsyncGeoServer
+from geoserver.Layer import Layer
+from geoserver.Retry import CircuitBreaker, RetryPolicy
+from geoserver.Style import Style
+from geoserver.Workspace import Workspace
+
+
+class AsyncGeoServerTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=20, styles=3,
+                                    layergroups=3)
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = AsyncGeoServer(self.stub.url, 'admin', 'geoserver',
+                                 max_concurrency=4)
+
+    async def asyncTearDown(self):
+        await self.gs.close()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    async def test_get_workspaces(self):
+        workspaces = await self.gs.get_workspaces()
+        self.assertEqual(['ws0', 'ws1'], [ws.get_name() for ws in workspaces])
+        self.assertEqual('http://ws1', workspaces[1].get_namespace())
+        self.assertEqual(type(workspaces[0]), Workspace)
+
+    async def test_get_workspace_non_existing(self):
+        self.assertIsNone(await self.gs.get_workspace('invalid'))
+
+    async def test_get_datastore(self):
+        ds = await self.gs.get_datastore('ds1', 'ws1')
+        self.assertEqual('ds1', ds.get_name())
+        self.assertEqual('ws1', ds.get_workspace().get_name())
+
+    async def test_workspace_get_datastore(self):
+        ws = await self.gs.get_workspace('ws1')
+        ds = await ws.get_datastore('ds1')
+        self.assertEqual('ds1', ds.get_name())
+        self.assertIs(ws, ds.get_workspace())
+        self.assertIsNone(await ws.get_datastore('invalid'))
+
+    async def test_get_layers(self):
+        layers = await self.gs.get_layers()
+        self.assertEqual(list(self.stub.catalog.layers),
+                         [layer.get_name() for layer in layers])
+        self.assertEqual(type(layers[0]), Layer)
+        self.assertEqual('style1', layers[1].get_default_style().get_name())
+        self.assertIs(layers[0].get_workspace(), layers[2].get_workspace())
+        self.assertEqual(self.gs, layers[0].get_geoserver())
+        # Same requests as the synchronous client
+        self.assertEqual(51, len(self.stub.requests))
+
+    async def test_get_layer(self):
+        layer = await self.gs.get_layer('ws0:layer0')
+        self.assertEqual('ws0:layer0', layer.get_name())
+        self.assertEqual('ds0', layer.get_datastore().get_name())
+        self.assertIsNone(await self.gs.get_layer('invalid'))
+
+    async def test_get_raster_layer(self):
+        self.stub.catalog.add_coveragestore('ws0', 'dem')
+        self.stub.catalog.add_layer('ws0', 'dem', 'dem', 'style0')
+        layer = await self.gs.get_layer('ws0:dem')
+        self.assertEqual('dem', layer.get_datastore().get_name())
+
+    async def test_get_layergroups(self):
+        groups = await self.gs.get_layergroups()
+        self.assertEqual(['group0', 'group1', 'group2'],
+                         [group.get_name() for group in groups])
+        self.assertEqual(self.stub.catalog.layergroups['group2'],
+                         [l.get_name() for l in groups[2].get_layers()])
+
+    async def test_get_layergroups_nested(self):
+        self.stub.catalog.add_layergroup('outer', ['group0', 'group1'])
+        groups = {g.get_name(): g for g in await self.gs.get_layergroups()}
+        outer = groups['outer'].get_layers()
+        self.assertIs(groups['group0'], outer[0])
+        self.assertIs(outer[0].get_layers()[1], outer[1].get_layers()[0])
+
+        self.stub.catalog.add_layergroup('group0', ['outer'])
+        with self.assertRaisesRegex(ValueError, 'Cycle'):
+            await self.gs.get_layergroup('outer')
+
+    async def test_get_styles(self):
+        styles = await self.gs.get_styles()
+        self.assertEqual(['style0', 'style1', 'style2'],
+                         [style.get_name() for style in styles])
+        self.assertIsNone(await self.gs.get_style('invalid'))
+
+    async def test_create_workspace(self):
+        await self.gs.create_workspace('new', 'http://geomati.co')
+        ws = await self.gs.get_workspace('new')
+        self.assertEqual('http://geomati.co', ws.get_namespace())
+        await ws.delete()
+        self.assertIsNone(await self.gs.get_workspace('new'))
+
+    async def test_create_style(self):
+        with open('test/sample.sld') as f:
+            sld = f.read()
+        await self.gs.create_style('new_style', sld)
+        style = await self.gs.get_style('new_style')
+        self.assertEqual(type(style), Style)
+        await style.delete()
+
+    async def test_create_style_invalid_sld(self):
+        with open('test/invalid.sld') as f:
+            sld = f.read()
+        with self.assertRaises(IOError):
+            await self.gs.create_style('new_style', sld)
+        self.assertIsNone(await self.gs.get_style('new_style'))
+
+    async def test_reload_reset_fonts(self):
+        await self.gs.reload()
+        await self.gs.reset()
+        self.assertTrue('Arial' in await self.gs.fonts())
+
+    async def test_connection_error(self):
+        gs = AsyncGeoServer('http://127.0.0.1:1/geoserver', 'admin', 'pass')
+        try:
+            with self.assertRaises(IOError):
+                await gs.fonts()
+        finally:
+            await gs.close()
+
+
+    async def test_retried(self):
+        self.gs.retry = RetryPolicy(retries=2, backoff=0)
+        self.stub.fail('fonts', times=2)
+        self.assertEqual(3, len(await self.gs.fonts()))
+        self.assertEqual(2, self.gs.retry.retried)
+
+    async def test_circuit_breaker(self):
+        self.gs.circuit_breaker = CircuitBreaker(failure_threshold=1)
+        self.stub.fail('fonts', times=1, code=500)
+        with self.assertRaises(IOError):
+            await self.gs.fonts()
+        with self.assertRaises(IOError):
+            await self.gs.get_styles()
+        self.assertEqual(1, len(self.stub.requests))
+        self.assertEqual(1, self.gs.circuit_breaker.rejected)
+
+    async def test_circuit_breaker_cancelled(self):
+        self.gs.circuit_breaker = CircuitBreaker(failure_threshold=1,
+                                                 reset_timeout=0)
+        self.stub.fail('fonts', times=1, code=500)
+        with self.assertRaises(IOError):
+            await self.gs.fonts()
+        self.stub.latency = 0.2
+        task = asyncio.ensure_future(self.gs.fonts())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(2, self.gs.circuit_breaker.failures)
+        self.stub.latency = 0
+        self.assertEqual(3, len(await self.gs.fonts()))
+        self.assertEqual('closed', self.gs.circuit_breaker.state)
+
+
+class AsyncGeoServerListingTestCase(unittest.IsolatedAsyncioTestCase):
+    async def listings(self, catalog):
+        with StubGeoServer(catalog) as stub:
+            gs = AsyncGeoServer(stub.url, 'admin', 'geoserver')
+            try:
+                return [[r.get_name() for r in await listing()]
+                        for listing in (gs.get_workspaces, gs.get_layers,
+                                        gs.get_layergroups, gs.get_styles)]
+            finally:
+                await gs.close()
+
+    async def test_empty(self):
+        self.assertEqual([[], [], [], []], await self.listings(Catalog()))
+
+    async def test_single_entry(self):
+        catalog = synthetic_catalog(layers=1, layergroups=1)
+        self.assertEqual([['ws0'], ['ws0:layer0'], ['group0'], ['style0']],
+                         await self.listings(catalog))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+#pylint: disable=missing-docstring
+
+import os
+import shutil
+import tempfile
+import unittest
+from geoserver.DataDirCatalog import DataDirCatalog
+from geoserver.Layer import Layer
+from geoserver.Workspace import Workspace
+
+DATA_DIR = 'test/geoserver_data_dir'
+
+
+class DataDirCatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.catalog = DataDirCatalog(DATA_DIR)
+
+    def test_get_workspaces(self):
+        names = [ws.get_name() for ws in self.catalog.get_workspaces()]
+        self.assertEqual(['cite', 'it.geosolutions', 'nurc', 'sde', 'sf',
+                          'tiger', 'topp'], names)
+
+    def test_get_workspace_existing(self):
+        ws = self.catalog.get_workspace('tiger')
+        self.assertEqual(type(ws), Workspace)
+        self.assertEqual('http://www.census.gov', ws.get_namespace())
+        self.assertEqual(self.catalog, ws.get_geoserver())
+
+    def test_get_workspace_non_existing(self):
+        self.assertIsNone(self.catalog.get_workspace('invalid'))
+        self.assertIsNone(self.catalog.get_workspace(None))
+
+    def test_get_datastores(self):
+        names = [ds.get_name() for ds in self.catalog.get_datastores('nurc')]
+        self.assertEqual(['arcGridSample', 'img_sample2', 'mosaic',
+                          'worldImageSample'], names)
+        self.assertRaises(ValueError, self.catalog.get_datastores, 'invalid')
+
+    def test_get_datastore(self):
+        ds = self.catalog.get_datastore('nyc', 'tiger')
+        self.assertEqual('nyc', ds.get_name())
+        self.assertIs(self.catalog.get_workspace('tiger'),
+                      ds.get_workspace())
+        self.assertIsNone(self.catalog.get_datastore('invalid', 'tiger'))
+
+    def test_get_layers(self):
+        names = set(l.get_name() for l in self.catalog.get_layers())
+        expected = set(['sf:sfdem', 'nurc:Img_Sample', 'tiger:tiger_roads',
+                        'sf:restricted', 'topp:tasmania_cities',
+                        'tiger:giant_polygon',
+                        'topp:tasmania_state_boundaries',
+                        'sf:archsites', 'tiger:poi', 'nurc:Arc_Sample',
+                        'topp:states', 'tiger:poly_landmarks',
+                        'topp:tasmania_water_bodies', 'sf:bugsites',
+                        'nurc:Pk50095', 'topp:tasmania_roads', 'sf:roads',
+                        'nurc:mosaic', 'sf:streams'])
+        self.assertEqual(expected, names)
+
+    def test_get_layer_existing(self):
+        layer = self.catalog.get_layer('tiger:tiger_roads')
+        self.assertEqual(type(layer), Layer)
+        self.assertEqual('tiger_roads', layer.get_default_style().get_name())
+        self.assertEqual('nyc', layer.get_datastore().get_name())
+        self.assertEqual('tiger', layer.get_workspace().get_name())
+
+    def test_get_layer_non_existing(self):
+        self.assertIsNone(self.catalog.get_layer('invalid'))
+
+    def test_get_layergroups(self):
+        names = [g.get_name() for g in self.catalog.get_layergroups()]
+        self.assertEqual(['spearfish', 'tasmania', 'tiger-ny'], names)
+
+    def test_get_layergroup_existing(self):
+        group = self.catalog.get_layergroup('spearfish')
+        names = set(l.get_name() for l in group.get_layers())
+        expected = set(['sf:sfdem', 'sf:streams', 'sf:roads', 'sf:restricted',
+                        'sf:archsites', 'sf:bugsites'])
+        self.assertEqual(expected, names)
+        self.assertIs(self.catalog.get_layer('sf:roads'),
+                      next(l for l in group.get_layers()
+                           if l.get_name() == 'sf:roads'))
+
+    def test_get_styles(self):
+        names = set(s.get_name() for s in self.catalog.get_styles())
+        expected = set(['burg', 'capitals', 'cite_lakes', 'dem', 'generic',
+                        'giant_polygon', 'grass', 'green', 'line', 'poi',
+                        'point', 'poly_landmarks', 'polygon', 'pophatch',
+                        'population', 'rain', 'raster', 'restricted',
+                        'simple_roads', 'simple_streams', 'tiger_roads'])
+        self.assertEqual(expected, names)
+        self.assertEqual('burg', self.catalog.get_style('burg').get_name())
+        self.assertIsNone(self.catalog.get_style('invalid'))
+
+    def test_parallel(self):
+        catalog = DataDirCatalog(DATA_DIR, processes=2, parallel_threshold=1)
+        self.assertEqual([l.get_name() for l in self.catalog.get_layers()],
+                         [l.get_name() for l in catalog.get_layers()])
+
+    def test_reload(self):
+        ws = self.catalog.get_workspace('tiger')
+        self.assertIs(ws, self.catalog.get_workspace('tiger'))
+        self.catalog.reload()
+        self.assertIsNot(ws, self.catalog.get_workspace('tiger'))
+
+
+class ScopedDataDirCatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.write('workspaces/ws/workspace.xml',
+                   '<workspace><id>ws</id><name>ws</name></workspace>')
+        self.write('styles/line.xml',
+                   '<style><id>s1</id><name>line</name></style>')
+        self.write('workspaces/ws/styles/line.xml',
+                   '<style><id>s2</id><name>line</name>'
+                   '<workspace><id>ws</id></workspace></style>')
+        self.write('layergroups/group.xml',
+                   '<layerGroup><id>g1</id><name>group</name><publishables>'
+                   '<published type="layerGroup"><id>g2</id></published>'
+                   '</publishables></layerGroup>')
+        self.write('workspaces/ws/layergroups/group.xml',
+                   '<layerGroup><id>g2</id><name>group</name>'
+                   '<workspace><id>ws</id></workspace></layerGroup>')
+        self.catalog = DataDirCatalog(self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, path, xml):
+        path = os.path.join(self.dir, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(xml)
+
+    def test_scoped_styles(self):
+        styles = self.catalog.get_styles()
+        self.assertEqual(['line', 'line'], [s.get_name() for s in styles])
+        self.assertIs(styles[0], self.catalog.get_style('line'))
+        self.assertIs(styles[1], self.catalog.get_style('line', 'ws'))
+        self.assertIsNone(self.catalog.get_style('line', 'invalid'))
+
+    def test_nested_layergroups(self):
+        self.assertEqual(2, len(self.catalog.get_layergroups()))
+        group = self.catalog.get_layergroup('group')
+        nested = self.catalog.get_layergroup('group', 'ws')
+        self.assertIsNot(group, nested)
+        self.assertEqual([nested], group.get_layers())
+        self.assertEqual([], nested.get_layers())
+
+    def test_layergroup_cycle(self):
+        self.write('workspaces/ws/layergroups/group.xml',
+                   '<layerGroup><id>g2</id><name>group</name><publishables>'
+                   '<published type="layerGroup"><id>g1</id></published>'
+                   '</publishables></layerGroup>')
+        self.assertRaises(ValueError, self.catalog.get_layergroups)
+
+    def test_corrupt_file(self):
+        self.write('workspaces/ws/ds/roads/layer.xml', '<layer><id>l1</id>')
+        with self.assertRaises(IOError) as cm:
+            self.catalog.get_layers()
+        self.assertIn(os.path.join(self.dir, 'workspaces', 'ws', 'ds', 'roads',
+                                   'layer.xml'), str(cm.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
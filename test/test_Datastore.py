@@ -1,8 +1,29 @@
+import os
+import shutil
+import tempfile
 import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.GeoServer import GeoServer
 from geoserver.Style import Style
 
 
 class LayerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.stub = StubGeoServer(synthetic_catalog(layers=0)).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+        shutil.rmtree(self.dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
     def test_get_geoserver(self):
         pass
 
@@ -43,19 +64,38 @@ class LayerTestCase(unittest.TestCase):
         pass
 
     def test_set_file_shp(self):
-        pass
+        shp = self.write('roads.shp', b'shp')
+        self.write('roads.dbf', b'dbf')
+        sent = []
+        ds = self.gs.get_datastore('ds0', 'ws0')
+        ds.set_file(shp, lambda s, t: sent.append(s))
+        self.assertTrue(sent)
+        self.assertTrue('ws0:roads' in self.stub.catalog.layers)
 
     def test_set_file_shp_invalid(self):
-        pass
+        shp = self.write('roads.shp', b'shp')
+        ds = self.gs.get_workspace('ws0').get_datastore('ds0')
+        self.stub.fail('workspaces/ws0/datastores/ds0/file.shp', code=400)
+        self.assertRaises(IOError, ds.set_file, shp)
 
     def test_set_file_geotiff(self):
-        pass
+        tiff = self.write('dem.tif', b'II*\x00' + b'0' * 100000)
+        sent = []
+        ds = self.gs.get_datastore('ds0', 'ws0')
+        ds.set_file(tiff, lambda s, t: sent.append((s, t)))
+        self.assertEqual((100004, 100004), sent[-1])
+        store = self.stub.catalog.datastores[('ws0', 'ds0')]
+        self.assertEqual('GeoTIFF', store['type'])
 
     def test_set_file_geotiff_invalid(self):
-        pass
+        tiff = self.write('dem.tif', b'not a tiff')
+        ds = self.gs.get_datastore('ds0', 'ws0')
+        self.assertRaises(IOError, ds.set_file, tiff)
 
     def test_set_file_not_shp_or_geotiff(self):
-        pass
+        ds = self.gs.get_datastore('ds0', 'ws0')
+        self.assertRaises(ValueError, ds.set_file,
+                          self.write('roads.csv', b'a,b'))
 
     def test_create_layer(self):
         pass
@@ -1,8 +1,18 @@
 #pylint: disable=too-many-public-methods,missing-docstring
 
+import io
+import socket
+import threading
+import time
 import unittest
+import zipfile
+import requests
 from test.utils import GEOSERVER_URL
-from geoserver.GeoServer import GeoServer
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.GeoServer import GeoServer, _DeferredReload
+from geoserver.Layer import LazyLayer
+from geoserver.ResponseCache import ResponseCache
+from geoserver.Retry import CircuitBreaker, RetryPolicy
 from geoserver.Workspace import Workspace
 from geoserver.Style import Style
 
@@ -193,5 +203,614 @@ class GeoServerTestCase(unittest.TestCase):
         self.assertTrue('Verdana' in fonts)
 
 
+class GeoServerConnectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubGeoServer(synthetic_catalog(layers=20)).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def test_connection_reused(self):
+        layers = self.gs.get_layers()
+        self.assertEqual(20, len(layers))
+        self.assertTrue(len(self.stub.requests) > 20)
+        self.assertEqual(1, self.stub.connections)
+
+    def test_close(self):
+        self.gs.fonts()
+        self.gs.close()
+        self.gs.fonts()
+        self.assertEqual(2, self.stub.connections)
+
+    def test_context_manager(self):
+        with GeoServer(self.stub.url, 'admin', 'geoserver') as gs:
+            self.assertEqual(['Arial', 'Times New Roman', 'Verdana'],
+                             gs.fonts())
+        self.assertEqual(1, self.stub.connections)
+
+    def test_latency(self):
+        self.stub.latency = 0.05
+        start = time.perf_counter()
+        self.gs.fonts()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_timeout(self):
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        url = 'http://127.0.0.1:%d/geoserver' % server.getsockname()[1]
+        try:
+            with GeoServer(url, 'admin', 'geoserver', timeout=0.2) as gs:
+                self.assertRaises(IOError, gs.fonts)
+        finally:
+            server.close()
+
+
+class GeoServerConcurrencyTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=20, layergroups=4)
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver',
+                            max_workers=4)
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def test_get_layers_keeps_order(self):
+        names = [layer.get_name() for layer in self.gs.get_layers()]
+        self.assertEqual(list(self.stub.catalog.layers), names)
+
+    def test_get_layergroups_keeps_order(self):
+        groups = self.gs.get_layergroups()
+        self.assertEqual(list(self.stub.catalog.layergroups),
+                         [group.get_name() for group in groups])
+        self.assertEqual(self.stub.catalog.layergroups['group1'],
+                         [l.get_name() for l in groups[1].get_layers()])
+
+    def test_get_layers_concurrently(self):
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+        hydrate = self.gs._layer_from_json
+
+        def slow_hydrate(layer):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return hydrate(layer)
+
+        self.gs._layer_from_json = slow_hydrate
+        self.assertEqual(20, len(self.gs.get_layers()))
+        self.assertEqual(4, peak[0])
+
+    def test_get_layers_first_error(self):
+        hydrate = self.gs._layer_from_json
+
+        def failing_hydrate(layer):
+            if layer['name'] == 'ws1:layer3':
+                time.sleep(0.1)
+                raise ValueError('layer3')
+            if layer['name'] == 'ws1:layer7':
+                raise ValueError('layer7')
+            return hydrate(layer)
+
+        self.gs._layer_from_json = failing_hydrate
+        self.assertRaisesRegex(ValueError, 'layer3', self.gs.get_layers)
+
+
+class GeoServerSessionTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=20, styles=3,
+                                    layergroups=4)
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def requests_to(self, prefix):
+        prefix = '/geoserver/rest/' + prefix
+        return [r for r in self.stub.requests if r[1].startswith(prefix)]
+
+    def test_get_raster_layer(self):
+        self.stub.catalog.add_coveragestore('ws0', 'dem')
+        self.stub.catalog.add_layer('ws0', 'dem', 'dem', 'style0')
+        layer = self.gs.get_layer('ws0:dem')
+        self.assertEqual('dem', layer.get_datastore().get_name())
+        self.assertEqual('GeoTIFF', layer.get_datastore().type)
+        self.assertEqual([], self.requests_to('workspaces/ws0/datastores'))
+
+    def test_get_layers_request_count(self):
+        layers = self.gs.get_layers()
+        # listing + 20 layers + 20 feature types + 3 styles +
+        # 2 workspaces + namespaces + 2 namespaces + 2 datastores
+        self.assertEqual(51, len(self.stub.requests))
+        self.assertEqual(1, len(self.requests_to('workspaces/ws0.json')))
+        self.assertEqual(1, len(self.requests_to('namespaces.json')))
+
+        self.assertIs(layers[0].get_workspace(), layers[2].get_workspace())
+        self.assertIs(layers[0].get_datastore(), layers[2].get_datastore())
+        self.assertIs(layers[0].get_default_style(),
+                      layers[3].get_default_style())
+        self.assertEqual('ds0', layers[0].get_datastore().get_name())
+
+    def test_get_layers_concurrent_request_count(self):
+        gs = GeoServer(self.stub.url, 'admin', 'geoserver', max_workers=8)
+        with gs:
+            gs.get_layers()
+        self.assertEqual(51, len(self.stub.requests))
+
+    def test_get_layergroups_request_count(self):
+        groups = self.gs.get_layergroups()
+        # listing + 4 groups + 8 distinct layers + 8 feature types
+        # + 3 styles + 2 workspaces + namespaces + 2 namespaces
+        # + 2 datastores
+        self.assertEqual(4, len(groups))
+        self.assertEqual(31, len(self.stub.requests))
+        self.assertIs(groups[0].get_layers()[1], groups[1].get_layers()[0])
+        self.assertIs(groups[0].get_layers()[0].get_workspace(),
+                      groups[2].get_layers()[0].get_workspace())
+
+    def test_get_layergroups_nested(self):
+        catalog = self.stub.catalog
+        catalog.add_layergroup('inner', ['group0', 'ws0:layer0'])
+        catalog.add_layergroup('outer', ['inner', 'group0'])
+        groups = {g.get_name(): g for g in self.gs.get_layergroups()}
+
+        inner = groups['inner'].get_layers()
+        self.assertIs(groups['group0'], inner[0])
+        self.assertIs(groups['inner'], groups['outer'].get_layers()[0])
+        self.assertIs(groups['group0'], groups['outer'].get_layers()[1])
+        self.assertIs(groups['group0'].get_layers()[0], inner[1])
+        for name in catalog.layergroups:
+            self.assertEqual(1, len(self.requests_to(
+                'layergroups/' + name + '.json')))
+        self.assertEqual(31 + 2, len(self.stub.requests))
+
+    def test_get_layergroup_nested(self):
+        self.stub.catalog.add_layergroup('outer', ['group1', 'group2'])
+        group = self.gs.get_layergroup('outer')
+        self.assertEqual(['group1', 'group2'],
+                         [g.get_name() for g in group.get_layers()])
+        self.assertIs(group.get_layers()[0].get_layers()[1],
+                      group.get_layers()[1].get_layers()[0])
+
+    def test_get_layergroups_cycle(self):
+        catalog = self.stub.catalog
+        catalog.add_layergroup('a', ['ws0:layer0'])
+        catalog.add_layergroup('b', ['a'])
+        catalog.add_layergroup('a', ['b'])
+        self.assertRaisesRegex(ValueError, 'a > b > a',
+                               self.gs.get_layergroups)
+        self.assertRaisesRegex(ValueError, 'b > a > b',
+                               self.gs.get_layergroup, 'b')
+
+    def test_session(self):
+        with self.gs.session():
+            ws = self.gs.get_workspace('ws0')
+            self.assertIs(ws, self.gs.get_workspace('ws0'))
+            self.assertIs(self.gs.get_style('style0'),
+                          self.gs.get_style('style0'))
+        self.assertEqual(4, len(self.stub.requests))
+        self.assertIsNot(ws, self.gs.get_workspace('ws0'))
+
+    def test_session_nested(self):
+        with self.gs.session():
+            style = self.gs.get_style('style0')
+            with self.gs.session():
+                self.assertIs(style, self.gs.get_style('style0'))
+            self.assertIs(style, self.gs.get_style('style0'))
+        self.assertEqual(1, len(self.stub.requests))
+
+    def test_no_session(self):
+        self.gs.get_style('style0')
+        self.gs.get_style('style0')
+        self.assertEqual(2, len(self.stub.requests))
+
+    def test_session_missing_resources(self):
+        with self.gs.session():
+            self.assertIsNone(self.gs.get_workspace('invalid'))
+            self.assertIsNone(self.gs.get_workspace('invalid'))
+        self.assertEqual(1, len(self.stub.requests))
+
+
+class GeoServerLazyTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=50, styles=3,
+                                    layergroups=2)
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver', lazy=True)
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def test_get_layers_names_only(self):
+        layers = self.gs.get_layers()
+        self.assertEqual(list(self.stub.catalog.layers),
+                         [layer.get_name() for layer in layers])
+        self.assertEqual(type(layers[0]), LazyLayer)
+        self.assertEqual(1, len(self.stub.requests))
+
+    def test_get_raster_datastore(self):
+        self.stub.catalog.add_coveragestore('ws0', 'dem')
+        self.stub.catalog.add_layer('ws0', 'dem', 'dem', 'style0')
+        layer = self.gs.get_layers()[-1]
+        self.assertEqual(type(layer), LazyLayer)
+        self.assertEqual('dem', layer.get_datastore().get_name())
+
+    def test_get_default_style(self):
+        layer = self.gs.get_layers()[4]
+        self.assertEqual('style1', layer.get_default_style().get_name())
+        self.assertIs(layer.get_default_style(), layer.get_default_style())
+        self.assertEqual(3, len(self.stub.requests))
+
+    def test_set_default_style(self):
+        layer = self.gs.get_layers()[0]
+        style = self.gs.get_style('style2')
+        layer.set_default_style(style)
+        self.assertIs(style, layer.get_default_style())
+        self.assertEqual(2, len(self.stub.requests))
+
+    def test_get_workspace_and_datastore(self):
+        layer = self.gs.get_layers()[1]
+        self.assertEqual('ws1', layer.get_workspace().get_name())
+        self.assertEqual('http://ws1', layer.get_workspace().get_namespace())
+        self.assertEqual('ds1', layer.get_datastore().get_name())
+        self.assertIs(layer.get_workspace(),
+                      layer.get_datastore().get_workspace())
+        # listing + workspace + namespaces + namespace
+        # + layer + feature type + datastore
+        self.assertEqual(7, len(self.stub.requests))
+
+    def test_shared_in_session(self):
+        with self.gs.session():
+            layers = self.gs.get_layers()
+            styles = set(map(lambda l: l.get_default_style(), layers))
+        self.assertEqual(3, len(styles))
+        self.assertEqual(1 + 50 + 3, len(self.stub.requests))
+
+    def test_shared_by_listing(self):
+        layers = self.gs.get_layers()
+        self.assertEqual(3, len(set(map(id, (l.get_default_style()
+                                              for l in layers)))))
+        self.assertIs(layers[0].get_datastore(), layers[2].get_datastore())
+        self.assertIs(layers[0].get_workspace(),
+                      layers[2].get_datastore().get_workspace())
+        # listing + 50 layers + 3 styles + workspace + namespaces
+        # + namespace + 2 feature types + datastore
+        self.assertEqual(60, len(self.stub.requests))
+
+    def test_slots(self):
+        layer = self.gs.get_layers()[0]
+        self.assertFalse(hasattr(layer, '__dict__'))
+        self.assertFalse(hasattr(layer.get_default_style(), '__dict__'))
+        self.assertFalse(hasattr(layer.get_workspace(), '__dict__'))
+        self.assertFalse(hasattr(layer.get_datastore(), '__dict__'))
+
+    def test_get_layergroups(self):
+        groups = self.gs.get_layergroups()
+        self.assertEqual(1, len(self.stub.requests))
+        names = [layer.get_name() for layer in groups[1].get_layers()]
+        self.assertEqual(self.stub.catalog.layergroups['group1'], names)
+        self.assertIs(groups[1].get_layers(), groups[1].get_layers())
+        self.assertEqual(2, len(self.stub.requests))
+
+
+class GeoServerIterTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=40, styles=3,
+                                    layergroups=4)
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver',
+                            max_workers=4)
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def requests_to(self, prefix):
+        prefix = '/geoserver/rest/' + prefix
+        return [r for r in self.stub.requests if r[1].startswith(prefix)]
+
+    def test_iter_layers(self):
+        names = [layer.get_name() for layer in self.gs.iter_layers()]
+        self.assertEqual(list(self.stub.catalog.layers), names)
+
+    def test_iter_layers_filtered_before_hydration(self):
+        layers = list(self.gs.iter_layers(workspace='ws1', name='layer1*'))
+        self.assertEqual(['ws1:layer1', 'ws1:layer11', 'ws1:layer13',
+                          'ws1:layer15', 'ws1:layer17', 'ws1:layer19'],
+                         [layer.get_name() for layer in layers])
+        self.assertEqual(6, len(self.requests_to('layers/')))
+        self.assertEqual([], self.requests_to('workspaces/ws0'))
+        self.assertEqual(['ws1:layer33'], [l.get_name() for l in
+                                           self.gs.iter_layers(name='ws1:*33')])
+
+    def test_iter_layers_closed_early(self):
+        layers = self.gs.iter_layers()
+        self.assertEqual('ws0:layer0', next(layers).get_name())
+        layers.close()
+        # at most twice the workers are hydrated ahead
+        self.assertLessEqual(len(self.requests_to('layers/')), 8)
+        self.assertIsNone(self.gs._identity_map)
+
+    def test_iter_layers_empty(self):
+        self.stub.catalog.layers.clear()
+        self.assertEqual([], list(self.gs.iter_layers()))
+
+    def test_iter_layergroups(self):
+        self.stub.catalog.add_layergroup('outer', ['group0', 'group1'])
+        groups = list(self.gs.iter_layergroups(name='*r'))
+        self.assertEqual(['outer'], [g.get_name() for g in groups])
+        self.assertEqual(['group0', 'group1'],
+                         [g.get_name() for g in groups[0].get_layers()])
+        self.assertEqual([], self.requests_to('layergroups/group2'))
+
+    def test_iter_styles_and_workspaces(self):
+        self.assertEqual(['style1'], [s.get_name() for s in
+                                      self.gs.iter_styles(name='*1')])
+        workspaces = list(self.gs.iter_workspaces(name='ws?'))
+        self.assertEqual(['http://ws0', 'http://ws1'],
+                         [ws.get_namespace() for ws in workspaces])
+
+
+class GeoServerCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=4, styles=2)
+        self.stub = StubGeoServer(catalog, etags=True).start()
+        self.cache = ResponseCache(ttl={'styles': 0})
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver',
+                            cache=self.cache)
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def test_cached(self):
+        ws = self.gs.get_workspace('ws0')
+        self.assertEqual('http://ws0', ws.get_namespace())
+        self.assertEqual(3, len(self.stub.requests))
+        self.assertEqual('http://ws0',
+                         self.gs.get_workspace('ws0').get_namespace())
+        self.assertEqual(3, len(self.stub.requests))
+
+    def test_revalidated(self):
+        self.assertEqual('style0', self.gs.get_style('style0').get_name())
+        self.assertEqual('style0', self.gs.get_style('style0').get_name())
+        self.assertEqual(2, len(self.stub.requests))
+        self.assertEqual(1, self.cache.revalidations)
+
+    def test_invalidated_by_changes(self):
+        self.gs.get_workspaces()
+        self.gs.create_workspace('new', 'http://geomati.co')
+        names = [ws.get_name() for ws in self.gs.get_workspaces()]
+        self.assertEqual(['ws0', 'ws1', 'new'], names)
+        self.gs.get_workspace('new').delete()
+        self.assertIsNone(self.gs.get_workspace('new'))
+        names = [ws.get_name() for ws in self.gs.get_workspaces()]
+        self.assertEqual(['ws0', 'ws1'], names)
+
+    def test_invalidated_by_reload(self):
+        self.gs.fonts()
+        self.gs.reload()
+        self.gs.fonts()
+        self.gs.reset()
+        self.gs.fonts()
+        self.assertEqual(5, len(self.stub.requests))
+
+    def test_not_found_not_cached(self):
+        self.assertIsNone(self.gs.get_workspace('invalid'))
+        self.assertIsNone(self.gs.get_workspace('invalid'))
+        self.assertEqual(2, len(self.stub.requests))
+
+
+class GeoServerDeferredReloadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubGeoServer(synthetic_catalog(styles=2)).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def posts(self):
+        return [path[len('/geoserver/rest/'):] for method, path in
+                self.stub.requests if method == 'POST']
+
+    def upload(self, store):
+        data = io.BytesIO()
+        with zipfile.ZipFile(data, 'w') as f:
+            f.writestr(store + '.shp', b'')
+        self.gs._request('workspaces/ws0/datastores/{}/file.shp'.format(store),
+                         method='PUT', extension='', expected_code=201,
+                         data=data.getvalue())
+
+    def test_coalesced(self):
+        with self.gs.deferred_reload():
+            for _ in range(3):
+                self.gs.reload()
+                self.gs.reset()
+            with self.gs.deferred_reload():
+                self.gs.reload()
+            self.assertEqual([], self.stub.requests)
+        self.assertEqual(['reload.json', 'reset.json'], self.posts())
+
+    def test_nothing_requested(self):
+        with self.gs.deferred_reload():
+            self.upload('roads')
+        self.assertEqual([], self.posts())
+
+    def test_datastore_resets(self):
+        with self.gs.deferred_reload():
+            self.upload('roads')
+            self.gs.reset()
+            self.upload('rivers')
+            self.gs.get_style('style0').set_sld('<StyledLayerDescriptor/>')
+            self.gs.reset()
+        self.assertEqual(['workspaces/ws0/datastores/rivers/reset.json',
+                          'workspaces/ws0/datastores/roads/reset.json'],
+                         self.posts())
+
+    def test_dotted_datastore(self):
+        with self.gs.deferred_reload():
+            self.upload('my.roads')
+            self.gs.reset()
+        self.assertEqual(['workspaces/ws0/datastores/my.roads/reset.json'],
+                         self.posts())
+
+        deferred = _DeferredReload()
+        for path in ('workspaces/ws/datastores/my.store.json',
+                     'workspaces/ws/datastores/my.store.xml',
+                     'workspaces/ws/datastores/my.store/featuretypes/a.json',
+                     'workspaces/ws/datastores/a.json.json'):
+            deferred.changed(path)
+        self.assertEqual(set([('ws', 'my.store'), ('ws', 'a.json')]),
+                         deferred.datastores)
+        self.assertFalse(deferred.global_reset)
+
+    def test_global_reset(self):
+        with self.gs.deferred_reload():
+            self.upload('roads')
+            self.gs.create_workspace('new', 'http://new')
+            self.gs.reset()
+        self.assertEqual(['workspaces.json', 'reset.json'], self.posts())
+
+    def test_datastore_resets_not_supported(self):
+        self.stub.store_resets = False
+        with self.gs.deferred_reload():
+            self.upload('roads')
+            self.gs.reset()
+        self.assertEqual(['workspaces/ws0/datastores/roads/reset.json',
+                          'reset.json'], self.posts())
+
+    def test_flushed_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.gs.deferred_reload():
+                self.gs.reload()
+                raise ValueError()
+        self.assertEqual(['reload.json'], self.posts())
+        self.gs.reload()
+        self.assertEqual(['reload.json', 'reload.json'], self.posts())
+
+    def test_reset_after_failed_reload(self):
+        self.stub.fail('reload', code=500)
+        with self.assertRaisesRegex(IOError, '500'):
+            with self.gs.deferred_reload():
+                self.upload('roads')
+                self.gs.reload()
+                self.gs.reset()
+        self.assertEqual(['reload.json',
+                          'workspaces/ws0/datastores/roads/reset.json'],
+                         self.posts())
+        self.assertEqual(0, self.gs._deferred_depth)
+        self.assertIsNone(self.gs._deferred)
+
+    def test_reset_datastore(self):
+        self.gs.get_datastore('ds0', 'ws0').reset()
+        self.assertEqual(['workspaces/ws0/datastores/ds0/reset.json'],
+                         self.posts())
+        self.assertRaises(IOError, self.gs.reset_datastore, 'invalid', 'ws0')
+
+
+class GeoServerRetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubGeoServer(synthetic_catalog(layers=2)).start()
+        self.retry = RetryPolicy(retries=2, backoff=0)
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver',
+                            retry=self.retry, circuit_breaker=self.breaker)
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def test_retried(self):
+        self.stub.fail('styles/style0', times=2, code=502)
+        self.assertEqual('style0', self.gs.get_style('style0').get_name())
+        self.assertEqual(3, len(self.stub.requests))
+        self.assertEqual(2, self.retry.retried)
+        self.assertEqual(0, self.retry.exhausted)
+        self.assertEqual('closed', self.breaker.state)
+
+    def test_exhausted(self):
+        self.stub.fail('fonts', times=3)
+        self.assertRaises(IOError, self.gs.fonts)
+        self.assertEqual(3, len(self.stub.requests))
+        self.assertEqual(1, self.retry.exhausted)
+
+    def test_not_retried(self):
+        self.stub.fail('reload', times=1)
+        self.assertRaises(IOError, self.gs.reload)
+        self.stub.fail('fonts', times=1, code=500)
+        self.assertRaises(IOError, self.gs.fonts)
+        self.assertEqual(2, len(self.stub.requests))
+        self.assertEqual(0, self.retry.retried)
+
+    def test_retry_after(self):
+        self.stub.retry_after = 0
+        self.stub.fail('fonts', times=1)
+        self.gs.fonts()
+        self.assertEqual(1, self.retry.retry_after)
+
+    def test_circuit_breaker(self):
+        self.stub.fail('fonts', times=3, code=500)
+        for _ in range(3):
+            self.assertRaises(IOError, self.gs.fonts)
+        self.assertEqual('open', self.breaker.state)
+        self.assertEqual(1, self.breaker.opened)
+
+        self.assertRaises(IOError, self.gs.get_styles)
+        self.assertEqual(3, len(self.stub.requests))
+        self.assertEqual(1, self.breaker.rejected)
+
+    def test_circuit_breaker_broken_response(self):
+        self.gs.circuit_breaker = CircuitBreaker(failure_threshold=1,
+                                                 reset_timeout=0)
+        self.stub.fail('fonts', times=1, code=500)
+        self.assertRaises(IOError, self.gs.fonts)
+        self.stub.truncate('fonts')
+        self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                          self.gs.fonts)
+        self.assertEqual(2, self.gs.circuit_breaker.failures)
+        self.assertEqual(3, len(self.gs.fonts()))
+        self.assertEqual('closed', self.gs.circuit_breaker.state)
+
+    def test_circuit_breaker_broken_stream(self):
+        self.gs.circuit_breaker = CircuitBreaker(failure_threshold=1)
+        self.stub.truncate('layers')
+        self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                          self.gs.get_layers)
+        self.assertEqual('open', self.gs.circuit_breaker.state)
+
+    def test_circuit_breaker_stream(self):
+        self.gs.circuit_breaker = CircuitBreaker(failure_threshold=1,
+                                                 reset_timeout=0)
+        self.stub.fail('layers', times=1, code=500)
+        self.assertRaises(IOError, self.gs.get_layers)
+        self.assertEqual(1, self.gs.circuit_breaker.failures)
+        self.assertEqual(2, len(self.gs.get_layers()))
+        self.assertEqual('closed', self.gs.circuit_breaker.state)
+        # Stopping early is not a failure
+        next(self.gs.iter_layers())
+        self.assertEqual(0, self.gs.circuit_breaker.failures)
+
+    def test_connection_error(self):
+        self.stub.stop()
+        gs = GeoServer(self.stub.url, 'admin', 'geoserver', retry=self.retry,
+                       circuit_breaker=self.breaker)
+        self.assertRaises(IOError, gs.fonts)
+        self.assertEqual(2, self.retry.retried)
+        self.assertEqual('open', self.breaker.state)
+        gs.close()
+
+
 if __name__ == '__main__':
     unittest.main()
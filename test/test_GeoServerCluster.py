@@ -0,0 +1,102 @@
+#pylint: disable=missing-docstring
+
+import os
+import time
+import unittest
+from test.stub import StubGeoServer
+from geoserver.GeoServer import GeoServer
+from geoserver.GeoServerCluster import GeoServerCluster, QuorumError
+
+SLD = os.path.join(os.path.dirname(__file__), 'sample.sld')
+
+
+class GeoServerClusterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stubs = [StubGeoServer(latency=0.05).start() for _ in range(3)]
+        self.cluster = GeoServerCluster.connect(
+            [stub.url for stub in self.stubs], 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.cluster.close()
+        for stub in self.stubs:
+            stub.stop()
+
+    def test_create_workspace(self):
+        result = self.cluster.create_workspace('ws', 'http://ws')
+        self.assertEqual(3, len(result.succeeded))
+        self.assertEqual([stub.url for stub in self.stubs],
+                         [r.url for r in result])
+        for stub in self.stubs:
+            self.assertIn('ws', stub.catalog.workspaces)
+        self.assertEqual('http://ws',
+                         self.cluster.primary.get_workspace('ws')
+                         .get_namespace())
+
+    def test_create_style_in_parallel(self):
+        with open(SLD) as f:
+            sld = f.read()
+        start = time.monotonic()
+        self.cluster.create_style('style', sld)
+        # Two requests per node
+        self.assertLess(time.monotonic() - start, 0.25)
+        for stub in self.stubs:
+            self.assertIn('style', stub.catalog.styles)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.cluster.create_workspace, '', 'ns')
+        self.assertEqual([[], [], []], [stub.requests for stub in self.stubs])
+        self.assertRaises(ValueError, GeoServerCluster, [])
+        self.assertRaises(ValueError, GeoServerCluster, self.cluster.nodes, 4)
+        self.assertRaises(ValueError, self.cluster.reload, 0)
+
+    def test_quorum(self):
+        self.stubs[1].fail('reset', code=500)
+        with self.assertRaises(QuorumError) as cm:
+            self.cluster.reset()
+        self.assertEqual([True, False, True], [r.ok for r in cm.exception.result])
+        self.assertIn(self.stubs[1].url, str(cm.exception))
+
+        self.stubs[1].fail('reset', code=500)
+        result = self.cluster.apply(lambda gs: gs.reset(), quorum=2)
+        self.assertEqual([self.stubs[1].url], [r.url for r in result.failed])
+        self.assertIsInstance(result.failed[0].error, IOError)
+
+    def test_rolling_reload(self):
+        start = time.monotonic()
+        result = self.cluster.reload()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        self.assertEqual(3, len(result.succeeded))
+        for stub in self.stubs:
+            self.assertEqual([('POST', '/geoserver/rest/reload.json')],
+                             stub.requests)
+
+        start = time.monotonic()
+        self.cluster.reload(concurrency=3)
+        self.assertLess(time.monotonic() - start, 0.15)
+
+    def test_rolling_reload_stops(self):
+        self.stubs[0].fail('reload', code=500)
+        with self.assertRaises(QuorumError) as cm:
+            self.cluster.reload()
+        self.assertEqual([False, False, False],
+                         [r.ok for r in cm.exception.result])
+        self.assertEqual([1, 0, 0],
+                         [len(stub.requests) for stub in self.stubs])
+
+    def test_rolling_reload_quorum(self):
+        cluster = GeoServerCluster(self.cluster.nodes, quorum=2)
+        self.stubs[0].fail('reload', code=500)
+        result = cluster.reload()
+        self.assertEqual([False, True, True], [r.ok for r in result])
+
+    def test_nodes(self):
+        gs = GeoServer(self.stubs[0].url, 'admin', 'geoserver')
+        cluster = GeoServerCluster([gs])
+        self.assertIs(gs, cluster.primary)
+        self.assertEqual(1, cluster.quorum)
+        self.assertEqual(3, self.cluster.quorum)
+        cluster.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
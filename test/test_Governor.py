@@ -0,0 +1,178 @@
+#pylint: disable=missing-docstring
+
+import asyncio
+import threading
+import time
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.AsyncGeoServer import AsyncGeoServer
+from geoserver.GeoServer import GeoServer
+from geoserver.Governor import Governor
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out')
+        time.sleep(0.005)
+
+
+class GovernorTestCase(unittest.TestCase):
+    def test_in_flight_limit(self):
+        governor = Governor(max_in_flight=2)
+        governor.acquire()
+        governor.acquire()
+        thread = threading.Thread(target=governor.acquire)
+        thread.start()
+        wait_for(lambda: governor.queue_depth == 1)
+        self.assertEqual(2, governor.in_flight)
+
+        governor.release(200, 0.01)
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(0, governor.queue_depth)
+        self.assertEqual(2, governor.in_flight)
+        self.assertEqual(2, governor.peak_in_flight)
+        self.assertEqual(1, governor.throttled)
+
+    def test_decrease(self):
+        governor = Governor(max_in_flight=8, latency_target=1)
+        for _ in range(3):
+            governor.acquire()
+        governor.release(503, 0.01)
+        self.assertEqual(4, governor.limit)
+        # Sent before the decrease
+        governor.release(None, 0.01)
+        self.assertEqual(4, governor.limit)
+
+        governor.acquire()
+        time.sleep(0.01)
+        governor.release(429, 0.005)
+        self.assertEqual(2, governor.limit)
+        governor.acquire()
+        time.sleep(0.01)
+        governor.release(200, 0.005)
+        self.assertEqual(2, governor.limit)
+        self.assertEqual(2, governor.decreases)
+
+    def test_latency_target(self):
+        governor = Governor(max_in_flight=8, min_in_flight=3,
+                            latency_target=0.1)
+        governor.acquire()
+        governor.release(200, 0.5)
+        self.assertEqual(4, governor.limit)
+        governor.acquire()
+        time.sleep(0.25)
+        governor.release(200, 0.2)
+        self.assertEqual(3, governor.limit)
+
+    def test_increase(self):
+        governor = Governor(max_in_flight=4, latency_target=None)
+        governor.acquire()
+        governor.release(500, 10)
+        self.assertEqual(2, governor.limit)
+        for _ in range(3):
+            governor.acquire()
+            governor.release(404, 10)
+        self.assertEqual(3, governor.limit)
+        for _ in range(10):
+            governor.acquire()
+            governor.release(200, 10)
+        self.assertEqual(4, governor.limit)
+
+    def test_no_outcome(self):
+        governor = Governor(max_in_flight=2)
+        governor.acquire()
+        governor.release()
+        self.assertEqual(2, governor.limit)
+        self.assertEqual(0, governor.in_flight)
+
+    def test_rate(self):
+        governor = Governor(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(7):
+            governor.acquire()
+            governor.release(200, 0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(5, governor.throttled)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Governor, max_in_flight=0)
+        self.assertRaises(ValueError, Governor, max_in_flight=2,
+                          min_in_flight=3)
+        self.assertRaises(ValueError, Governor, rate=0)
+
+
+class GovernorAsyncTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_released_by_thread(self):
+        governor = Governor(max_in_flight=1)
+        await governor.acquire_async()
+        task = asyncio.ensure_future(governor.acquire_async())
+        await asyncio.sleep(0.01)
+        self.assertEqual(1, governor.queue_depth)
+        threading.Thread(target=governor.release).start()
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(0, governor.queue_depth)
+        self.assertEqual(1, governor.in_flight)
+
+    async def test_rate(self):
+        governor = Governor(rate=100, burst=1)
+        start = time.monotonic()
+        for _ in range(3):
+            await governor.acquire_async()
+            governor.release(200, 0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.015)
+
+
+class GovernedGeoServerTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=20)
+        self.stub = StubGeoServer(catalog, latency=0.01).start()
+        self.governor = Governor(max_in_flight=3)
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver',
+                            max_workers=8, governor=self.governor)
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def test_in_flight_limit(self):
+        self.assertEqual(20, len(self.gs.get_layers()))
+        self.assertEqual(3, self.governor.peak_in_flight)
+        self.assertGreater(self.governor.throttled, 0)
+        self.assertEqual(0, self.governor.in_flight)
+        self.assertEqual(0, self.governor.queue_depth)
+
+    def test_errors_decrease_limit(self):
+        self.stub.fail('fonts', code=503)
+        self.assertRaises(IOError, self.gs.fonts)
+        self.assertEqual(1, self.governor.limit)
+        self.assertEqual(0, self.governor.in_flight)
+
+    def test_connection_error(self):
+        self.stub.stop()
+        self.assertRaises(IOError, self.gs.fonts)
+        self.assertEqual(1, self.governor.limit)
+        self.assertEqual(0, self.governor.in_flight)
+
+    def test_shared_with_async(self):
+        gs = AsyncGeoServer(self.stub.url, 'admin', 'geoserver',
+                            max_concurrency=8, governor=self.governor)
+
+        async def layers():
+            try:
+                return await gs.get_layers()
+            finally:
+                await gs.close()
+
+        thread = threading.Thread(target=self.gs.get_layers)
+        thread.start()
+        self.assertEqual(20, len(asyncio.run(layers())))
+        thread.join()
+        self.assertEqual(3, self.governor.peak_in_flight)
+        self.assertEqual(0, self.governor.in_flight)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+#pylint: disable=missing-docstring
+
+import os
+import shutil
+import tempfile
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.GeoServer import GeoServer
+from geoserver.Importer import ImportFile, Importer, Manifest, scan
+from geoserver.Upload import SHAPEFILE, GEOTIFF
+
+
+def touch(path, content=b'data'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+class ImporterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for ext in ('.shp', '.shx', '.dbf', '.prj'):
+            touch(os.path.join(self.dir, 'a', 'roads' + ext))
+            touch(os.path.join(self.dir, 'b', 'roads' + ext))
+        touch(os.path.join(self.dir, 'a', 'c', 'dem.tif'), b'II*\x00data')
+        touch(os.path.join(self.dir, 'README.txt'))
+
+        self.stub = StubGeoServer(synthetic_catalog(layers=0)).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+        shutil.rmtree(self.dir)
+
+    def path(self, *parts):
+        return os.path.join(self.dir, *parts)
+
+    def test_scan(self):
+        files = [(f.path, f.type, f.store) for f in scan(self.dir)]
+        self.assertEqual([
+            (self.path('a', 'c', 'dem.tif'), GEOTIFF, 'dem'),
+            (self.path('a', 'roads.shp'), SHAPEFILE, 'roads'),
+            (self.path('b', 'roads.shp'), SHAPEFILE, 'roads_2')], files)
+
+    def test_scan_file(self):
+        files = scan(self.path('a', 'roads.shp'))
+        self.assertEqual(['roads.shp', 'roads.shx', 'roads.dbf', 'roads.prj'],
+                         [os.path.basename(f) for f in files[0].files()])
+
+    def test_run(self):
+        importer = Importer(self.gs, 'ws0', workers=3)
+        result = importer.run(self.dir)
+        self.assertEqual(3, len(result.imported))
+        self.assertEqual([], result.failed)
+        names = set(l.get_name() for l in self.gs.get_layers())
+        self.assertEqual(set(['ws0:dem', 'ws0:roads']), names)
+        self.assertEqual(set([('ws0', 'ds0'), ('ws0', 'roads'),
+                              ('ws0', 'roads_2'), ('ws0', 'dem')]),
+                         set(self.stub.catalog.datastores))
+
+    def test_run_progress(self):
+        done = []
+        Importer(self.gs, 'ws0').run(self.dir,
+                                     lambda f, e: done.append((f.store, e)))
+        self.assertEqual(set([('dem', None), ('roads', None),
+                              ('roads_2', None)]), set(done))
+
+    def test_retry(self):
+        self.stub.fail('workspaces/ws0/coveragestores/dem/file.geotiff', 2)
+        importer = Importer(self.gs, 'ws0', retries=2)
+        importer.retry_delay = 0
+        result = importer.run(self.dir)
+        self.assertEqual(3, len(result.imported))
+
+    def test_failed(self):
+        self.stub.fail('workspaces/ws0/coveragestores/dem/file.geotiff', 3)
+        importer = Importer(self.gs, 'ws0', retries=1)
+        importer.retry_delay = 0
+        result = importer.run(self.dir)
+        self.assertEqual(2, len(result.imported))
+        self.assertEqual(['dem'], [f.store for f, e in result.failed])
+        self.assertTrue(isinstance(result.failed[0][1], IOError))
+
+    def test_resume(self):
+        manifest = self.path('manifest.json')
+        self.stub.fail('workspaces/ws0/coveragestores/dem/file.geotiff', 1)
+        importer = Importer(self.gs, 'ws0', retries=0, manifest=manifest)
+        self.assertEqual(1, len(importer.run(self.dir).failed))
+
+        self.stub.reset_counters()
+        importer = Importer(self.gs, 'ws0', retries=0, manifest=manifest)
+        result = importer.run(self.dir)
+        self.assertEqual(['dem'], [f.store for f in result.imported])
+        self.assertEqual(2, len(result.skipped))
+        self.assertEqual(1, len(self.stub.requests))
+
+    def test_resume_changed_file(self):
+        manifest = self.path('manifest.json')
+        Importer(self.gs, 'ws0', manifest=manifest).run(self.dir)
+        touch(self.path('a', 'roads.dbf'), b'changed data')
+        result = Importer(self.gs, 'ws0', manifest=manifest).run(self.dir)
+        self.assertEqual(['roads'], [f.store for f in result.imported])
+
+    def test_resume_new_file(self):
+        manifest = self.path('manifest.json')
+        Importer(self.gs, 'ws0', manifest=manifest).run(self.dir)
+        for ext in ('.shp', '.shx', '.dbf'):
+            touch(self.path('a', 'x', 'roads' + ext))
+        self.assertEqual(['roads', 'roads_3', 'roads_2'],
+                         [f.store for f in scan(self.dir, {
+                             self.path('a', 'roads.shp'): 'roads',
+                             self.path('b', 'roads.shp'): 'roads_2'})
+                          if f.type == SHAPEFILE])
+
+        result = Importer(self.gs, 'ws0', manifest=manifest).run(self.dir)
+        self.assertEqual([self.path('a', 'x', 'roads.shp')],
+                         [f.path for f in result.imported])
+        self.assertEqual(['roads_3'], [f.store for f in result.imported])
+        self.assertEqual(3, len(result.skipped))
+
+    def test_manifest_store(self):
+        manifest = Manifest(self.path('manifest.json'))
+        path = self.path('a', 'roads.shp')
+        manifest.add(ImportFile(path, SHAPEFILE, 'roads'))
+        self.assertTrue(manifest.is_done(ImportFile(path, SHAPEFILE, 'roads')))
+        self.assertFalse(manifest.is_done(ImportFile(path, SHAPEFILE, 'other')))
+        self.assertEqual({path: 'roads'},
+                         Manifest(self.path('manifest.json')).stores())
+
+    def test_invalid_workspace(self):
+        self.assertRaises(ValueError, Importer, self.gs, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#pylint: disable=missing-docstring
+
+import json
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.GeoServer import GeoServer
+from geoserver.JsonStream import iter_items
+
+
+def split(text, size):
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class IterItemsTestCase(unittest.TestCase):
+    def assertItems(self, expected, document, key='layer'):
+        text = json.dumps(document, ensure_ascii=False)
+        for size in range(1, len(text.encode('utf-8')) + 1):
+            with self.subTest(size=size):
+                self.assertEqual(expected,
+                                 list(iter_items(split(text, size), key)))
+
+    def test_listing(self):
+        layers = [{'name': 'topp:states', 'href': 'http://x/{"}]'},
+                  {'name': 'ñandú\\', 'keywords': [{'a': []}, 'b']}]
+        self.assertItems(layers, {'layers': {'layer': layers}})
+
+    def test_scalars(self):
+        self.assertItems([1, 2.5, 's,]', None, True, [3]],
+                         {'layer': [1, 2.5, 's,]', None, True, [3]]})
+
+    def test_single_entry(self):
+        self.assertItems([{'name': 'a'}], {'layers': {'layer': {'name': 'a'}}})
+
+    def test_empty(self):
+        self.assertItems([], {'layers': ''})
+        self.assertItems([], {'layers': {'layer': []}})
+        self.assertItems([], {})
+
+    def test_key_as_value(self):
+        self.assertItems([1], {'a': 'layer', 'b': ['layer'], 'layer': [1]})
+
+    def test_stops_at_first_item(self):
+        chunks = iter([b'{"layer": [{"a": 1},', b'{"b": 2}]}'])
+        items = iter_items(chunks, 'layer')
+        self.assertEqual({'a': 1}, next(items))
+        self.assertEqual([b'{"b": 2}]}'], list(chunks))
+
+    def test_truncated(self):
+        self.assertRaises(ValueError, list,
+                          iter_items([b'{"layer": [{"a": 1}, {"b"'], 'layer'))
+        self.assertRaises(ValueError, list,
+                          iter_items([b'{"layer": [{"a": }]}'], 'layer'))
+
+
+class StreamedListingTestCase(unittest.TestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=300)
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver', lazy=True)
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+
+    def test_listing(self):
+        self.assertEqual(list(self.stub.catalog.layers),
+                         [l.get_name() for l in self.gs.get_layers()])
+        self.stub.catalog.layers.clear()
+        self.assertEqual([], self.gs.get_layers())
+
+    def test_closed_early(self):
+        layers = self.gs.iter_layers()
+        self.assertEqual('ws0:layer0', next(layers).get_name())
+        layers.close()
+        self.assertEqual(1, len(self.stub.requests))
+        self.assertEqual('ws0:layer0', self.gs.get_layers()[0].get_name())
+
+    def test_error(self):
+        self.stub.fail('layers', code=500)
+        self.assertRaises(IOError, self.gs.get_layers)
@@ -0,0 +1,125 @@
+#pylint: disable=missing-docstring
+
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.AsyncGeoServer import AsyncGeoServer
+from geoserver.GeoServer import GeoServer
+from geoserver.Metrics import Metrics, path_template
+
+
+class PathTemplateTestCase(unittest.TestCase):
+    def test_path_template(self):
+        self.assertEqual('layers', path_template('layers.json'))
+        self.assertEqual('layers/*', path_template('layers/topp:states.json'))
+        self.assertEqual('styles/*', path_template('styles/burg.sld'))
+        self.assertEqual('namespaces/*', path_template('namespaces/topp'))
+        self.assertEqual('workspaces/*/datastores/*/file.shp',
+                         path_template('workspaces/topp/datastores/roads/'
+                                       'file.shp'))
+        self.assertEqual('workspaces/*/layers',
+                         path_template('workspaces/layers/layers.json'))
+        self.assertEqual('workspaces/*',
+                         path_template('workspaces/topp.json?recurse=true'))
+        self.assertEqual('reload', path_template('reload.json'))
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.metrics('get', 'layers/a:b.json', 200, 100, 0.02)
+        self.metrics('GET', 'layers/a:c.json', 404, 10, 0.2)
+        self.metrics('GET', 'styles/s.json', None, 0, 20)
+
+    def test_aggregated(self):
+        layers = self.metrics.endpoints[('GET', 'layers/*')]
+        self.assertEqual(2, layers.count)
+        self.assertEqual(1, layers.errors)
+        self.assertEqual(110, layers.bytes)
+        self.assertEqual({200: 1, 404: 1}, layers.statuses)
+        self.assertEqual(0.25, layers.quantile(0.95))
+        self.assertEqual(0.025, layers.quantile(0.5))
+        self.assertIsNone(
+            self.metrics.endpoints[('GET', 'styles/*')].quantile(0.5))
+
+    def test_summary(self):
+        lines = self.metrics.summary().splitlines()
+        self.assertEqual(['METHOD', 'ENDPOINT', 'REQUESTS', 'ERRORS', 'BYTES',
+                          'MEAN', 'MS', 'P95', 'MS'], lines[0].split())
+        self.assertEqual(['GET', 'layers/*', '2', '1', '110', '110.0',
+                          '<250'], lines[1].split())
+        self.assertEqual(['GET', 'styles/*', '1', '1', '0', '20000.0',
+                          '>10000'], lines[2].split())
+        self.assertEqual(['total', '3', '2', '110', '6740.0'],
+                         lines[3].split())
+
+    def test_openmetrics(self):
+        text = self.metrics.openmetrics()
+        self.assertTrue(text.endswith('# EOF\n'))
+        lines = text.splitlines()
+        labels = 'method="GET",endpoint="layers/*"'
+        self.assertIn('geoserver_requests_total{%s,status="404"} 1' % labels,
+                      lines)
+        self.assertIn('geoserver_requests_total{method="GET",'
+                      'endpoint="styles/*",status="error"} 1', lines)
+        self.assertIn('geoserver_response_bytes_total{%s} 110' % labels,
+                      lines)
+        self.assertIn('geoserver_request_duration_seconds_bucket'
+                      '{%s,le="0.025"} 1' % labels, lines)
+        self.assertIn('geoserver_request_duration_seconds_bucket'
+                      '{%s,le="+Inf"} 2' % labels, lines)
+        self.assertIn('geoserver_request_duration_seconds_count{%s} 2'
+                      % labels, lines)
+
+
+class GeoServerMetricsTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        catalog = synthetic_catalog(workspaces=2, layers=4, styles=2)
+        self.stub = StubGeoServer(catalog).start()
+        self.metrics = Metrics()
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def test_on_request(self):
+        events = []
+        with GeoServer(self.stub.url, 'admin', 'geoserver',
+                       on_request=lambda *e: events.append(e)) as gs:
+            gs.get_style('style1')
+            self.assertIsNone(gs.get_layergroup('invalid'))
+        self.assertEqual([('GET', 'styles/style1.json', 200),
+                          ('GET', 'layergroups/invalid.json', 404)],
+                         [e[:3] for e in events])
+        self.assertTrue(events[0][3] > 0)
+        self.assertTrue(events[0][4] >= 0)
+
+    def test_get_layers(self):
+        with GeoServer(self.stub.url, 'admin', 'geoserver',
+                       on_request=self.metrics) as gs:
+            gs.get_layers()
+        counts = {k[1]: v.count for k, v in self.metrics.endpoints.items()}
+        self.assertEqual(len(self.stub.requests), sum(counts.values()))
+        self.assertEqual(4, counts['layers/*'])
+        self.assertEqual(1, counts['layers'])
+
+    def test_streamed_bytes(self):
+        self.stub.chunked = True
+        events = []
+        with GeoServer(self.stub.url, 'admin', 'geoserver',
+                       on_request=lambda *e: events.append(e)) as gs:
+            gs.get_styles()
+            body = gs._session.get(gs.url + 'styles.json').content
+        self.assertEqual(('GET', 'styles.json', 200, len(body)), events[0][:4])
+        self.assertTrue(len(body) > 64)
+
+    async def test_async(self):
+        gs = AsyncGeoServer(self.stub.url, 'admin', 'geoserver',
+                            on_request=self.metrics)
+        try:
+            await gs.get_styles()
+        finally:
+            await gs.close()
+        self.assertEqual(1, self.metrics.endpoints[('GET', 'styles')].count)
+
+
+if __name__ == '__main__':
+    unittest.main()
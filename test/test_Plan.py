@@ -0,0 +1,202 @@
+#pylint: disable=missing-docstring
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.GeoServer import GeoServer, NotFoundError
+from geoserver.Plan import load_state, plan
+
+SLD = '<StyledLayerDescriptor version="1.0.0"/>'
+
+
+class PlanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for ext in ('.shp', '.shx', '.dbf'):
+            with open(os.path.join(self.dir, 'roads' + ext), 'wb') as f:
+                f.write(b'data')
+        with open(os.path.join(self.dir, 'roads.sld'), 'w') as f:
+            f.write(SLD)
+
+        catalog = synthetic_catalog(layers=2, styles=2, layergroups=1,
+                                    layers_per_group=2)
+        catalog.add_style('style0', SLD)
+        self.stub = StubGeoServer(catalog).start()
+        self.catalog = self.stub.catalog
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+        shutil.rmtree(self.dir)
+
+    def write_state(self, state, name='state.json'):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            json.dump(state, f)
+        return path
+
+    def new_state(self):
+        return {
+            'workspaces': [{'name': 'roads', 'namespace': 'http://roads'}],
+            'styles': [{'name': 'roads',
+                        'file': os.path.join(self.dir, 'roads.sld')}],
+            'datastores': [{'name': 'roads', 'workspace': 'roads',
+                            'file': os.path.join(self.dir, 'roads.shp')}],
+            'layers': [{'name': 'roads:roads', 'style': 'roads'}],
+            'layergroups': [{'name': 'all',
+                             'layers': ['roads:roads', 'ws0:layer0']}]
+        }
+
+    def test_load_state_json(self):
+        path = self.write_state({'styles': [{'name': 's', 'file': 'a.sld'}]})
+        state = load_state(path)
+        self.assertEqual(os.path.join(self.dir, 'a.sld'),
+                         state['styles'][0]['file'])
+
+    def test_load_state_yaml(self):
+        path = os.path.join(self.dir, 'state.yaml')
+        with open(path, 'w') as f:
+            f.write('workspaces:\n  - name: ws\n    namespace: http://ws\n')
+        state = load_state(path)
+        self.assertEqual([{'name': 'ws', 'namespace': 'http://ws'}],
+                         state['workspaces'])
+
+    def test_load_state_invalid(self):
+        path = self.write_state({'layers': [{'style': 'style0'}]})
+        self.assertRaises(ValueError, load_state, path)
+
+    def test_plan_unchanged(self):
+        state = {
+            'workspaces': [{'name': 'ws0', 'namespace': 'http://ws0'}],
+            'styles': [{'name': 'style0', 'sld': SLD}],
+            'datastores': [{'name': 'ds0', 'workspace': 'ws0',
+                            'file': os.path.join(self.dir, 'roads.shp')}],
+            'layers': [{'name': 'ws0:layer1', 'style': 'style1'}],
+            'layergroups': [{'name': 'group0',
+                             'layers': ['ws0:layer0', 'ws0:layer1']}]
+        }
+        self.stub.reset_counters()
+        changes = plan(self.gs, state)
+        self.assertEqual(0, len(changes))
+        # 3 listings, 1 namespace, 1 SLD, 2 store listings, 1 layer, 1 group
+        self.assertEqual(9, len(self.stub.requests))
+        self.assertTrue(all(m == 'GET' for m, _ in self.stub.requests))
+
+    def test_plan(self):
+        state = self.new_state()
+        state['workspaces'].append({'name': 'ws0', 'namespace': 'http://x'})
+        state['styles'].append({'name': 'style0', 'sld': SLD + ' '})
+        state['styles'].append({'name': 'style1', 'absent': True})
+        state['layers'].append({'name': 'ws0:layer1', 'absent': True})
+        self.assertEqual('\n'.join([
+            '+ workspace roads',
+            '~ workspace ws0',
+            '+ style roads',
+            '- style style1',
+            '+ datastore roads:roads',
+            '~ layer roads:roads',
+            '- layer ws0:layer1',
+            '+ layergroup all'
+        ]), str(plan(self.gs, state)))
+
+    def test_plan_missing_layer(self):
+        state = {'layers': [{'name': 'ws0:missing', 'style': 'style0'}]}
+        self.assertRaises(ValueError, plan, self.gs, state)
+
+    def test_plan_server_error(self):
+        self.stub.fail('layers/ws0:layer1', code=500)
+        state = {'layers': [{'name': 'ws0:layer1', 'style': 'style0'}]}
+        with self.assertRaises(IOError) as cm:
+            plan(self.gs, state)
+        self.assertNotIsInstance(cm.exception, NotFoundError)
+
+    def test_plan_missing_namespace(self):
+        state = {'workspaces': [{'name': 'new'}]}
+        self.assertRaises(ValueError, plan, self.gs, state)
+
+    def test_execute(self):
+        state = self.new_state()
+        result = plan(self.gs, state).execute()
+        self.assertEqual(5, len(result.done))
+        self.assertEqual([], result.failed)
+
+        c = self.catalog
+        self.assertEqual('http://roads', c.workspaces['roads'])
+        self.assertEqual(SLD, c.styles['roads'])
+        self.assertIn(('roads', 'roads'), c.datastores)
+        self.assertEqual('roads', c.layers['roads:roads']['style'])
+        self.assertEqual(['roads:roads', 'ws0:layer0'], c.layergroups['all'])
+        self.assertEqual(0, len(plan(self.gs, state)))
+
+    def test_execute_order(self):
+        self.stub.reset_counters()
+        plan(self.gs, self.new_state()).execute()
+        writes = [(m, p) for m, p in self.stub.requests if m != 'GET']
+        order = [
+            ('POST', '/geoserver/rest/workspaces.json'),
+            ('PUT', '/geoserver/rest/workspaces/roads/datastores/roads/'
+                    'file.shp'),
+            ('PUT', '/geoserver/rest/layers/roads:roads.json'),
+            ('POST', '/geoserver/rest/layergroups.json')
+        ]
+        positions = [writes.index(w) for w in order]
+        self.assertEqual(sorted(positions), positions)
+        self.assertLess(writes.index(('PUT', '/geoserver/rest/styles/roads')),
+                        positions[2])
+
+    def test_execute_delete(self):
+        state = {
+            'workspaces': [{'name': 'ws0', 'absent': True}],
+            'styles': [{'name': 'style1', 'absent': True}],
+            'layergroups': [{'name': 'group0', 'absent': True}]
+        }
+        changes = plan(self.gs, state)
+        self.assertEqual(3, len(changes))
+        result = changes.execute()
+        self.assertEqual(3, len(result.done))
+        self.assertEqual({}, self.catalog.workspaces)
+        self.assertEqual({}, self.catalog.layers)
+        self.assertEqual({}, self.catalog.layergroups)
+        self.assertEqual(['style0'], list(self.catalog.styles))
+
+    def test_plan_deleted_style_in_use(self):
+        state = {
+            'styles': [{'name': 'style1', 'absent': True}],
+            'layers': [{'name': 'ws0:layer0', 'style': 'style1'}]
+        }
+        with self.assertRaisesRegex(ValueError, '- style style1 > '
+                                    '~ layer ws0:layer0 > - style style1'):
+            plan(self.gs, state)
+
+    def test_execute_cycle(self):
+        changes = plan(self.gs, {'styles': [{'name': 'style1',
+                                             'absent': True}]})
+        action = changes.actions[0]
+        action.deps.append(action)
+        self.assertRaisesRegex(ValueError, 'Cannot apply - style style1',
+                               changes.execute)
+        self.assertIn('style1', self.catalog.styles)
+
+    def test_execute_skips_dependents(self):
+        changes = plan(self.gs, self.new_state())
+        self.stub.fail('workspaces', code=500)
+        done = []
+        result = changes.execute(
+            progress=lambda action, error: done.append(str(action)))
+        self.assertEqual(['+ workspace roads'],
+                         [str(a) for a, _ in result.failed])
+        self.assertEqual(['+ style roads'],
+                         [str(a) for a in result.done])
+        self.assertEqual(['+ datastore roads:roads', '~ layer roads:roads',
+                          '+ layergroup all'],
+                         [str(a) for a in result.skipped])
+        self.assertEqual(['+ style roads', '+ workspace roads'], sorted(done))
+        self.assertNotIn('all', self.catalog.layergroups)
+
+
+if __name__ == '__main__':
+    unittest.main()
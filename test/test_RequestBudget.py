@@ -0,0 +1,165 @@
+#pylint: disable=missing-docstring
+"""
+Upper bounds on the REST requests of every catalog traversal, so that
+changes reintroducing round trips (N+1 patterns, resources fetched twice)
+fail the build.
+
+Catalogs have W workspaces with one datastore each, S styles, N layers and
+G layer groups of K layers.
+"""
+
+import unittest
+from contextlib import contextmanager
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.AsyncGeoServer import AsyncGeoServer
+from geoserver.GeoServer import GeoServer
+
+# (W, S, N, G, K)
+SIZES = [(1, 1, 10, 2, 3), (3, 4, 60, 12, 5), (10, 5, 200, 40, 8)]
+
+
+# Requests to hydrate the workspaces, namespaces and datastores of the layers
+# of W workspaces: a workspace, its namespace and its datastore each, plus
+# the namespaces listing
+def workspaces_budget(w):
+    return 3 * w + 1
+
+
+def layers_budget(w, s, n):
+    # a layer and its resource each, plus the styles
+    return 2 * n + s + workspaces_budget(w)
+
+
+class RequestBudgetMixin:
+    def start(self, size, **kwargs):
+        w, s, n, g, k = size
+        catalog = synthetic_catalog(workspaces=w, styles=s, layers=n,
+                                    layergroups=g, layers_per_group=k)
+        self.stub = StubGeoServer(catalog).start()
+        self.addCleanup(self.stub.stop)
+        return self.client(**kwargs)
+
+    @contextmanager
+    def assertRequestsAtMost(self, budget):
+        self.stub.reset_counters()
+        yield
+        self.assertLessEqual(len(self.stub.requests), budget,
+                             'Request budget exceeded')
+
+
+class GeoServerRequestBudgetTestCase(RequestBudgetMixin, unittest.TestCase):
+    def client(self, **kwargs):
+        gs = GeoServer(self.stub.url, 'admin', 'geoserver', **kwargs)
+        self.addCleanup(gs.close)
+        return gs
+
+    def test_get_workspaces(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                gs = self.start(size)
+                with self.assertRequestsAtMost(2 + size[0]):
+                    gs.get_workspaces()
+
+    def test_get_workspace(self):
+        gs = self.start(SIZES[-1])
+        with self.assertRequestsAtMost(3):
+            gs.get_workspace('ws1')
+
+    def test_get_styles(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                gs = self.start(size)
+                with self.assertRequestsAtMost(1):
+                    gs.get_styles()
+
+    def test_get_layers(self):
+        for kwargs in ({}, {'max_workers': 8}):
+            for size in SIZES:
+                with self.subTest(size=size, **kwargs):
+                    w, s, n, _, _ = size
+                    gs = self.start(size, **kwargs)
+                    with self.assertRequestsAtMost(1 + layers_budget(w, s, n)):
+                        gs.get_layers()
+
+    def test_get_layers_lazy(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                gs = self.start(size, lazy=True)
+                with self.assertRequestsAtMost(1):
+                    gs.get_layers()
+
+    def test_get_layer(self):
+        gs = self.start(SIZES[-1])
+        with self.assertRequestsAtMost(layers_budget(1, 1, 1)):
+            gs.get_layer('ws1:layer1')
+
+    def test_get_layergroups(self):
+        for kwargs in ({}, {'max_workers': 8}):
+            for size in SIZES:
+                with self.subTest(size=size, **kwargs):
+                    w, s, n, g, _ = size
+                    gs = self.start(size, **kwargs)
+                    with self.assertRequestsAtMost(
+                            1 + g + layers_budget(w, s, n)):
+                        gs.get_layergroups()
+
+    def test_get_layergroups_nested(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                w, s, n, g, _ = size
+                gs = self.start(size, max_workers=8)
+                # every group nested in another one and in a group of groups
+                groups = list(self.stub.catalog.layergroups)
+                for i, name in enumerate(groups):
+                    self.stub.catalog.add_layergroup('nested%d' % i,
+                                                     [name] + groups[:i])
+                with self.assertRequestsAtMost(
+                        1 + 2 * g + layers_budget(w, s, n)):
+                    gs.get_layergroups()
+
+    def test_get_layergroups_lazy(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                gs = self.start(size, lazy=True)
+                with self.assertRequestsAtMost(1):
+                    gs.get_layergroups()
+
+    def test_get_layergroup(self):
+        w, s, _, _, k = SIZES[-1]
+        gs = self.start(SIZES[-1])
+        with self.assertRequestsAtMost(1 + layers_budget(w, s, k)):
+            gs.get_layergroup('group0')
+
+
+class AsyncGeoServerRequestBudgetTestCase(RequestBudgetMixin,
+                                          unittest.IsolatedAsyncioTestCase):
+    def client(self, **kwargs):
+        gs = AsyncGeoServer(self.stub.url, 'admin', 'geoserver', **kwargs)
+        self.addAsyncCleanup(gs.close)
+        return gs
+
+    async def test_get_layers(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                w, s, n, _, _ = size
+                gs = self.start(size)
+                with self.assertRequestsAtMost(1 + layers_budget(w, s, n)):
+                    await gs.get_layers()
+
+    async def test_get_layergroups(self):
+        for size in SIZES:
+            with self.subTest(size=size):
+                w, s, n, g, _ = size
+                gs = self.start(size)
+                with self.assertRequestsAtMost(1 + g + layers_budget(w, s, n)):
+                    await gs.get_layergroups()
+
+    async def test_get_layergroup(self):
+        w, s, _, _, k = SIZES[-1]
+        gs = self.start(SIZES[-1])
+        with self.assertRequestsAtMost(1 + layers_budget(w, s, k)):
+            await gs.get_layergroup('group0')
+
+
+if __name__ == '__main__':
+    unittest.main()
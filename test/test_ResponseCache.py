@@ -0,0 +1,100 @@
+#pylint: disable=missing-docstring
+
+import time
+import unittest
+from geoserver.ResponseCache import ResponseCache
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def test_lookup_missing(self):
+        cache = ResponseCache()
+        self.assertEqual((None, False), cache.lookup('styles/burg'))
+        self.assertEqual(1, cache.misses)
+
+    def test_lookup_fresh(self):
+        cache = ResponseCache()
+        cache.put('styles/burg', {'style': {}}, 10)
+        entry, fresh = cache.lookup('styles/burg')
+        self.assertEqual({'style': {}}, entry.value)
+        self.assertTrue(fresh)
+        self.assertEqual(1, cache.hits)
+
+    def test_ttl_per_type(self):
+        cache = ResponseCache(ttl={'styles': 0})
+        cache.put('styles/burg', 'burg', 4, etag='"1"')
+        cache.put('layers/roads', 'roads', 5, etag='"2"')
+        entry, fresh = cache.lookup('styles/burg')
+        self.assertEqual('burg', entry.value)
+        self.assertFalse(fresh)
+        self.assertTrue(cache.lookup('layers/roads')[1])
+
+    def test_expired_without_validators(self):
+        cache = ResponseCache(default_ttl=0)
+        cache.put('styles/burg', 'burg', 4)
+        self.assertEqual((None, False), cache.lookup('styles/burg'))
+        self.assertEqual(0, len(cache))
+
+    def test_revalidated(self):
+        cache = ResponseCache(default_ttl=0.05)
+        cache.put('styles/burg', 'burg', 4, last_modified='yesterday')
+        time.sleep(0.06)
+        self.assertFalse(cache.lookup('styles/burg')[1])
+        cache.revalidated('styles/burg')
+        self.assertTrue(cache.lookup('styles/burg')[1])
+        self.assertEqual(1, cache.revalidations)
+
+    def test_lru_max_entries(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put('styles/a', 'a', 1)
+        cache.put('styles/b', 'b', 1)
+        cache.lookup('styles/a')
+        cache.put('styles/c', 'c', 1)
+        self.assertIsNone(cache.lookup('styles/b')[0])
+        self.assertIsNotNone(cache.lookup('styles/a')[0])
+        self.assertIsNotNone(cache.lookup('styles/c')[0])
+        self.assertEqual(1, cache.evictions)
+
+    def test_lru_max_bytes(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.put('styles/a', 'a', 6)
+        cache.put('styles/b', 'b', 6)
+        cache.put('styles/c', 'c', 20)
+        self.assertEqual(1, len(cache))
+        self.assertIsNotNone(cache.lookup('styles/b')[0])
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        for key in ['workspaces', 'workspaces/ws', 'workspaces/ws/datastores',
+                    'workspaces/other', 'namespaces/ws']:
+            cache.put(key, key, 1)
+        cache.invalidate('workspaces/ws')
+        self.assertEqual(['workspaces/other', 'namespaces/ws'],
+                         [k for k in ['workspaces', 'workspaces/ws',
+                                      'workspaces/ws/datastores',
+                                      'workspaces/other', 'namespaces/ws']
+                          if cache.lookup(k)[0] is not None])
+
+    def test_invalidate_upload(self):
+        keys = ['layers', 'layers/ws:a', 'layers/other:b', 'layergroups',
+                'styles', 'workspaces/ws/datastores',
+                'workspaces/ws/coveragestores',
+                'workspaces/ws/datastores/ds',
+                'workspaces/ws/datastores/ds/featuretypes',
+                'workspaces/ws/datastores/other']
+        cache = ResponseCache()
+        for key in keys:
+            cache.put(key, key, 1)
+        cache.invalidate('workspaces/ws/datastores/ds/file.shp')
+        self.assertEqual(['layers/other:b', 'styles',
+                          'workspaces/ws/datastores/other'],
+                         [k for k in keys if cache.lookup(k)[0] is not None])
+
+    def test_clear(self):
+        cache = ResponseCache()
+        cache.put('styles/a', 'a', 1)
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#pylint: disable=missing-docstring
+
+import time
+import unittest
+from email.utils import formatdate
+from geoserver.Retry import CircuitBreaker, RetryPolicy
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_should_retry(self):
+        policy = RetryPolicy(retries=2)
+        self.assertTrue(policy.should_retry('get', 0, 503))
+        self.assertTrue(policy.should_retry('DELETE', 1))
+        self.assertFalse(policy.should_retry('get', 2, 503))
+        self.assertEqual(2, policy.retried)
+        self.assertEqual(1, policy.exhausted)
+
+    def test_should_not_retry(self):
+        policy = RetryPolicy()
+        self.assertFalse(policy.should_retry('get', 0, 200))
+        self.assertFalse(policy.should_retry('get', 0, 500))
+        self.assertFalse(policy.should_retry('post', 0, 503))
+        self.assertFalse(policy.should_retry('put', 0, 503, replayable=False))
+        self.assertEqual(0, policy.retried)
+        self.assertEqual(0, policy.exhausted)
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+        self.assertEqual([1, 2, 4, 5], [policy.delay(a) for a in range(4)])
+
+    def test_delay_jitter(self):
+        policy = RetryPolicy(backoff=1)
+        for attempt in range(5):
+            self.assertTrue(0 <= policy.delay(attempt) <= 2 ** attempt)
+
+    def test_delay_retry_after(self):
+        policy = RetryPolicy(backoff=1, max_backoff=10, jitter=False)
+        self.assertEqual(3, policy.delay(0, '3'))
+        self.assertEqual(10, policy.delay(0, '120'))
+        self.assertEqual(2, policy.delay(1, '0'))
+        date = formatdate(time.time() + 60, usegmt=True)
+        self.assertEqual(10, policy.delay(0, date))
+        self.assertEqual(1, policy.delay(0, 'invalid'))
+        self.assertEqual(4, policy.retry_after)
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def test_open(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record(False)
+        self.assertTrue(breaker.allow())
+        breaker.record(False)
+        self.assertEqual('open', breaker.state)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(1, breaker.opened)
+        self.assertEqual(1, breaker.rejected)
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record(False)
+        breaker.record(True)
+        breaker.record(False)
+        self.assertEqual('closed', breaker.state)
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record(False)
+        self.assertEqual('half-open', breaker.state)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record(True)
+        self.assertEqual('closed', breaker.state)
+        self.assertTrue(breaker.allow())
+
+    def test_half_open_failure(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+        for _ in range(3):
+            breaker.record(False)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record(False)
+        self.assertEqual('open', breaker.state)
+        self.assertEqual(2, breaker.opened)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#pylint: disable=missing-docstring
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.GeoServer import GeoServer
+from geoserver.Snapshot import read_snapshot, snapshot
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.jsonl')
+        catalog = synthetic_catalog(workspaces=2, layers=20, styles=3,
+                                    layergroups=2, layers_per_group=3)
+        catalog.add_coveragestore('ws1', 'dem')
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+        shutil.rmtree(self.dir)
+
+    def records(self, record_type):
+        return [r for r in read_snapshot(self.path)
+                if r['type'] == record_type]
+
+    def test_snapshot(self):
+        result = self.gs.snapshot(self.path)
+        self.assertEqual(2, result.count('workspace'))
+        self.assertEqual(20, result.count('layer'))
+        self.assertEqual(24, result.fetched)
+
+        with open(self.path) as f:
+            header = json.loads(f.readline())
+        self.assertEqual('snapshot', header['type'])
+        self.assertEqual(self.gs.url, header['url'])
+
+        self.assertEqual({'type': 'workspace', 'name': 'ws1',
+                          'namespace': 'http://ws1'},
+                         self.records('workspace')[1])
+        self.assertEqual([('datastore', 'ws0', 'ds0'),
+                          ('datastore', 'ws1', 'ds1'),
+                          ('coveragestore', 'ws1', 'dem')],
+                         [(r['type'], r['workspace'], r['name'])
+                          for r in read_snapshot(self.path)
+                          if 'workspace' in r])
+        self.assertEqual(['style0', 'style1', 'style2'],
+                         [r['name'] for r in self.records('style')])
+        self.assertEqual({'type': 'layer', 'name': 'ws1:layer1',
+                          'style': 'style1', 'store': 'ds1'},
+                         self.records('layer')[1])
+        self.assertEqual({'type': 'layergroup', 'name': 'group1',
+                          'layers': ['ws1:layer1', 'ws0:layer2',
+                                     'ws1:layer3']},
+                         self.records('layergroup')[1])
+
+    def test_snapshot_requests(self):
+        self.stub.reset_counters()
+        snapshot(self.gs, self.path)
+        # 4 listings, 2 store listings per workspace and one request for
+        # each workspace, layer and layer group
+        self.assertEqual(4 + 4 + 2 + 20 + 2, len(self.stub.requests))
+
+    def test_refresh_unchanged(self):
+        self.stub.etags = True
+        snapshot(self.gs, self.path)
+        with open(self.path) as f:
+            before = f.read()
+        self.stub.reset_counters()
+        result = snapshot(self.gs, self.path, refresh=True)
+        self.assertEqual(0, result.fetched)
+        # Listings and a conditional request per workspace, layer and group
+        self.assertEqual(8 + 24, len(self.stub.requests))
+        with open(self.path) as f:
+            self.assertEqual(before, f.read())
+
+    def test_refresh_changed(self):
+        self.stub.etags = True
+        snapshot(self.gs, self.path)
+        catalog = self.stub.catalog
+        catalog.add_layer('ws0', 'roads', 'ds0', 'style2')
+        catalog.layers['ws1:layer1']['style'] = 'style0'
+        catalog.workspaces['ws0'] = 'http://new'
+        del catalog.layers['ws0:layer0']
+        del catalog.layergroups['group0']
+        self.stub.reset_counters()
+
+        result = snapshot(self.gs, self.path, refresh=True)
+        self.assertEqual(3, result.fetched)
+        self.assertIn(('GET', '/geoserver/rest/layers/ws0:roads.json'),
+                      self.stub.requests)
+        names = [r['name'] for r in self.records('layer')]
+        self.assertNotIn('ws0:layer0', names)
+        self.assertEqual('ws0:roads', names[-1])
+        self.assertEqual('style0', self.records('layer')[0]['style'])
+        self.assertEqual('http://new',
+                         self.records('workspace')[0]['namespace'])
+        self.assertEqual(['group1'],
+                         [r['name'] for r in self.records('layergroup')])
+
+    def test_refresh_without_validators(self):
+        snapshot(self.gs, self.path)
+        self.stub.catalog.layers['ws1:layer1']['style'] = 'style0'
+        result = snapshot(self.gs, self.path, refresh=True)
+        self.assertEqual(24, result.fetched)
+        self.assertEqual('style0', self.records('layer')[1]['style'])
+
+    def test_server_error(self):
+        self.stub.fail('layers/ws0:layer2', code=500)
+        self.assertRaises(IOError, snapshot, self.gs, self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_refresh_missing_file(self):
+        result = snapshot(self.gs, self.path, refresh=True)
+        self.assertEqual(24, result.fetched)
+
+    def test_refresh_other_url(self):
+        snapshot(self.gs, self.path)
+        with open(self.path) as f:
+            lines = f.readlines()
+        lines[0] = lines[0].replace(self.gs.url, 'http://other/rest/')
+        with open(self.path, 'w') as f:
+            f.writelines(lines)
+        self.assertEqual(24, snapshot(self.gs, self.path,
+                                      refresh=True).fetched)
+
+    def test_read_invalid(self):
+        with open(self.path, 'w') as f:
+            f.write('{"type": "layer"}\n')
+        self.assertRaises(ValueError, read_snapshot, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#pylint: disable=missing-docstring
+
+import os
+import shutil
+import tempfile
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.GeoServer import GeoServer
+from geoserver.StyleSync import StyleSync, scan, sld_hash, validate_sld
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SLD_1_1 = '''<StyledLayerDescriptor version="1.1.0"
+    xmlns="http://www.opengis.net/sld" xmlns:se="http://www.opengis.net/se"
+    xmlns:ogc="http://www.opengis.net/ogc">
+  <NamedLayer>
+    <se:Name>roads</se:Name>
+    <UserStyle>
+      <se:FeatureTypeStyle>
+        <se:Rule>
+          <ogc:Filter/>
+          <se:LineSymbolizer/>
+        </se:Rule>
+      </se:FeatureTypeStyle>
+    </UserStyle>
+  </NamedLayer>
+</StyledLayerDescriptor>'''
+
+
+def read(name):
+    with open(os.path.join(TEST_DIR, name)) as f:
+        return f.read()
+
+
+class ValidateTestCase(unittest.TestCase):
+    def test_valid(self):
+        validate_sld(read('sample.sld'))
+        validate_sld(SLD_1_1)
+
+    def test_invalid(self):
+        for sld, error in [
+                (read('invalid.sld'), 'Malformed XML'),
+                ('<a/>', 'Not a StyledLayerDescriptor'),
+                (SLD_1_1.replace('1.1.0', '2.0'), 'Unsupported SLD version'),
+                (SLD_1_1.replace('<se:LineSymbolizer/>', ''),
+                 'Rule without'),
+                (SLD_1_1.replace('<ogc:Filter/>', '<se:Size/>'),
+                 'Unexpected Size in Rule'),
+                (SLD_1_1.replace('se:FeatureTypeStyle', 'se:Other'),
+                 'UserStyle without CoverageStyle or FeatureTypeStyle')]:
+            with self.subTest(error=error):
+                self.assertRaisesRegex(ValueError, error, validate_sld, sld)
+
+    def test_hash(self):
+        self.assertEqual(sld_hash('<a>\n</a>'), sld_hash('\n<a>\r\n</a>  '))
+        self.assertNotEqual(sld_hash('<a>\n</a>'), sld_hash('<a></a>'))
+
+
+class StyleSyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.sld = read('sample.sld')
+        catalog = synthetic_catalog(layers=0, styles=0)
+        catalog.add_style('same', self.sld + '\n')
+        catalog.add_style('changed', SLD_1_1)
+        catalog.add_style('other', SLD_1_1)
+        for name in ('new', 'same', 'changed'):
+            self.write(name + '.sld', self.sld)
+        self.write('broken.sld', read('invalid.sld'))
+        self.write('README.txt', 'not a style')
+
+        self.stub = StubGeoServer(catalog).start()
+        self.gs = GeoServer(self.stub.url, 'admin', 'geoserver')
+
+    def tearDown(self):
+        self.gs.close()
+        self.stub.stop()
+        shutil.rmtree(self.dir)
+
+    def write(self, name, content):
+        with open(os.path.join(self.dir, name), 'w') as f:
+            f.write(content)
+
+    def test_scan(self):
+        self.assertEqual(['broken', 'changed', 'new', 'same'],
+                         [f.name for f in scan(self.dir)])
+
+    def test_run(self):
+        seen = []
+        result = StyleSync(self.gs, workers=4).run(
+            self.dir, lambda f, outcome, error: seen.append((f.name, outcome)))
+        self.assertEqual(['new'], [f.name for f in result.created])
+        self.assertEqual(['changed'], [f.name for f in result.updated])
+        self.assertEqual(['same'], [f.name for f in result.skipped])
+        self.assertEqual(['broken'], [f.name for f, _ in result.invalid])
+        self.assertEqual([], result.failed)
+        self.assertEqual(4, len(seen))
+
+        styles = self.stub.catalog.styles
+        self.assertEqual(self.sld, styles['new'])
+        self.assertEqual(self.sld, styles['changed'])
+        self.assertEqual(SLD_1_1, styles['other'])
+        # listing + 2 SLDs + POST and PUT of new + PUT of changed
+        self.assertEqual(6, len(self.stub.requests))
+        self.assertFalse([r for r in self.stub.requests if 'broken' in r[1]])
+
+    def test_run_unchanged(self):
+        StyleSync(self.gs).run(self.dir)
+        self.stub.reset_counters()
+        result = StyleSync(self.gs).run(self.dir)
+        self.assertEqual(['changed', 'new', 'same'],
+                         sorted(f.name for f in result.skipped))
+        self.assertEqual(4, len(self.stub.requests))
+
+    def test_run_failed(self):
+        self.stub.fail('styles/changed', code=500)
+        result = StyleSync(self.gs).run(self.dir)
+        self.assertEqual(['changed'], [f.name for f, _ in result.failed])
+        self.assertEqual(['new'], [f.name for f in result.created])
+
+    def test_run_only_invalid(self):
+        os.remove(os.path.join(self.dir, 'new.sld'))
+        os.remove(os.path.join(self.dir, 'same.sld'))
+        os.remove(os.path.join(self.dir, 'changed.sld'))
+        result = StyleSync(self.gs).run(self.dir)
+        self.assertEqual(1, len(result.invalid))
+        self.assertEqual(0, len(self.stub.requests))
@@ -0,0 +1,66 @@
+#pylint: disable=missing-docstring
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from geoserver.Upload import (FileStream, zip_stream, file_type,
+                              shapefile_files, SHAPEFILE, GEOTIFF)
+
+
+class UploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.files = []
+        for ext in ('.shp', '.shx', '.dbf', '.cpg'):
+            path = os.path.join(self.dir, 'roads' + ext)
+            with open(path, 'wb') as f:
+                f.write(os.urandom(100000) + ext.encode() * 1000)
+            self.files.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_file_type(self):
+        self.assertEqual(SHAPEFILE, file_type('a/roads.SHP'))
+        self.assertEqual(GEOTIFF, file_type('dem.tif'))
+        self.assertEqual(GEOTIFF, file_type('dem.tiff'))
+        self.assertRaises(ValueError, file_type, 'roads.dbf')
+
+    def test_shapefile_files(self):
+        self.assertEqual(
+            ['roads.shp', 'roads.shx', 'roads.dbf', 'roads.cpg'],
+            [os.path.basename(f) for f in shapefile_files(self.files[0])])
+
+    def test_zip_stream(self):
+        chunks = list(zip_stream(self.files, chunk_size=8192))
+        self.assertTrue(len(chunks) > 4)
+        self.assertTrue(all(chunks))
+        self.assertTrue(max(map(len, chunks)) < 20000)
+        z = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        self.assertEqual(['roads.shp', 'roads.shx', 'roads.dbf', 'roads.cpg'],
+                         z.namelist())
+        with open(self.files[2], 'rb') as f:
+            self.assertEqual(f.read(), z.read('roads.dbf'))
+
+    def test_zip_stream_progress(self):
+        sent = []
+        size = sum(map(len, zip_stream(self.files,
+                                       lambda s, t: sent.append((s, t)))))
+        self.assertEqual((size, None), sent[-1])
+        self.assertEqual(sorted(sent), sent)
+
+    def test_file_stream(self):
+        sent = []
+        with FileStream(self.files[0], lambda s, t: sent.append((s, t))) as f:
+            self.assertEqual(104000, len(f))
+            data = b''.join(f)
+        self.assertEqual(104000, len(data))
+        self.assertEqual((104000, 104000), sent[-1])
+        self.assertEqual(2, len(sent))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,353 @@
+#pylint: disable=missing-docstring
+
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from test.stub import StubGeoServer, synthetic_catalog
+from geoserver.cli import parser as cli
+from geoserver.cli.shell import Shell
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_after(code):
+    """Modules of geoserver imported by running some code in a new
+    interpreter."""
+    script = ('import sys\n{}\nprint(" ".join(sorted(m for m in sys.modules '
+              'if m.startswith("geoserver") or m == "requests")))'
+              .format(code))
+    out = subprocess.run([sys.executable, '-c', script], check=True,
+                         stdout=subprocess.PIPE, cwd=ROOT,
+                         env=dict(os.environ, PYTHONPATH=ROOT))
+    return out.stdout.decode().split()
+
+
+def run_script(*argv):
+    """Runs the geoserver script in a new interpreter."""
+    return subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'geoserver', 'cli', 'geoserver')] +
+        list(argv), stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=ROOT))
+
+
+class ScriptTestCase(unittest.TestCase):
+    def test_success(self):
+        with StubGeoServer() as stub:
+            out = run_script('--url', stub.url, 'fonts')
+        self.assertEqual(0, out.returncode)
+        self.assertEqual(3, len(out.stdout.splitlines()))
+
+    def test_failed_batch(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'commands.txt')
+        with open(path, 'w') as f:
+            f.write('fonts\ninvalid\n')
+        with StubGeoServer() as stub:
+            out = run_script('--url', stub.url, 'batch', path)
+        self.assertEqual(1, out.returncode)
+        self.assertEqual(b'1 commands failed',
+                         out.stderr.splitlines()[-1])
+
+
+class ParserTestCase(unittest.TestCase):
+    def test_help_matches_modules(self):
+        for key, (module, help_text) in cli.COMMANDS.items():
+            with self.subTest(command=key):
+                self.assertEqual(importlib.import_module(module).HELP,
+                                 help_text)
+                self.assertIs(importlib.import_module(module),
+                              cli.actions[key])
+
+    def test_commands_not_imported(self):
+        self.assertEqual(['geoserver', 'geoserver.cli',
+                          'geoserver.cli.parser'],
+                         imported_after('import geoserver.cli.parser'))
+
+    def test_only_command_imported(self):
+        modules = imported_after(
+            'from geoserver.cli.parser import parser\n'
+            'parser.parse_args(["import", "dir", "-w", "ws"])')
+        self.assertIn('geoserver.cli.imports', modules)
+        self.assertNotIn('geoserver.cli.datastore', modules)
+        self.assertNotIn('requests', modules)
+
+    def test_parse_args(self):
+        args = cli.parser.parse_args(['snapshot', 'out.jsonl', '--refresh'])
+        self.assertEqual('snapshot', args.cmd)
+        self.assertTrue(args.refresh)
+        self.assertEqual(8, args.workers)
+
+    def test_full_parser(self):
+        self.assertIs(cli.parser, cli.full_parser())
+        for subparser in cli.subparsers.choices.values():
+            self.assertIsNone(subparser._module)
+        self.assertIn('--workspace',
+                      cli.subparsers.choices['import'].format_help())
+
+
+class FontsTestCase(unittest.TestCase):
+    def test_run(self):
+        with StubGeoServer() as stub:
+            args = cli.parser.parse_args(['--url', stub.url, 'fonts'])
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                cli.actions[args.cmd].run(args)
+        self.assertEqual(['Arial', 'Times New Roman', 'Verdana'],
+                         out.getvalue().splitlines())
+
+    def test_governor(self):
+        with StubGeoServer() as stub:
+            args = cli.parser.parse_args(['--url', stub.url, '--rate', '100',
+                                          '--max-in-flight', '2', 'fonts'])
+            with contextlib.redirect_stdout(io.StringIO()):
+                cli.actions[args.cmd].run(args)
+        self.assertEqual(2, args.governor.max_in_flight)
+        self.assertEqual(100, args.governor.rate)
+        self.assertEqual(0, args.governor.in_flight)
+
+
+class ListingTestCase(unittest.TestCase):
+    def run_command(self, *argv):
+        catalog = synthetic_catalog(workspaces=2, layers=10, styles=2,
+                                    layergroups=2, layers_per_group=2)
+        with StubGeoServer(catalog) as stub:
+            args = cli.parser.parse_args(['--url', stub.url] + list(argv))
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                cli.actions[args.cmd].run(args)
+        return [line.split('\t') for line in out.getvalue().splitlines()]
+
+    def test_layers(self):
+        self.assertEqual([['ws1:layer1', 'style1', 'ds1'],
+                          ['ws1:layer3', 'style1', 'ds1']],
+                         self.run_command('layer', '-w', 'ws1', '--limit', '2'))
+
+    def test_layergroups(self):
+        self.assertEqual([['group1', 'ws1:layer1,ws0:layer2']],
+                         self.run_command('layergroup', '-n', '*1'))
+
+    def test_styles_and_workspaces(self):
+        self.assertEqual([['style0'], ['style1']], self.run_command('style'))
+        self.assertEqual([['ws1', 'http://ws1']],
+                         self.run_command('ws', '--name', 'ws1'))
+
+
+class DatastoreTestCase(unittest.TestCase):
+    def test_file_type_mismatch(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'dem.tif')
+        with open(path, 'wb') as f:
+            f.write(b'data')
+        with StubGeoServer() as stub:
+            stub.catalog.add_workspace('ws0')
+            args = cli.parser.parse_args(['--url', stub.url, 'ds', 'create',
+                                          'shp', 'dem', '-w', 'ws0', '-f',
+                                          path])
+            self.assertRaisesRegex(ValueError, 'Not a shapefile: ',
+                                   cli.actions['ds'].run, args)
+            self.assertEqual([], stub.requests)
+
+
+class StyleSyncTestCase(unittest.TestCase):
+    def test_sync(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        shutil.copy(os.path.join(ROOT, 'test', 'sample.sld'),
+                    os.path.join(tmp, 'burg.sld'))
+        shutil.copy(os.path.join(ROOT, 'test', 'invalid.sld'), tmp)
+        with StubGeoServer() as stub:
+            args = cli.parser.parse_args(['--url', stub.url, 'style', 'sync',
+                                          tmp, '-j', '2'])
+            out = io.StringIO()
+            err = io.StringIO()
+            with contextlib.redirect_stdout(out), \
+                    contextlib.redirect_stderr(err):
+                self.assertRaisesRegex(ValueError, '1 styles not synced',
+                                       cli.actions['style'].run, args)
+            self.assertIn('burg', stub.catalog.styles)
+        self.assertEqual(['Created burg',
+                          '1 created, 0 updated, 0 skipped, 1 invalid, '
+                          '0 failed'], out.getvalue().splitlines())
+        self.assertIn('Invalid', err.getvalue())
+
+    def test_exit_status(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        shutil.copy(os.path.join(ROOT, 'test', 'invalid.sld'), tmp)
+        with StubGeoServer() as stub:
+            out = run_script('--url', stub.url, 'style', 'sync', tmp)
+        self.assertEqual(1, out.returncode)
+        self.assertEqual(b'1 styles not synced', out.stderr.splitlines()[-1])
+
+
+class ClusterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stubs = [StubGeoServer().start() for _ in range(2)]
+
+    def tearDown(self):
+        for stub in self.stubs:
+            stub.stop()
+
+    def run_command(self, *argv):
+        urls = []
+        for stub in self.stubs:
+            urls += ['--url', stub.url]
+        args = cli.parser.parse_args(urls + list(argv))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            cli.actions[args.cmd].run(args)
+        return [line.split('\t') for line in out.getvalue().splitlines()]
+
+    def test_create_workspace(self):
+        self.assertEqual([[stub.url, 'OK'] for stub in self.stubs],
+                         self.run_command('ws', 'create', 'ws', 'http://ws'))
+        for stub in self.stubs:
+            self.assertIn('ws', stub.catalog.workspaces)
+
+    def test_create_style(self):
+        self.run_command('style', 'create', 'burg', '-f',
+                         os.path.join(ROOT, 'test', 'sample.sld'))
+        for stub in self.stubs:
+            self.assertIn('burg', stub.catalog.styles)
+
+    def test_reload(self):
+        self.assertEqual([[stub.url, 'OK'] for stub in self.stubs],
+                         self.run_command('reload', '-c', '2'))
+
+    def test_quorum(self):
+        self.stubs[0].fail('reset', code=500)
+        self.assertEqual([[self.stubs[1].url, 'OK']],
+                         self.run_command('--quorum', '1', 'reset')[1:])
+        self.stubs[0].fail('reset', code=500)
+        self.assertRaises(IOError, self.run_command, 'reset')
+        self.assertEqual(2, len(self.stubs[1].requests))
+
+    def test_quorum_exit_status(self):
+        urls = []
+        for stub in self.stubs:
+            urls += ['--url', stub.url]
+        for command in ('reset', 'reload'):
+            with self.subTest(command=command):
+                self.stubs[0].fail(command, code=500)
+                out = run_script(*urls + [command])
+                self.assertEqual(1, out.returncode)
+                self.assertIn('FAILED', out.stdout.decode().splitlines()[0])
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.stub = StubGeoServer().start()
+        self.stub.catalog.add_workspace('ws0')
+
+    def tearDown(self):
+        self.stub.stop()
+        shutil.rmtree(self.dir)
+
+    def batch(self, lines, *options):
+        path = os.path.join(self.dir, 'commands.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        args = cli.parser.parse_args(['--url', self.stub.url, 'batch', path] +
+                                     list(options))
+        out = io.StringIO()
+        err = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                cli.actions['batch'].run(args)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+        return out.getvalue().splitlines(), err.getvalue().splitlines()
+
+    def test_commands(self):
+        snapshot = os.path.join(self.dir, 'snapshot.jsonl')
+        out, err = self.batch(['fonts', '# comment', '',
+                               'snapshot "{}"  # quoted'.format(snapshot)])
+        self.assertEqual([], err)
+        self.assertEqual(['Arial', 'Times New Roman', 'Verdana'], out[:3])
+        self.assertTrue(os.path.exists(snapshot))
+
+    def test_single_connection(self):
+        out, _ = self.batch(['fonts', 'ws get ws0', 'fonts'])
+        self.assertEqual(7, len(out))
+        self.assertEqual(1, self.stub.connections)
+
+    def test_warm_lookups(self):
+        self.batch(['fonts', 'fonts', 'fonts'])
+        self.assertEqual(1, len(self.stub.requests))
+
+    def test_stops_on_error(self):
+        out, err = self.batch(['fonts', 'invalid', 'fonts'])
+        self.assertEqual(3, len(out))
+        self.assertTrue(err[-2].endswith(':2: Invalid command: invalid'))
+        self.assertEqual('1 commands failed', err[-1])
+
+    def test_keep_going(self):
+        out, err = self.batch(['shell', 'fonts'], '--keep-going')
+        self.assertEqual(3, len(out))
+        self.assertTrue(err[0].endswith(':1: Cannot run shell from batch'))
+
+    def test_listing_after_upload(self):
+        for ext in ('.shp', '.shx', '.dbf'):
+            with open(os.path.join(self.dir, 'roads' + ext), 'wb') as f:
+                f.write(b'data')
+        out, err = self.batch([
+            'layer', 'ds create shp roads -w ws0 -f "{}"'.format(
+                os.path.join(self.dir, 'roads.shp')), 'layer'])
+        self.assertNotIn('Error', '\n'.join(err))
+        self.assertEqual(['ws0:roads'], [line.split('\t')[0] for line in out])
+
+    def test_coalesce_reload(self):
+        out, err = self.batch(['reload', 'reset', 'fonts', 'reload', 'reset'],
+                              '--coalesce-reload')
+        self.assertEqual([], err)
+        self.assertEqual(7, len(out))
+        self.assertEqual([('POST', '/geoserver/rest/reload.json'),
+                          ('POST', '/geoserver/rest/reset.json')],
+                         self.stub.requests[-2:])
+        self.assertEqual(3, len(self.stub.requests))
+
+    def test_coalesce_reload_cluster(self):
+        other = StubGeoServer().start()
+        self.addCleanup(other.stop)
+        path = os.path.join(self.dir, 'commands.txt')
+        with open(path, 'w') as f:
+            f.write('reload\nreload\nfonts\n')
+        args = cli.parser.parse_args(['--url', self.stub.url, '--url',
+                                      other.url, 'batch', path,
+                                      '--coalesce-reload'])
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.actions['batch'].run(args)
+        self.assertEqual([('POST', '/geoserver/rest/reload.json')],
+                         other.requests)
+        self.assertEqual(2, len(self.stub.requests))
+        self.assertEqual(1, self.stub.connections)
+
+
+class ShellTestCase(unittest.TestCase):
+    def test_shell(self):
+        with StubGeoServer() as stub:
+            args = cli.parser.parse_args(['--url', stub.url, 'shell'])
+            out = io.StringIO()
+            err = io.StringIO()
+            with contextlib.redirect_stdout(out), \
+                    contextlib.redirect_stderr(err):
+                with cli.actions['shell'].shared_client(args):
+                    Shell(args, stdin=io.StringIO('fonts\nbad\nfonts\n'),
+                          stdout=out).cmdloop()
+            self.assertEqual(1, stub.connections)
+        self.assertEqual(['Arial', 'Times New Roman', 'Verdana'] * 2,
+                         out.getvalue().splitlines()[1:-1])
+        self.assertIn('Invalid command: bad', err.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()